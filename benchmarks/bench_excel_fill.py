@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Excel 填寫效能基準：openpyxl 完整載入 vs 直接修補 xlsx 套件
+
+合成含大型資料表（預設 5 萬列）的活頁簿，只填寫規格表中十幾個儲存格，
+比較兩種作法的耗時與 Python 記憶體峰值（tracemalloc）。
+
+用法：
+    python benchmarks/bench_excel_fill.py --rows 10000 50000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from openpyxl import Workbook, load_workbook  # noqa: E402
+
+from xlsx_package import patch_cells  # noqa: E402
+
+CELLS = {f"B{r}": f"Value {r}" for r in range(2, 14)}
+
+
+def build_workbook(path: Path, rows: int):
+    wb = Workbook(write_only=True)
+    spec = wb.create_sheet("規格表")
+    for r in range(1, 15):
+        spec.append([f"欄位 {r}", None])
+    data = wb.create_sheet("Data")
+    for r in range(rows):
+        data.append([r, f"item-{r}", r * 1.5, "描述文字" * 3, r % 7])
+    wb.save(str(path))
+
+
+def fill_openpyxl(template: Path, output: Path):
+    wb = load_workbook(str(template))
+    ws = wb["規格表"]
+    for ref, value in CELLS.items():
+        ws[ref] = value
+    wb.save(str(output))
+
+
+def fill_patch(template: Path, output: Path):
+    patch_cells(template, output, "規格表", CELLS)
+
+
+def measure(fn, template: Path, output: Path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(template, output)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel 填寫效能基準")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'openpyxl(s)':>12} {'peak(MB)':>9} {'patch(s)':>9} {'peak(MB)':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        for rows in args.rows:
+            template = tmp_path / f"bench_{rows}.xlsx"
+            build_workbook(template, rows)
+            full_t, full_m = measure(fill_openpyxl, template, tmp_path / "out_openpyxl.xlsx")
+            patch_t, patch_m = measure(fill_patch, template, tmp_path / "out_patch.xlsx")
+            print(f"{rows:>8} {full_t:>12.2f} {full_m:>9.1f} {patch_t:>9.3f} {patch_m:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Excel 驗證效能基準：openpyxl 完整載入 vs openpyxl 唯讀模式 vs 串流讀取（read_cells）
+
+合成含大型資料表（預設 5 萬列）的活頁簿，讀取資料表中十幾個儲存格與最後一列
+（串流讀取無法提早停止的最差情況），比較耗時與 Python 記憶體峰值（tracemalloc）。
+
+用法：
+    python benchmarks/bench_excel_validate.py --rows 10000 50000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from openpyxl import Workbook, load_workbook  # noqa: E402
+
+from validate_consistency import _read_only_cells  # noqa: E402
+from xlsx_package import read_cells  # noqa: E402
+
+
+def build_workbook(path: Path, rows: int):
+    wb = Workbook(write_only=True)
+    data = wb.create_sheet("Data")
+    for r in range(rows):
+        data.append([r, f"item-{r}", r * 1.5, "描述文字" * 3, r % 7])
+    wb.save(str(path))
+
+
+def read_full(path: Path, refs):
+    wb = load_workbook(str(path))
+    ws = wb["Data"]
+    return {ref: ws[ref].value for ref in refs}
+
+
+def read_openpyxl_read_only(path: Path, refs):
+    wb = load_workbook(str(path), read_only=True)
+    try:
+        return _read_only_cells(wb["Data"], refs)
+    finally:
+        wb.close()
+
+
+def read_stream(path: Path, refs):
+    return read_cells(path, "Data", refs)
+
+
+def measure(fn, path: Path, refs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(path, refs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel 驗證效能基準")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'full(s)':>8} {'peak(MB)':>9} {'read_only(s)':>13} {'peak(MB)':>9} "
+          f"{'stream(s)':>10} {'peak(MB)':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        for rows in args.rows:
+            path = tmp_path / f"bench_{rows}.xlsx"
+            build_workbook(path, rows)
+            refs = [f"B{r}" for r in range(2, 14)] + [f"C{rows}"]
+            full_t, full_m = measure(read_full, path, refs)
+            ro_t, ro_m = measure(read_openpyxl_read_only, path, refs)
+            stream_t, stream_m = measure(read_stream, path, refs)
+            print(f"{rows:>8} {full_t:>8.2f} {full_m:>9.1f} {ro_t:>13.2f} {ro_m:>9.1f} "
+                  f"{stream_t:>10.3f} {stream_m:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
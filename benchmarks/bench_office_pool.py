@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Office 實例池效能基準：每份文件 Dispatch/Quit vs 保留已啟動的實例
+
+以 FakeComBackend 模擬 Word/Excel 啟動成本（--startup）與單份文件處理時間
+（--work），計算整批文件的平均每份成本。在 Windows 上可加 --real 使用真正的
+win32com 後端（需安裝 Office）。
+
+用法：
+    python benchmarks/bench_office_pool.py --docs 30 --startup 2.0 --work 0.3
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from office_pool import ComBackend, FakeComBackend, OfficeAppPool  # noqa: E402
+
+
+def run_batch(backend, docs: int, work: float, size: int, recycle_after: int) -> float:
+    pool = OfficeAppPool(backend, size=size, recycle_after=recycle_after)
+
+    def one(_):
+        with pool.session('word') as app:
+            app.Visible = False
+            time.sleep(work)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=size) as executor:
+        list(executor.map(one, range(docs)))
+    pool.close_all()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Office 實例池效能基準")
+    parser.add_argument("--docs", type=int, default=30)
+    parser.add_argument("--startup", type=float, default=2.0, help="模擬的應用程式啟動秒數")
+    parser.add_argument("--work", type=float, default=0.3, help="模擬的單份文件處理秒數")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--recycle", type=int, default=50)
+    parser.add_argument("--real", action="store_true", help="使用 win32com（僅限 Windows）")
+    args = parser.parse_args()
+
+    def make_backend():
+        if args.real:
+            import win32com.client  # type: ignore
+            return ComBackend(win32com.client)
+        return FakeComBackend(startup_delay=args.startup)
+
+    print(f"{'mode':<22} {'total(s)':>9} {'per doc(s)':>11}")
+    fresh = run_batch(make_backend(), args.docs, args.work, size=1, recycle_after=1)
+    print(f"{'dispatch per doc':<22} {fresh:>9.2f} {fresh / args.docs:>11.3f}")
+    for size in args.sizes:
+        total = run_batch(make_backend(), args.docs, args.work, size=size, recycle_after=args.recycle)
+        print(f"{f'pool size={size}':<22} {total:>9.2f} {total / args.docs:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
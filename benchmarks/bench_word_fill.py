@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Word 填寫效能基準：比較舊版「每個對應欄位重掃全文」與單次替換引擎
+
+合成指定頁數（每頁約 40 段落 + 1 個表格）與對應欄位數量的模板，
+分別以兩種演算法填寫並輸出耗時表。
+
+用法：
+    python benchmarks/bench_word_fill.py --pages 5 20 50 --mappings 10 50 200
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from docx import Document  # noqa: E402
+
+from token_replacer import replace_tokens_in_document  # noqa: E402
+
+PARAGRAPHS_PER_PAGE = 40
+
+
+def build_document(pages: int, mappings: int):
+    """合成模板：Token 平均散布於段落與表格中"""
+    doc = Document()
+    token_idx = 0
+    for page in range(pages):
+        for i in range(PARAGRAPHS_PER_PAGE):
+            if (page * PARAGRAPHS_PER_PAGE + i) % 7 == 0:
+                doc.add_paragraph(f"欄位 {i}: {{Field{token_idx % mappings}}} 說明文字")
+                token_idx += 1
+            else:
+                doc.add_paragraph("一般段落文字，不含任何 Token。" * 3)
+        table = doc.add_table(rows=4, cols=2)
+        for r in range(4):
+            table.cell(r, 0).text = f"項目 {r}"
+            table.cell(r, 1).text = f"{{Field{token_idx % mappings}}}"
+            token_idx += 1
+    values = {f"Field{i}": f"Value-{i}" for i in range(mappings)}
+    return doc, values
+
+
+def legacy_fill(doc, values):
+    """舊版演算法：每個對應欄位重新掃描所有段落與儲存格"""
+    for bookmark, value in values.items():
+        token = f"{{{bookmark}}}"
+        for paragraph in doc.paragraphs:
+            if token in paragraph.text:
+                paragraph.text = paragraph.text.replace(token, value)
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    if token in cell.text:
+                        cell.text = cell.text.replace(token, value)
+
+
+def single_pass_fill(doc, values):
+    replace_tokens_in_document(doc, values)
+
+
+def timed(fn, pages, mappings):
+    doc, values = build_document(pages, mappings)
+    start = time.perf_counter()
+    fn(doc, values)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word 填寫效能基準")
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--mappings", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--skip-legacy", action="store_true", help="略過舊版演算法（大型組合可能耗時數分鐘）")
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'mappings':>9} {'legacy(s)':>10} {'single(s)':>10} {'speedup':>8}")
+    for pages in args.pages:
+        for mappings in args.mappings:
+            single = timed(single_pass_fill, pages, mappings)
+            if args.skip_legacy:
+                print(f"{pages:>6} {mappings:>9} {'-':>10} {single:>10.3f} {'-':>8}")
+                continue
+            legacy = timed(legacy_fill, pages, mappings)
+            print(f"{pages:>6} {mappings:>9} {legacy:>10.3f} {single:>10.3f} {legacy / single:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
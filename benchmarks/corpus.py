@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+合成大型模板語料：SSOT、對應表與 Word/Excel 模板
+
+產生與正式專案相同結構的工作目錄（ssot/、mapping/、templates/、output/），
+模板大小可調整：頁數、每頁表格數、Token 密度、工作表數與列數，以及 Word 模板內嵌的
+圖片大小（media_mb，隨機像素、幾乎無法再壓縮，模擬圖片為主的大型規格書）。
+除了對應表使用的書籤 Token 模板（word_*.docx、excel_*.xlsx），也產生
+Web 後端 Token 模式使用的 SSOT 路徑 Token 模板（web_*.docx、web_*.xlsx）。
+
+用法：
+    python benchmarks/corpus.py --out /tmp/corpus --pages 50 --rows 20000
+"""
+
+import argparse
+import io
+import random
+import struct
+import sys
+import zlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Set
+
+import yaml
+from docx import Document
+from openpyxl import Workbook
+
+PARAGRAPHS_PER_PAGE = 40
+SPEC_SHEET = "規格表"
+
+
+@dataclass
+class CorpusSpec:
+    """語料大小參數"""
+    word_templates: int = 4
+    excel_templates: int = 2
+    web_templates: int = 2
+    fields: int = 200
+    list_items: int = 50
+    pages: int = 20
+    tables_per_page: int = 1
+    table_rows: int = 4
+    token_density: float = 0.15
+    sheets: int = 2
+    rows: int = 5000
+    media_mb: float = 2.0
+    seed: int = 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def build_ssot(spec: CorpusSpec) -> Dict[str, Any]:
+    return {
+        'version': '1.0.0',
+        'product': {'name': 'HP Tim', 'version': 'v1.0.0'},
+        'fields': {f"f{i}": f"Value-{i}" for i in range(spec.fields)},
+        'items': [{'name': f"item-{i}", 'value': i * 1.5} for i in range(spec.list_items)],
+    }
+
+
+def _png(size: int, rng: random.Random) -> bytes:
+    """約 size 位元組的隨機像素 PNG（不壓縮）"""
+    width = 512
+    height = max(1, size // (width * 3))
+    raw = b"".join(b"\0" + rng.getrandbits(width * 24).to_bytes(width * 3, "little") for _ in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 0)) + chunk(b"IEND", b""))
+
+
+def _build_docx(path: Path, spec: CorpusSpec, rng: random.Random, token, header: str = "") -> Set[int]:
+    """token(i) 回傳第 i 個欄位在模板中的 Token 文字；回傳模板中用到的欄位"""
+    doc = Document()
+    if spec.media_mb > 0:
+        doc.add_picture(io.BytesIO(_png(int(spec.media_mb * 1024 * 1024), rng)))
+    used: Set[int] = set()
+
+    def pick() -> str:
+        i = rng.randrange(spec.fields)
+        used.add(i)
+        return token(i)
+
+    if header:
+        doc.add_paragraph(header)
+    for page in range(spec.pages):
+        for _ in range(PARAGRAPHS_PER_PAGE):
+            if rng.random() < spec.token_density:
+                doc.add_paragraph(f"欄位：{pick()} 說明文字")
+            else:
+                doc.add_paragraph("一般段落文字，不含任何 Token。" * 3)
+        for _ in range(spec.tables_per_page):
+            table = doc.add_table(rows=spec.table_rows, cols=2)
+            for r in range(spec.table_rows):
+                table.cell(r, 0).text = f"項目 {r}"
+                table.cell(r, 1).text = pick()
+    doc.save(str(path))
+    return used
+
+
+def _build_xlsx(path: Path, spec: CorpusSpec, rng: random.Random, token=None):
+    """規格表＋資料工作表；提供 token 時資料列中也散布 Token 字串"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(SPEC_SHEET)
+    for i in range(spec.fields):
+        ws.append([f"欄位 {i}", token(i) if token else None])
+    for s in range(spec.sheets):
+        data = wb.create_sheet(f"Data{s}")
+        for r in range(spec.rows):
+            note = token(rng.randrange(spec.fields)) if token and rng.random() < spec.token_density else "描述文字"
+            data.append([r, f"item-{r}", r * 1.5, note, r % 7])
+    wb.save(str(path))
+
+
+def build_corpus(root: Path, spec: CorpusSpec) -> Dict[str, Any]:
+    """在 root 建立工作目錄，回傳統計資訊"""
+    root = Path(root)
+    for name in ("ssot", "mapping", "templates", "output"):
+        (root / name).mkdir(parents=True, exist_ok=True)
+    rng = random.Random(spec.seed)
+    templates = root / "templates"
+
+    mapping: Dict[str, Any] = {'mapping_version': '1.0.0', 'word_mappings': {}, 'excel_mappings': {}}
+
+    for k in range(spec.word_templates):
+        name = f"word_{k}"
+        used = _build_docx(templates / f"{name}.docx", spec, rng, lambda i: f"{{Field{i}}}",
+                           header="第一項：{FirstItem}")
+        # 只對應模板中實際出現的欄位，產生後的文件可通過一致性驗證
+        field_mappings = {f"fields.f{i}": f"Field{i}" for i in sorted(used)}
+        field_mappings['items[0].name'] = 'FirstItem'
+        mapping['word_mappings'][name] = {'file_path': f"templates/{name}.docx", 'mappings': field_mappings}
+
+    for k in range(spec.excel_templates):
+        name = f"excel_{k}"
+        _build_xlsx(templates / f"{name}.xlsx", spec, rng)
+        mapping['excel_mappings'][name] = {
+            'file_path': f"templates/{name}.xlsx",
+            'sheet_name': SPEC_SHEET,
+            'mappings': {f"fields.f{i}": f"B{i + 1}" for i in range(spec.fields)},
+        }
+
+    for k in range(spec.web_templates):
+        _build_docx(templates / f"web_{k}.docx", spec, rng, lambda i: f"{{fields.f{i}}}")
+        _build_xlsx(templates / f"web_{k}.xlsx", spec, rng, lambda i: f"{{fields.f{i}}}")
+
+    with open(root / "ssot" / "master.yaml", 'w', encoding='utf-8') as f:
+        yaml.safe_dump(build_ssot(spec), f, allow_unicode=True, sort_keys=False)
+    with open(root / "mapping" / "customer_mapping.yaml", 'w', encoding='utf-8') as f:
+        yaml.safe_dump(mapping, f, allow_unicode=True, sort_keys=False)
+
+    size = sum(p.stat().st_size for p in templates.iterdir())
+    return {'templates': len(list(templates.iterdir())), 'bytes': size}
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser):
+    """將 CorpusSpec 欄位加入命令列參數（--word-templates、--pages ...）"""
+    defaults = CorpusSpec()
+    for key, value in defaults.to_dict().items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+
+
+def spec_from_args(args) -> CorpusSpec:
+    return CorpusSpec(**{key: getattr(args, key) for key in CorpusSpec().to_dict()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合成大型模板語料")
+    parser.add_argument("--out", type=Path, required=True, help="輸出工作目錄")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+    info = build_corpus(args.out, spec_from_args(args))
+    print(f"已建立 {info['templates']} 個模板（{info['bytes'] / 1024 / 1024:.1f} MB）：{args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
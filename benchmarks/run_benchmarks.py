@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT 效能基準套件
+
+以 corpus.py 合成的語料依序執行各熱點路徑，每個階段在獨立子行程中執行，
+記錄耗時（wall time）、記憶體峰值（peak RSS）與階段內細項，輸出 JSON，
+並與存放的基準值比較，超過容許範圍即視為退化（結束碼 1）。
+
+階段：
+- generate：SpecSyncEngine.generate_all_documents（force，純 Python 引擎）
+- validate：ConsistencyValidator.validate_all_documents
+- web_replace_docx / web_replace_xlsx：Web 後端 Token 模式替換
+- flatten：export_ssot_json.flatten
+- package_write：含圖片的 Word 模板以 python-docx 存檔與 package_writer 原樣複製的比較
+
+用法：
+    python benchmarks/run_benchmarks.py                       # 與 benchmarks/baseline.json 比較
+    python benchmarks/run_benchmarks.py --json report.json
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --pages 100 --rows 50000 --no-compare
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BENCH_DIR = Path(__file__).parent
+PROJECT_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+sys.path.insert(0, str(PROJECT_ROOT / "web-ui" / "backend"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from corpus import CorpusSpec, add_spec_arguments, build_corpus, spec_from_args  # noqa: E402
+
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+REPORT_VERSION = 1
+# 低於此差距的變化視為雜訊，不判定為退化
+MIN_DELTA = {'wall_s': 0.05, 'peak_rss_mb': 10.0}
+# 階段內細項（秒）的雜訊門檻
+MIN_BREAKDOWN_DELTA = 0.01
+
+
+def peak_rss_mb() -> Optional[float]:
+    """目前行程的記憶體峰值（MB）；無法取得時回傳 None"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil  # type: ignore
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except Exception:
+            return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 單位為 bytes，Linux 為 KB
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+# ============================================================================
+# 階段
+# ============================================================================
+
+def _load_yaml(path: Path) -> Dict[str, Any]:
+    from yaml_cache import load_yaml
+    return load_yaml(path)
+
+
+def phase_generate(root: Path) -> Dict[str, Any]:
+    from generate_docs import SpecSyncEngine
+    os.environ["SPEC_SYNC_ENGINE"] = "pure"
+    engine = SpecSyncEngine(str(root))
+    ok = engine.generate_all_documents(jobs=1, force=True)
+    breakdown: Dict[str, float] = defaultdict(float)
+    for result in engine.last_results:
+        breakdown[result['kind']] += result['elapsed']
+    return {'ok': ok, 'documents': len(engine.last_results), 'breakdown': dict(breakdown)}
+
+
+def phase_validate(root: Path) -> Dict[str, Any]:
+    from validate_consistency import ConsistencyValidator
+    os.environ["SPEC_SYNC_ENGINE"] = "pure"
+    ok, errors = ConsistencyValidator(str(root)).validate_all_documents()
+    return {'ok': ok, 'errors': len(errors)}
+
+
+def _web_replace(root: Path, suffix: str) -> Dict[str, Any]:
+    import token_service
+    replace = token_service.replace_tokens_docx if suffix == '.docx' else token_service.replace_tokens_xlsx
+    start = time.perf_counter()
+    ssot = _load_yaml(root / "ssot" / "master.yaml")
+    breakdown = {'load_ssot': time.perf_counter() - start}
+    replaced = 0
+    for template in sorted((root / "templates").glob(f"web_*{suffix}")):
+        start = time.perf_counter()
+        info = replace(template, root / "output" / f"filled_{template.name}", ssot)
+        breakdown[template.name] = time.perf_counter() - start
+        replaced += len(info['replaced'])
+    return {'ok': True, 'replaced': replaced, 'breakdown': breakdown}
+
+
+def phase_web_replace_docx(root: Path) -> Dict[str, Any]:
+    return _web_replace(root, '.docx')
+
+
+def phase_web_replace_xlsx(root: Path) -> Dict[str, Any]:
+    return _web_replace(root, '.xlsx')
+
+
+def phase_flatten(root: Path) -> Dict[str, Any]:
+    from export_ssot_json import flatten
+    start = time.perf_counter()
+    ssot = _load_yaml(root / "ssot" / "master.yaml")
+    mapping = _load_yaml(root / "mapping" / "customer_mapping.yaml")
+    loaded = time.perf_counter()
+    flat = flatten(ssot, mapping)
+    done = time.perf_counter()
+    return {'ok': True, 'fields': len(flat),
+            'breakdown': {'load_yaml': loaded - start, 'flatten': done - loaded}}
+
+
+def phase_yaml_load(root: Path) -> Dict[str, Any]:
+    """SSOT 載入：純 Python 解析、C 解析器與磁碟快取命中的比較"""
+    import yaml
+    import yaml_cache
+    path = root / "ssot" / "master.yaml"
+    raw = path.read_bytes()
+    breakdown = {}
+    start = time.perf_counter()
+    yaml.safe_load(raw)
+    breakdown['safe_load'] = time.perf_counter() - start
+    start = time.perf_counter()
+    yaml_cache.parse_yaml(raw)
+    breakdown['fast_loader'] = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as cache_dir:
+        yaml_cache.load_yaml(path, cache_dir=Path(cache_dir))
+        start = time.perf_counter()
+        yaml_cache.load_yaml(path, cache_dir=Path(cache_dir))
+        breakdown['cache_hit'] = time.perf_counter() - start
+    return {'ok': True, 'libyaml': yaml_cache.USING_LIBYAML, 'breakdown': breakdown}
+
+
+def phase_package_write(root: Path) -> Dict[str, Any]:
+    """只修改本文時：Document.save()（全部 part 重新壓縮）對照 write_package（原樣複製）"""
+    from docx import Document
+    from package_writer import write_package
+    breakdown: Dict[str, float] = defaultdict(float)
+    templates = sorted((root / "templates").glob("word_*.docx"))
+    for template in templates:
+        doc = Document(str(template))
+        start = time.perf_counter()
+        doc.save(str(root / "output" / f"saved_{template.name}"))
+        breakdown['docx_save'] += time.perf_counter() - start
+        start = time.perf_counter()
+        write_package(template, root / "output" / f"raw_{template.name}",
+                      {doc.part.partname.lstrip('/'): doc.part.blob})
+        breakdown['write_package'] += time.perf_counter() - start
+    size = sum(t.stat().st_size for t in templates)
+    return {'ok': True, 'templates': len(templates), 'template_mb': size / 1024 / 1024,
+            'breakdown': dict(breakdown)}
+
+
+PHASES: Dict[str, Callable[[Path], Dict[str, Any]]] = {
+    'generate': phase_generate,
+    'validate': phase_validate,
+    'web_replace_docx': phase_web_replace_docx,
+    'web_replace_xlsx': phase_web_replace_xlsx,
+    'flatten': phase_flatten,
+    'yaml_load': phase_yaml_load,
+    'package_write': phase_package_write,
+}
+
+
+def _run_phase(name: str, root: str, repeat: int, verbose: bool) -> Dict[str, Any]:
+    """在子行程中執行單一階段，取 repeat 次中最快的一次"""
+    if not verbose:
+        logging.disable(logging.INFO)
+    best: Optional[Dict[str, Any]] = None
+    for _ in range(repeat):
+        # 先回收匯入與前一次執行留下的物件，避免第 2 代 GC 落在單一模板的計時中
+        gc.collect()
+        start = time.perf_counter()
+        info = PHASES[name](Path(root))
+        info['wall_s'] = time.perf_counter() - start
+        if best is None or info['wall_s'] < best['wall_s']:
+            best = info
+    best['peak_rss_mb'] = peak_rss_mb()
+    return best
+
+
+def run_phases(root: Path, names: List[str], repeat: int, verbose: bool = False) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for name in names:
+        # 每個階段使用新的子行程，記憶體峰值互不影響
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            results[name] = executor.submit(_run_phase, name, str(root), repeat, verbose).result()
+    return results
+
+
+# ============================================================================
+# 基準比較
+# ============================================================================
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float) -> Tuple[List[str], Dict[str, Dict[str, float]]]:
+    """與基準比較（含階段內細項），回傳 (退化清單, 各階段與基準的比值)；不修改 report"""
+    regressions = []
+    ratios: Dict[str, Dict[str, float]] = {}
+    for name, phase in report['phases'].items():
+        base = baseline.get('phases', {}).get(name)
+        if not base:
+            continue
+        metrics = [(metric, phase.get(metric), base.get(metric), min_delta)
+                   for metric, min_delta in MIN_DELTA.items()]
+        base_breakdown = base.get('breakdown') or {}
+        metrics += [(f"breakdown.{item}", value, base_breakdown.get(item), MIN_BREAKDOWN_DELTA)
+                    for item, value in (phase.get('breakdown') or {}).items()]
+        phase_ratios = ratios[name] = {}
+        for metric, current, reference, min_delta in metrics:
+            if current is None or not reference:
+                continue
+            phase_ratios[metric] = round(current / reference, 3)
+            if current > reference * (1 + tolerance) and current - reference > min_delta:
+                regressions.append(f"{name}.{metric}: {reference:.3f} → {current:.3f} ({current / reference:.2f}x)")
+    return regressions, ratios
+
+
+def _round(obj):
+    if isinstance(obj, float):
+        return round(obj, 4)
+    if isinstance(obj, dict):
+        return {k: _round(v) for k, v in obj.items()}
+    return obj
+
+
+def print_table(report: Dict[str, Any], ratios: Dict[str, Dict[str, float]]):
+    print(f"{'phase':<18} {'wall(s)':>9} {'peak RSS(MB)':>13} {'vs base':>8}")
+    for name, phase in report['phases'].items():
+        rss = phase.get('peak_rss_mb')
+        ratio = ratios.get(name, {}).get('wall_s')
+        print(f"{name:<18} {phase['wall_s']:>9.3f} {f'{rss:.1f}' if rss is not None else '-':>13} "
+              f"{f'{ratio:.2f}x' if ratio else '-':>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spec Sync SSOT 效能基準套件")
+    add_spec_arguments(parser)
+    parser.add_argument("--phases", nargs="+", choices=list(PHASES), default=list(PHASES))
+    parser.add_argument("--repeat", type=int, default=1, help="每個階段執行次數（取最快）")
+    parser.add_argument("--corpus", type=Path, help="使用（或保留）此目錄的語料，預設為暫存目錄")
+    parser.add_argument("--json", type=Path, help="輸出 JSON 報告路徑")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--no-compare", action="store_true", help="不與基準比較")
+    parser.add_argument("--save-baseline", type=Path, help="將本次結果存為基準")
+    parser.add_argument("--verbose", action="store_true", help="顯示各階段的 INFO 日誌")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="容許的退化比例（預設 25%%）")
+    args = parser.parse_args()
+
+    spec: CorpusSpec = spec_from_args(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.corpus or Path(tmp)
+        if not (root / "mapping" / "customer_mapping.yaml").exists():
+            start = time.perf_counter()
+            # 在子行程中建立：Linux 的 ru_maxrss 會經 fork/exec 繼承，主行程需維持精簡
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                info = executor.submit(build_corpus, root, spec).result()
+            print(f"語料：{info['templates']} 個模板，{info['bytes'] / 1024 / 1024:.1f} MB"
+                  f"（{time.perf_counter() - start:.1f}s）")
+        phases = run_phases(root, args.phases, max(1, args.repeat), args.verbose)
+
+    report = {
+        'version': REPORT_VERSION,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'corpus': spec.to_dict(),
+        'phases': _round(phases),
+    }
+
+    regressions: List[str] = []
+    ratios: Dict[str, Dict[str, float]] = {}
+    if not args.no_compare and args.baseline.exists():
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('corpus') != report['corpus']:
+            print(f"⚠️ 語料參數與基準 {args.baseline} 不同，略過比較")
+        else:
+            regressions, ratios = compare(report, baseline, args.tolerance)
+
+    print_table(report, ratios)
+    if args.json:
+        args.json.write_text(json.dumps(dict(report, vs_baseline=ratios), ensure_ascii=False, indent=2),
+                             encoding='utf-8')
+    if args.save_baseline:
+        # 存入基準的是本次的原始結果，不含與舊基準的比值
+        args.save_baseline.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding='utf-8')
+        print(f"已儲存基準：{args.save_baseline}")
+
+    failed = [name for name, phase in phases.items() if not phase.get('ok', True)]
+    for name in failed:
+        print(f"❌ 階段 {name} 執行失敗")
+    for line in regressions:
+        print(f"❌ 效能退化 {line}")
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
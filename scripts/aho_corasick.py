@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - Aho-Corasick 多字串比對
+
+一次掃描文字即可找出多個預期值是否出現，成本與文字長度成正比，
+與預期值的數量無關（取代逐一 `value in text` 的多次全文掃描）。
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+
+class AhoCorasick:
+    """多字串比對自動機"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: Set[str] = {p for p in patterns if p}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[str]] = [set()]
+        for pattern in self.patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state].add(pattern)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Set[str]:
+        """回傳 text 中出現過的所有 pattern（全部找到時提前結束）"""
+        found: Set[str] = set()
+        if not self.patterns:
+            return found
+        goto, fail, out = self._goto, self._fail, self._out
+        remaining = len(self.patterns)
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                new = out[state] - found
+                if new:
+                    found |= new
+                    remaining -= len(new)
+                    if remaining == 0:
+                        break
+        return found
@@ -4,11 +4,20 @@
 # 用途: 掃描 Word 文件,找出所有可能需要標記的欄位,並建議書籤名稱
 # ==============================================================================
 
+import copy
+import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
 from pathlib import Path
 import yaml
 
+from build_manifest import hash_file
+
+from field_matcher import SYNONYM_GROUPS, FieldIndex
+from ssot_store import materialize, open_ssot
+
 try:
     from docx import Document
     DOCX_AVAILABLE = True
@@ -48,6 +57,13 @@ def extract_potential_fields_from_docx(file_path):
         '負責人', '聯絡', '電話', '地址', 'Email'
     ]
     
+    # 已加入的欄位名稱（避免每次以線性掃描檢查重複）
+    seen_names = set()
+
+    def add_field(field):
+        potential_fields.append(field)
+        seen_names.add(field['field_name'])
+
     paragraph_index = 0
     for para in doc.paragraphs:
         text = para.text.strip()
@@ -61,7 +77,7 @@ def extract_potential_fields_from_docx(file_path):
         for field_name, placeholder in matches:
             field_name = field_name.strip()
             if len(field_name) < 30:  # 避免抓到太長的句子
-                potential_fields.append({
+                add_field({
                     'type': 'paragraph',
                     'location': f'段落 {paragraph_index}',
                     'field_name': field_name,
@@ -71,24 +87,24 @@ def extract_potential_fields_from_docx(file_path):
                 })
         
         # 檢查是否包含關鍵字
-        for keyword in field_keywords:
-            if keyword in text and len(text) < 50:
-                if not any(pf['field_name'] == text for pf in potential_fields):
-                    potential_fields.append({
-                        'type': 'keyword',
-                        'location': f'段落 {paragraph_index}',
-                        'field_name': text,
-                        'context': text,
-                        'suggested_bookmark': generate_bookmark_name(text),
-                        'confidence': 'medium'
-                    })
+        if len(text) < 50 and text not in seen_names and any(kw in text for kw in field_keywords):
+            add_field({
+                'type': 'keyword',
+                'location': f'段落 {paragraph_index}',
+                'field_name': text,
+                'context': text,
+                'suggested_bookmark': generate_bookmark_name(text),
+                'confidence': 'medium'
+            })
     
     # 檢查表格
     table_index = 0
     for table in doc.tables:
         table_index += 1
-        for row_idx, row in enumerate(table.rows):
-            for col_idx, cell in enumerate(row.cells):
+        rows = table.rows
+        for row_idx, row in enumerate(rows):
+            cells = row.cells
+            for col_idx, cell in enumerate(cells):
                 cell_text = cell.text.strip()
                 
                 # 表格欄位名稱通常在第一列或第一欄
@@ -96,13 +112,13 @@ def extract_potential_fields_from_docx(file_path):
                     if cell_text and any(kw in cell_text for kw in field_keywords):
                         # 找對應的值儲存格
                         value_cell = None
-                        if col_idx == 0 and len(row.cells) > 1:
-                            value_cell = row.cells[1].text.strip()
-                        elif row_idx == 0 and table_index < len(table.rows):
-                            value_cell = table.rows[row_idx + 1].cells[col_idx].text.strip()
+                        if col_idx == 0 and len(cells) > 1:
+                            value_cell = cells[1].text.strip()
+                        elif row_idx == 0 and table_index < len(rows):
+                            value_cell = rows[row_idx + 1].cells[col_idx].text.strip()
                         
                         if not value_cell or len(value_cell) < 3:  # 空白或很短 = 可能需要填入
-                            potential_fields.append({
+                            add_field({
                                 'type': 'table',
                                 'location': f'表格 {table_index}, 列 {row_idx + 1}, 欄 {col_idx + 1}',
                                 'field_name': cell_text,
@@ -165,35 +181,37 @@ def generate_bookmark_name(field_name):
     return 'Field_' + ''.join(filter(str.isalnum, field_name))[:20]
 
 
-def generate_mapping_suggestions(potential_fields, ssot_path='ssot/master.yaml'):
-    """
-    根據 SSOT 結構,建議欄位對應
-    """
+def build_field_index(ssot_path='ssot/master.yaml'):
+    """載入並扁平化 SSOT，建立欄位比對索引；SSOT 不存在時回傳 None"""
     if not os.path.exists(ssot_path):
-        return potential_fields
+        return None
     
-    with open(ssot_path, 'r', encoding='utf-8') as f:
-        ssot = yaml.safe_load(f)
+    ssot = materialize(open_ssot(ssot_path)) or {}
     
     # 扁平化 SSOT 結構
-    ssot_fields = flatten_dict(ssot)
+    return FieldIndex(flatten_dict(ssot))
+
+
+def generate_mapping_suggestions(potential_fields, ssot_path='ssot/master.yaml', index=None, top_k=3):
+    """
+    根據 SSOT 結構,建議欄位對應
+    index 為預先建立的 FieldIndex(批次掃描時共用),未提供時由 ssot_path 建立
+    """
+    if index is None:
+        index = build_field_index(ssot_path)
+    if index is None:
+        return potential_fields
     
-    # 為每個潛在欄位找最佳匹配
+    # 為每個潛在欄位查詢索引,取得排序後的候選 SSOT 路徑
     for field in potential_fields:
-        field_lower = field['field_name'].lower()
-        best_match = None
-        best_score = 0
-        
-        for ssot_key, ssot_value in ssot_fields.items():
-            # 簡單相似度計算
-            score = calculate_similarity(field_lower, ssot_key.lower())
-            if score > best_score:
-                best_score = score
-                best_match = ssot_key
+        candidates = index.candidates(field['field_name'], k=top_k)
+        candidates = [(path, score) for path, score in candidates if score > 0.3]  # 相似度閾值
         
-        if best_score > 0.3:  # 相似度閾值
+        if candidates:
+            best_match = candidates[0][0]
             field['suggested_ssot_path'] = best_match
-            field['ssot_value'] = ssot_fields[best_match]
+            field['ssot_value'] = index.fields[best_match]
+            field['alternative_ssot_paths'] = [path for path, _ in candidates[1:]]
         else:
             field['suggested_ssot_path'] = None
     
@@ -217,17 +235,8 @@ def flatten_dict(d, parent_key='', sep='.'):
 
 def calculate_similarity(text1, text2):
     """簡單的文字相似度計算"""
-    # 檢查關鍵字匹配
-    keywords_map = {
-        'name': ['名稱', 'name'],
-        'version': ['版本', 'version'],
-        'cpu': ['cpu', '處理器', 'processor'],
-        'memory': ['記憶體', 'memory', 'ram'],
-        'storage': ['硬碟', '儲存', 'storage', 'disk'],
-        'os': ['作業系統', 'os', 'operating'],
-    }
-    
-    for key, keywords in keywords_map.items():
+    # 檢查關鍵字匹配(與 FieldIndex 使用相同的同義詞群組)
+    for key, keywords in SYNONYM_GROUPS.items():
         if any(kw in text1 for kw in keywords) and any(kw in text2 for kw in keywords):
             return 0.8
     
@@ -238,6 +247,15 @@ def calculate_similarity(text1, text2):
     return 0.0
 
 
+def build_word_mapping(potential_fields, file_path):
+    """單一模板的 word_mappings 項目(只含已建議 SSOT 路徑的欄位)"""
+    mappings = {}
+    for field in potential_fields:
+        if field.get('suggested_ssot_path'):
+            mappings[field['suggested_ssot_path']] = field['suggested_bookmark']
+    return {'file_path': file_path, 'mappings': mappings}
+
+
 def export_to_yaml(potential_fields, template_name, output_path='mapping/auto_generated_mapping.yaml'):
     """
     將建議的欄位對應匯出為 YAML 格式
@@ -246,19 +264,10 @@ def export_to_yaml(potential_fields, template_name, output_path='mapping/auto_ge
         'mapping_version': '1.0.0',
         'last_updated': '2025-11-13',
         'word_mappings': {
-            template_name: {
-                'file_path': f'templates/{template_name}.docx',
-                'mappings': {}
-            }
+            template_name: build_word_mapping(potential_fields, f'templates/{template_name}.docx')
         }
     }
     
-    for field in potential_fields:
-        if field.get('suggested_ssot_path'):
-            bookmark = field['suggested_bookmark']
-            ssot_path = field['suggested_ssot_path']
-            mapping['word_mappings'][template_name]['mappings'][ssot_path] = bookmark
-    
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     with open(output_path, 'w', encoding='utf-8') as f:
         yaml.dump(mapping, f, allow_unicode=True, sort_keys=False)
@@ -276,44 +285,163 @@ def generate_report(potential_fields, output_path='output/bookmark_suggestions.t
         f.write("=" * 80 + "\n")
         f.write("Word 文件自動標記建議報告\n")
         f.write("=" * 80 + "\n\n")
-        
-        # 按信心度分組
-        high_conf = [f for f in potential_fields if f['confidence'] == 'high']
-        medium_conf = [f for f in potential_fields if f['confidence'] == 'medium']
-        
-        f.write(f"📊 統計資訊:\n")
-        f.write(f"  • 總共找到 {len(potential_fields)} 個潛在欄位\n")
-        f.write(f"  • 高信心度: {len(high_conf)} 個\n")
-        f.write(f"  • 中信心度: {len(medium_conf)} 個\n")
-        f.write(f"  • 已建議 SSOT 對應: {len([f for f in potential_fields if f.get('suggested_ssot_path')])} 個\n\n")
-        
+        write_field_sections(f, potential_fields)
+    
+    return output_path
+
+
+def write_field_sections(f, potential_fields):
+    """寫入統計資訊與依信心度分組的欄位清單"""
+    # 按信心度分組
+    high_conf = [f for f in potential_fields if f['confidence'] == 'high']
+    medium_conf = [f for f in potential_fields if f['confidence'] == 'medium']
+    
+    f.write(f"📊 統計資訊:\n")
+    f.write(f"  • 總共找到 {len(potential_fields)} 個潛在欄位\n")
+    f.write(f"  • 高信心度: {len(high_conf)} 個\n")
+    f.write(f"  • 中信心度: {len(medium_conf)} 個\n")
+    f.write(f"  • 已建議 SSOT 對應: {len([f for f in potential_fields if f.get('suggested_ssot_path')])} 個\n\n")
+    
+    f.write("=" * 80 + "\n")
+    f.write("高信心度欄位 (建議優先標記)\n")
+    f.write("=" * 80 + "\n\n")
+    
+    for idx, field in enumerate(high_conf, 1):
+        f.write(f"{idx}. {field['field_name']}\n")
+        f.write(f"   位置: {field['location']}\n")
+        f.write(f"   類型: {field['type']}\n")
+        f.write(f"   建議書籤名稱: {field['suggested_bookmark']}\n")
+        if field.get('suggested_ssot_path'):
+            f.write(f"   建議 SSOT 路徑: {field['suggested_ssot_path']}\n")
+            f.write(f"   目前 SSOT 值: {field.get('ssot_value', 'N/A')}\n")
+            if field.get('alternative_ssot_paths'):
+                f.write(f"   其他候選: {', '.join(field['alternative_ssot_paths'])}\n")
+        f.write(f"   上下文: {field['context']}\n")
+        f.write("\n")
+    
+    if medium_conf:
         f.write("=" * 80 + "\n")
-        f.write("高信心度欄位 (建議優先標記)\n")
+        f.write("中信心度欄位 (請手動確認)\n")
         f.write("=" * 80 + "\n\n")
         
-        for idx, field in enumerate(high_conf, 1):
+        for idx, field in enumerate(medium_conf, 1):
             f.write(f"{idx}. {field['field_name']}\n")
             f.write(f"   位置: {field['location']}\n")
-            f.write(f"   類型: {field['type']}\n")
             f.write(f"   建議書籤名稱: {field['suggested_bookmark']}\n")
             if field.get('suggested_ssot_path'):
                 f.write(f"   建議 SSOT 路徑: {field['suggested_ssot_path']}\n")
-                f.write(f"   目前 SSOT 值: {field.get('ssot_value', 'N/A')}\n")
-            f.write(f"   上下文: {field['context']}\n")
             f.write("\n")
+
+
+# ==============================================================================
+# 批次模式: 掃描整個模板目錄
+# ==============================================================================
+
+SCAN_CACHE_VERSION = 1
+
+
+def load_scan_cache(cache_path):
+    """讀取掃描快取: 檔案雜湊 → 潛在欄位清單"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != SCAN_CACHE_VERSION:
+        return {}
+    return data.get('entries', {})
+
+
+def save_scan_cache(cache_path, entries):
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': SCAN_CACHE_VERSION, 'entries': entries}, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+
+def batch_scan(template_dir, ssot_path='ssot/master.yaml', jobs=0,
+               cache_path='output/.cache/bookmark_scan.json'):
+    """
+    掃描目錄中所有 .docx 模板
+    - SSOT 只載入並建立索引一次
+    - 以檔案雜湊快取掃描結果,未變更的模板不重新解析
+    - 需要解析的模板以多個行程平行處理(jobs=0 表示使用全部 CPU 核心)
+    回傳 {模板名稱: {'file_path', 'fields', 'cached'}}
+    """
+    files = sorted(p for p in Path(template_dir).glob('*.docx') if not p.name.startswith('~$'))
+    cache = load_scan_cache(cache_path)
+    digests = {p: hash_file(p) for p in files}
+    todo = [p for p in files if digests[p] not in cache]
+    
+    workers = min(jobs or os.cpu_count() or 1, len(todo))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            scanned = dict(zip(todo, executor.map(extract_potential_fields_from_docx, map(str, todo))))
+    else:
+        scanned = {p: extract_potential_fields_from_docx(str(p)) for p in todo}
+    
+    for p, fields in scanned.items():
+        cache[digests[p]] = fields or []
+    if scanned:
+        save_scan_cache(cache_path, cache)
+    
+    index = build_field_index(ssot_path)
+    results = {}
+    for p in files:
+        # 快取內容不含 SSOT 對應,每次以目前的 SSOT 重新建議
+        fields = copy.deepcopy(cache[digests[p]])
+        if index is not None:
+            generate_mapping_suggestions(fields, index=index)
+        results[p.stem] = {
+            'file_path': p.as_posix(),
+            'fields': fields,
+            'cached': p not in scanned
+        }
+    return results
+
+
+def export_batch_mapping(results, output_path='mapping/auto_generated_mapping.yaml'):
+    """將所有模板的建議對應合併為單一對應表"""
+    mapping = {
+        'mapping_version': '1.0.0',
+        'last_updated': date.today().isoformat(),
+        'word_mappings': {
+            name: build_word_mapping(result['fields'], result['file_path'])
+            for name, result in results.items()
+        }
+    }
+    
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        yaml.dump(mapping, f, allow_unicode=True, sort_keys=False)
+    
+    return output_path
+
+
+def generate_batch_report(results, output_path='output/bookmark_suggestions.txt'):
+    """產生所有模板的彙整報告"""
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("=" * 80 + "\n")
+        f.write("Word 文件自動標記建議報告(批次)\n")
+        f.write("=" * 80 + "\n\n")
+        
+        f.write(f"📊 共 {len(results)} 個模板:\n")
+        for name, result in results.items():
+            fields = result['fields']
+            matched = len([x for x in fields if x.get('suggested_ssot_path')])
+            cached = ' (快取)' if result['cached'] else ''
+            f.write(f"  • {name}: {len(fields)} 個潛在欄位,已建議 {matched} 個 SSOT 對應{cached}\n")
+        f.write("\n")
         
-        if medium_conf:
-            f.write("=" * 80 + "\n")
-            f.write("中信心度欄位 (請手動確認)\n")
-            f.write("=" * 80 + "\n\n")
-            
-            for idx, field in enumerate(medium_conf, 1):
-                f.write(f"{idx}. {field['field_name']}\n")
-                f.write(f"   位置: {field['location']}\n")
-                f.write(f"   建議書籤名稱: {field['suggested_bookmark']}\n")
-                if field.get('suggested_ssot_path'):
-                    f.write(f"   建議 SSOT 路徑: {field['suggested_ssot_path']}\n")
-                f.write("\n")
+        for name, result in results.items():
+            f.write("#" * 80 + "\n")
+            f.write(f"模板: {name} ({result['file_path']})\n")
+            f.write("#" * 80 + "\n\n")
+            write_field_sections(f, result['fields'])
+            f.write("\n")
     
     return output_path
 
@@ -322,11 +450,13 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Word 文件自動標記輔助工具')
-    parser.add_argument('file_path', help='Word 文件路徑')
+    parser.add_argument('file_path', help='Word 文件路徑(或模板目錄,批次掃描所有 .docx)')
     parser.add_argument('--template-name', default='auto_detected', help='模板名稱')
     parser.add_argument('--ssot', default='ssot/master.yaml', help='SSOT 檔案路徑')
     parser.add_argument('--output-report', default='output/bookmark_suggestions.txt', help='報告輸出路徑')
     parser.add_argument('--output-mapping', default='mapping/auto_generated_mapping.yaml', help='對應表輸出路徑')
+    parser.add_argument('--jobs', '-j', type=int, default=0, help='批次模式的平行行程數(0 = CPU 核心數)')
+    parser.add_argument('--cache', default='output/.cache/bookmark_scan.json', help='批次模式的掃描快取')
     
     args = parser.parse_args()
     
@@ -344,6 +474,10 @@ def main():
         print(f"❌ 錯誤: 找不到檔案 {args.file_path}")
         return
     
+    if os.path.isdir(args.file_path):
+        run_batch(args)
+        return
+    
     print(f"📂 分析文件: {args.file_path}")
     print()
     
@@ -394,5 +528,27 @@ def main():
         traceback.print_exc()
 
 
+def run_batch(args):
+    """批次模式: 掃描目錄、輸出合併對應表與彙整報告"""
+    print(f"📂 批次掃描目錄: {args.file_path}")
+    print()
+    results = batch_scan(args.file_path, args.ssot, jobs=args.jobs, cache_path=args.cache)
+    if not results:
+        print("⚠️  目錄中沒有 .docx 模板")
+        return
+    
+    cached = len([r for r in results.values() if r['cached']])
+    print(f"✅ 掃描 {len(results)} 個模板(其中 {cached} 個使用快取)")
+    for name, result in results.items():
+        matched = len([f for f in result['fields'] if f.get('suggested_ssot_path')])
+        print(f"  • {name}: {len(result['fields'])} 個潛在欄位,建議 {matched} 個 SSOT 對應")
+    print()
+    
+    report_path = generate_batch_report(results, args.output_report)
+    print(f"✅ 報告已儲存: {report_path}")
+    mapping_path = export_batch_mapping(results, args.output_mapping)
+    print(f"✅ 對應表已儲存: {mapping_path}")
+
+
 if __name__ == '__main__':
     main()
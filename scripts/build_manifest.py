@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - 增量產生的建置清單
+
+記錄每份輸出所依賴輸入的內容雜湊：
+- template: 模板檔案內容
+- mapping:  該模板在對應表中的設定區塊
+- ssot_values: 該模板實際解析到的 SSOT 值
+
+下次產生時，只有雜湊有變動（或輸出檔已不存在）的模板才需要重新填寫。
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+MANIFEST_FILENAME = ".build_manifest.json"
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_json(obj: Any) -> str:
+    """以穩定排序的 JSON 計算雜湊（非 JSON 型別以 str 表示）"""
+    payload = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+    return hash_bytes(payload.encode('utf-8'))
+
+
+class BuildManifest:
+    """輸出檔與其輸入雜湊的對照清單（output/.build_manifest.json）"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"建置清單無法讀取，將全部重新產生: {e}")
+            return
+        if data.get('version') != MANIFEST_VERSION:
+            logger.info("建置清單版本不同，將全部重新產生")
+            return
+        self.entries = data.get('outputs', {})
+
+    @staticmethod
+    def fingerprint(template_path: Path, mapping_block: Dict[str, Any],
+                    resolved_values: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            'template': hash_file(template_path),
+            'mapping': hash_json(mapping_block),
+            'ssot_values': hash_json(resolved_values),
+        }
+
+    def is_up_to_date(self, key: str, fingerprint: Dict[str, str], output_dir: Path) -> Optional[str]:
+        """輸入未變且輸出仍存在時回傳既有輸出檔名，否則回傳 None"""
+        entry = self.entries.get(key)
+        if not entry or entry.get('fingerprint') != fingerprint:
+            return None
+        output = entry.get('output')
+        if not output or not (Path(output_dir) / output).exists():
+            return None
+        return output
+
+    def record(self, key: str, fingerprint: Dict[str, str], output: str):
+        self.entries[key] = {'fingerprint': fingerprint, 'output': output}
+
+    def save(self):
+        data = {'version': MANIFEST_VERSION, 'outputs': self.entries}
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
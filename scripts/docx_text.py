@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - 串流讀取 docx 文字
+
+不建立 python-docx 物件模型，直接以增量 XML 解析器（iterparse）讀取
+word/document.xml 以及頁首、頁尾、註腳、章節附註，組成全文；可同時收集書籤名稱。
+"""
+
+import re
+import zipfile
+from pathlib import Path
+from typing import List, Optional, Set
+from xml.etree.ElementTree import iterparse
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W_T = f"{{{W_NS}}}t"
+_W_P = f"{{{W_NS}}}p"
+_W_TAB = f"{{{W_NS}}}tab"
+_W_BR = f"{{{W_NS}}}br"
+_W_CR = f"{{{W_NS}}}cr"
+_W_BOOKMARK_START = f"{{{W_NS}}}bookmarkStart"
+_W_NAME = f"{{{W_NS}}}name"
+
+TEXT_PART_PATTERN = re.compile(r"^word/(document|header\d*|footer\d*|footnotes|endnotes)\.xml$")
+
+
+def text_part_names(zf: zipfile.ZipFile) -> List[str]:
+    """含可見文字的 part，本文優先"""
+    names = [n for n in zf.namelist() if TEXT_PART_PATTERN.match(n)]
+    return sorted(names, key=lambda n: (n != "word/document.xml", n))
+
+
+def _part_text(stream, out: List[str], bookmarks: Optional[Set[str]] = None):
+    for event, elem in iterparse(stream, events=("end",)):
+        tag = elem.tag
+        if tag == _W_T:
+            if elem.text:
+                out.append(elem.text)
+        elif tag == _W_TAB:
+            out.append("\t")
+        elif tag == _W_BR or tag == _W_CR:
+            out.append("\n")
+        elif tag == _W_P:
+            out.append("\n")
+            elem.clear()
+        elif tag == _W_BOOKMARK_START and bookmarks is not None:
+            name = elem.get(_W_NAME)
+            if name:
+                bookmarks.add(name)
+
+
+def extract_docx_text(path: Path, parts: Optional[List[str]] = None,
+                      bookmarks: Optional[Set[str]] = None) -> str:
+    """串流讀取 docx 全文（段落以換行分隔）；提供 bookmarks 時一併收集書籤名稱
+
+    無法解析時拋出 zipfile.BadZipFile 等例外。
+    """
+    out: List[str] = []
+    with zipfile.ZipFile(path, "r") as zf:
+        for name in parts or text_part_names(zf):
+            with zf.open(name) as stream:
+                _part_text(stream, out, bookmarks)
+    return "".join(out)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - 引擎能力登錄與路由
+
+每個行程只探測一次可用的引擎（python-docx、openpyxl、Office COM），並記住各模板的結果：
+- auto 模式先使用該模板先前成功的引擎、已知失敗的引擎排在最後，其餘引擎仍作為備援
+- Office 啟動失敗（OfficeUnavailable）後，同一行程內不再嘗試 COM
+- 模板檔案變更（mtime/大小不同）時，該模板的紀錄作廢，重新依預設順序嘗試
+
+引擎名稱：pure（python-docx / xlsx 直接修補＋openpyxl）與 office（Word/Excel COM）。
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENGINE_ORDER = ('pure', 'office')
+
+
+class Capabilities:
+    """探測一次的引擎模組（載入失敗者為 None）"""
+
+    def __init__(self):
+        try:
+            from docx import Document  # type: ignore
+        except Exception as e:
+            Document = None  # type: ignore
+            logger.debug(f"python-docx 載入失敗: {e}")
+        try:
+            from openpyxl import load_workbook  # type: ignore
+        except Exception as e:
+            load_workbook = None  # type: ignore
+            logger.debug(f"openpyxl 載入失敗: {e}")
+        try:
+            import win32com.client  # type: ignore
+            win32com = win32com.client
+        except Exception as e:
+            win32com = None
+            logger.debug(f"win32com 載入失敗: {e}")
+        self.Document = Document
+        self.load_workbook = load_workbook
+        self.win32com = win32com
+        self.office_unavailable: Optional[str] = None
+
+    def available(self, kind: str, engine: str) -> bool:
+        if engine == 'office':
+            return self.win32com is not None and self.office_unavailable is None
+        if kind == 'word':
+            return self.Document is not None
+        # xlsx 直接修補不需要 openpyxl（僅回退時使用）
+        return True
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'python-docx': self.Document is not None,
+            'openpyxl': self.load_workbook is not None,
+            'office_com': self.win32com is not None and self.office_unavailable is None,
+            'office_error': self.office_unavailable,
+        }
+
+
+_capabilities: Optional[Capabilities] = None
+_capabilities_lock = threading.Lock()
+
+
+def capabilities() -> Capabilities:
+    """本行程的引擎能力（第一次呼叫時探測）"""
+    global _capabilities
+    if _capabilities is None:
+        with _capabilities_lock:
+            if _capabilities is None:
+                caps = Capabilities()
+                found = ', '.join(name for name, ok in caps.describe().items() if ok is True) or '無'
+                logger.info(f"可用引擎: {found}")
+                _capabilities = caps
+    return _capabilities
+
+
+def _signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class EngineRouter:
+    """記住各模板成功／失敗的引擎，決定嘗試順序"""
+
+    def __init__(self, caps: Optional[Capabilities] = None):
+        self._caps = caps
+        self._lock = threading.Lock()
+        # (kind, 模板路徑) → (檔案簽章, 成功的引擎, 失敗的引擎)
+        self._routes: Dict[Tuple[str, str], Tuple[Any, Optional[str], Set[str]]] = {}
+
+    @property
+    def caps(self) -> Capabilities:
+        return self._caps or capabilities()
+
+    def _entry(self, kind: str, path: Path):
+        key = (kind, str(path))
+        signature = _signature(path)
+        entry = self._routes.get(key)
+        if entry is None or entry[0] != signature:
+            entry = (signature, None, set())
+            self._routes[key] = entry
+        return entry
+
+    def order(self, kind: str, path: Path, preference: str = 'auto') -> List[str]:
+        """依偏好、可用性與先前結果排出要嘗試的引擎"""
+        candidates = list(ENGINE_ORDER) if preference == 'auto' else [preference]
+        candidates = [e for e in candidates if self.caps.available(kind, e)]
+        with self._lock:
+            _, succeeded, failed = self._entry(kind, Path(path))
+        if preference == 'auto':
+            # 先前成功的引擎優先、先前失敗的排在最後，其餘引擎仍保留作為備援
+            # （失敗可能來自 SSOT 資料而非模板本身）
+            ranked = sorted(candidates, key=lambda e: (e != succeeded, e in failed))
+            if ranked != candidates:
+                logger.info(f"{Path(path).name}: 引擎嘗試順序調整為 {', '.join(ranked)}")
+            candidates = ranked
+        return candidates
+
+    def record(self, kind: str, path: Path, engine: str, ok: bool):
+        with self._lock:
+            signature, succeeded, failed = self._entry(kind, Path(path))
+            if ok:
+                failed.discard(engine)
+                succeeded = engine
+            else:
+                failed.add(engine)
+                if succeeded == engine:
+                    succeeded = None
+            self._routes[(kind, str(path))] = (signature, succeeded, failed)
+
+    def mark_office_unavailable(self, reason: str):
+        """Office 無法啟動：本行程不再嘗試 COM"""
+        if self.caps.office_unavailable is None:
+            logger.warning(f"Office 無法使用，之後改用純 Python 引擎: {reason}")
+            self.caps.office_unavailable = reason
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {
+                f"{kind}:{Path(path).name}": {'engine': succeeded, 'failed': sorted(failed)}
+                for (kind, path), (_, succeeded, failed) in self._routes.items()
+            }
+        return {'capabilities': self.caps.describe(), 'routes': routes}
+
+
+router = EngineRouter()
@@ -9,44 +9,37 @@
 安全考量：可於自動化前後控制檔案標籤/加密層級。
 """
 import json
-import yaml
 from pathlib import Path
 from typing import Dict, Any
 
+import yaml_cache
+from mapping_plan import CompiledMapping, SsotTable
+from ssot_store import default_ssot_name, open_ssot
+
 BASE = Path(__file__).parent.parent
-SSOT_FILE = BASE / "ssot" / "master.yaml"
+SSOT_DIR = BASE / "ssot"
 MAPPING_FILE = BASE / "mapping" / "customer_mapping.yaml"
 OUTPUT_FILE = BASE / "output" / "ssot_flat.json"
 
 
 def load_yaml(path: Path) -> Dict[str, Any]:
-    with path.open('r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
-
-
-def get_nested(data: Dict[str, Any], path: str):
-    cur = data
-    for p in path.split('.'):
-        if isinstance(cur, dict) and p in cur:
-            cur = cur[p]
-        else:
-            return None
-    return cur
+    return yaml_cache.load_yaml(path)
 
 
-def flatten(ssot: Dict[str, Any], mapping_cfg: Dict[str, Any]) -> Dict[str, Any]:
+def flatten(ssot: Dict[str, Any], mapping_cfg) -> Dict[str, Any]:
+    """mapping_cfg 可為對應表 dict 或 CompiledMapping"""
+    compiled = mapping_cfg if isinstance(mapping_cfg, CompiledMapping) else CompiledMapping(mapping_cfg)
+    table = ssot if isinstance(ssot, SsotTable) else SsotTable(ssot)
     flat: Dict[str, Any] = {}
-    word_maps = mapping_cfg.get('word_mappings', {})
-    for template_name, cfg in word_maps.items():
-        for ssot_key, bookmark in cfg.get('mappings', {}).items():
-            value = get_nested(ssot, ssot_key)
+    for plan in compiled.templates('word'):
+        for accessor, value in plan.resolve(table):
             if value is not None and value != "":
-                flat[bookmark] = value
+                flat[accessor.target] = value
     return flat
 
 
 def main():
-    ssot = load_yaml(SSOT_FILE)
+    ssot = open_ssot(SSOT_DIR / default_ssot_name())
     mapping_cfg = load_yaml(MAPPING_FILE)
     flat = flatten(ssot, mapping_cfg)
     OUTPUT_FILE.parent.mkdir(exist_ok=True)
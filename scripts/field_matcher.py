@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - 欄位名稱 → SSOT 路徑 索引比對
+
+auto_bookmark_helper 原本對每個偵測到的欄位逐一與所有扁平化 SSOT 鍵計算相似度
+（欄位數 × 鍵數）。本模組預先對 SSOT 鍵建立索引，查詢時只檢查候選鍵：
+- 同義詞索引：關鍵字群組（名稱/name、記憶體/memory/ram …）→ 含該群組關鍵字的鍵
+- Aho-Corasick：一次掃描欄位文字，找出「完整出現在欄位中」的鍵
+- 二元組（bigram）倒排索引：找出「包含整個欄位文字」的候選鍵後再確認
+
+評分規則與原本的 calculate_similarity 相同：同義詞群組相符 0.8、
+字串互相包含 0.5；同分時以 SSOT 中較早出現的鍵優先。
+"""
+
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from aho_corasick import AhoCorasick
+
+# 同義詞群組：欄位文字與 SSOT 鍵各自含有同一群組的任一關鍵字即視為相符
+SYNONYM_GROUPS: Dict[str, List[str]] = {
+    'name': ['名稱', 'name'],
+    'version': ['版本', 'version'],
+    'cpu': ['cpu', '處理器', 'processor'],
+    'memory': ['記憶體', 'memory', 'ram'],
+    'storage': ['硬碟', '儲存', 'storage', 'disk'],
+    'os': ['作業系統', 'os', 'operating'],
+}
+
+SYNONYM_SCORE = 0.8
+CONTAINS_SCORE = 0.5
+
+
+def synonym_groups(text: str) -> Set[str]:
+    """text（小寫）中出現的同義詞群組"""
+    return {group for group, words in SYNONYM_GROUPS.items() if any(w in text for w in words)}
+
+
+def _bigrams(text: str) -> Set[str]:
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class FieldIndex:
+    """扁平化 SSOT 鍵的查詢索引（建立一次，可查詢任意多個欄位）"""
+
+    def __init__(self, ssot_fields: Dict[str, Any]):
+        self.fields = ssot_fields
+        self.keys: List[str] = list(ssot_fields)
+        lowered = [k.lower() for k in self.keys]
+        self._lowered = lowered
+
+        self._by_group: Dict[str, List[int]] = {group: [] for group in SYNONYM_GROUPS}
+        self._by_text: Dict[str, List[int]] = {}
+        self._by_bigram: Dict[str, Set[int]] = {}
+        for i, key in enumerate(lowered):
+            for group in synonym_groups(key):
+                self._by_group[group].append(i)
+            self._by_text.setdefault(key, []).append(i)
+            for gram in _bigrams(key):
+                self._by_bigram.setdefault(gram, set()).add(i)
+        self._automaton = AhoCorasick(self._by_text)
+
+    def _keys_containing(self, text: str) -> Iterable[int]:
+        """包含整個 text 的鍵"""
+        if len(text) < 2:
+            return [i for i, key in enumerate(self._lowered) if text in key]
+        postings = sorted((self._by_bigram.get(g, set()) for g in _bigrams(text)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return [i for i in candidates if text in self._lowered[i]]
+
+    def _keys_within(self, text: str) -> Iterable[int]:
+        """完整出現在 text 中的鍵"""
+        for key in self._automaton.find(text):
+            yield from self._by_text[key]
+
+    def candidates(self, field_name: str, k: int = 5) -> List[Tuple[str, float]]:
+        """依分數（高→低）與 SSOT 順序排列的前 k 個候選鍵"""
+        text = field_name.lower()
+        ranked: List[Tuple[int, float]] = []
+        seen: Set[int] = set()
+        # 各群組的鍵索引已排序，合併後取最前面的 k 個即可，不需排序全部相符的鍵
+        for i in heapq.merge(*(self._by_group[g] for g in synonym_groups(text))):
+            if i not in seen:
+                seen.add(i)
+                ranked.append((i, SYNONYM_SCORE))
+                if len(ranked) == k:
+                    break
+        if len(ranked) < k:
+            contains = set(self._keys_containing(text))
+            contains.update(self._keys_within(text))
+            contains -= seen
+            ranked.extend((i, CONTAINS_SCORE) for i in heapq.nsmallest(k - len(ranked), contains))
+        return [(self.keys[i], score) for i, score in ranked]
+
+    def best_match(self, field_name: str) -> Tuple[Optional[str], float]:
+        top = self.candidates(field_name, k=1)
+        return top[0] if top else (None, 0.0)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - 填寫收據
+
+產生文件時記錄每個填入值的確切位置（part、位元組位移與長度）與值，以及被改寫 part 的
+SHA-256。驗證時只需讀出這些 part 比對雜湊、再讀取記錄的位置，不必解析或搜尋全文：
+- 不會因為值（例如 "v1.0.0"）恰好出現在文件其他地方而誤判通過
+- 雜湊不符（文件被手動修改）、對應表已變更或缺少收據時，由呼叫端改用完整掃描
+
+收據以輸出內容雜湊為鍵，存於輸出儲存區（output/.store/objects/ 中與物件並列）。
+Word 只有預編譯計畫路徑、Excel 只有直接修補路徑會產生收據；
+python-docx、openpyxl 與 Office 路徑沒有位置資訊，驗證時使用完整掃描。
+"""
+
+import hashlib
+import html
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from xlsx_package import cell_value
+
+RECEIPT_VERSION = 2
+
+
+def part_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def word_receipt(parts: Mapping[str, bytes], fills: List[Dict[str, Any]],
+                 mapping: Mapping[str, str]) -> Dict[str, Any]:
+    """Word 收據：fills 為 render_docx 記錄的 Token 位置"""
+    return {
+        'version': RECEIPT_VERSION,
+        'kind': 'word',
+        'mapping': dict(mapping),
+        'parts': {name: part_digest(data) for name, data in parts.items()},
+        'fills': fills,
+    }
+
+
+def excel_receipt(parts: Mapping[str, bytes], sheet_name: str, mapping: Mapping[str, str],
+                  cells: Mapping[str, Any], locations: Mapping[str, Tuple[str, int, int]]) -> Dict[str, Any]:
+    """Excel 收據：parts 為 patch_cells 改寫的工作表 part，cells 為寫入的值，locations 為
+    patch_cells 寫入時記錄的 對應表位址 → (展開後位址, 位元組位移, 長度)；值為空而未寫入的儲存格不列入
+    """
+    (part, xml), = parts.items()
+    fills = []
+    for cell in dict.fromkeys(mapping.values()):
+        if cell not in locations:
+            continue
+        ref, offset, length = locations[cell]
+        fills.append({'cell': cell, 'ref': ref, 'part': part, 'offset': offset, 'length': length,
+                      'value': cells[cell]})
+    return {
+        'version': RECEIPT_VERSION,
+        'kind': 'excel',
+        'mapping': dict(mapping),
+        'sheet': sheet_name,
+        'parts': {part: part_digest(xml)},
+        'fills': fills,
+    }
+
+
+def _read_parts(path: Path, names: Iterable[str]) -> Optional[Dict[str, bytes]]:
+    try:
+        with zipfile.ZipFile(path, 'r') as zf:
+            return {name: zf.read(name) for name in names}
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return None
+
+
+def read_fills(path: Path, receipt: Optional[Dict[str, Any]], mapping: Mapping[str, str],
+               sheet_name: Optional[str] = None) -> Optional[Dict[str, List[Any]]]:
+    """依收據讀取文件中各填寫位置的實際值：{Token 或儲存格: [值, ...]}
+
+    收據不適用（版本、對應表或工作表不同）或 part 雜湊不符時回傳 None，需改用完整掃描。
+    """
+    if not receipt or receipt.get('version') != RECEIPT_VERSION:
+        return None
+    if receipt.get('mapping') != dict(mapping) or receipt.get('sheet') != sheet_name:
+        return None
+    parts = _read_parts(path, receipt['parts'])
+    if parts is None:
+        return None
+    for name, digest in receipt['parts'].items():
+        if part_digest(parts[name]) != digest:
+            return None
+
+    values: Dict[str, List[Any]] = {}
+    for fill in receipt['fills']:
+        data = parts[fill['part']]
+        fragment = data[fill['offset']:fill['offset'] + fill['length']].decode('utf-8')
+        if receipt['kind'] == 'excel':
+            values.setdefault(fill['cell'], []).append(cell_value(fragment))
+        else:
+            values.setdefault(fill['token'], []).append(html.unescape(fragment))
+    return values
@@ -12,12 +12,34 @@ Spec Sync SSOT - 文件自動產生引擎
 
 import os
 import sys
-import yaml
-import json
+import time
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.util import Finalize
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from build_manifest import MANIFEST_FILENAME, BuildManifest
+from engine_registry import capabilities, router
+from fill_receipt import excel_receipt, word_receipt
+from instrumentation import Tracer, activate, add_trace_argument, count, count_file_bytes, current, report, span
+from mapping_plan import (
+    CompiledMapping,
+    SsotTable,
+    TemplatePlan,
+    get_nested_value,
+    load_compiled_mapping,
+    warn_missing,
+)
+from office_pool import ComBackend, OfficeAppPool, OfficeUnavailable
+from output_store import OutputStore
+from package_writer import write_package
+from ssot_store import default_ssot_name, open_ssot
+from template_compiler import CompileUnsupported, load_plan, render_docx
+from token_replacer import expand_repeating_regions, replace_tokens_in_document
+from xlsx_package import SheetNotFoundError, XlsxPatchUnsupported, expand_repeat_rows_worksheet, patch_cells
+from yaml_cache import load_yaml
 
 # 設定日誌
 logging.basicConfig(
@@ -26,33 +48,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def _import_python_doc_libs():
-    """延遲載入 python-docx 與 openpyxl。"""
-    try:
-        from docx import Document  # type: ignore
-    except Exception as e:
-        Document = None  # type: ignore
-        logger.debug(f"python-docx 載入失敗: {e}")
-    try:
-        from openpyxl import load_workbook  # type: ignore
-    except Exception as e:
-        load_workbook = None  # type: ignore
-        logger.debug(f"openpyxl 載入失敗: {e}")
-    return Document, load_workbook
-
-def _import_office_com():
-    """延遲載入 win32com。"""
-    try:
-        import win32com.client  # type: ignore
-        return win32com.client
-    except Exception as e:
-        logger.debug(f"win32com 載入失敗: {e}")
-        return None
-
 class SpecSyncEngine:
     """規格同步引擎"""
     
-    def __init__(self, base_path: str = "."):
+    def __init__(self, base_path: str = ".", office_pool: Optional[OfficeAppPool] = None):
         self.base_path = Path(base_path)
         self.ssot_path = self.base_path / "ssot"
         self.mapping_path = self.base_path / "mapping" 
@@ -61,21 +60,27 @@ class SpecSyncEngine:
         
         # 確保輸出目錄存在
         self.output_path.mkdir(exist_ok=True)
+        self.last_results: List[Dict[str, Any]] = []
+        self._office_pool = office_pool
+
+    def get_office_pool(self, win32com) -> OfficeAppPool:
+        """取得（必要時建立）Office 實例池，整批文件共用已啟動的 Word/Excel"""
+        if self._office_pool is None:
+            self._office_pool = OfficeAppPool(ComBackend(win32com))
+        return self._office_pool
+
+    def close_office_pool(self):
+        """結束實例池中所有 Word/Excel"""
+        if self._office_pool is not None:
+            self._office_pool.close_all()
         
-    def load_ssot(self, ssot_file: str = "master.yaml") -> Dict[str, Any]:
-        """載入 SSOT 主檔案"""
-        ssot_file_path = self.ssot_path / ssot_file
-        
-        if not ssot_file_path.exists():
-            raise FileNotFoundError(f"SSOT 檔案不存在: {ssot_file_path}")
-            
-        with open(ssot_file_path, 'r', encoding='utf-8') as f:
-            if ssot_file_path.suffix.lower() == '.yaml':
-                return yaml.safe_load(f)
-            elif ssot_file_path.suffix.lower() == '.json':
-                return json.load(f)
-        
-        raise ValueError(f"不支援的 SSOT 檔案格式: {ssot_file_path.suffix}")
+    def load_ssot(self, ssot_file: Optional[str] = None) -> Dict[str, Any]:
+        """載入 SSOT 主檔案
+
+        預設為 master.yaml（可由環境變數 SPEC_SYNC_SSOT 指定）；分割目錄與 SQLite
+        來源回傳延遲載入的儲存區，只讀取模板實際引用的區塊。
+        """
+        return open_ssot(self.ssot_path / (ssot_file or default_ssot_name()))
     
     def load_mapping(self, mapping_file: str = "customer_mapping.yaml") -> Dict[str, Any]:
         """載入客戶欄位對應表"""
@@ -84,57 +89,95 @@ class SpecSyncEngine:
         if not mapping_file_path.exists():
             raise FileNotFoundError(f"對應表檔案不存在: {mapping_file_path}")
             
-        with open(mapping_file_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return load_yaml(mapping_file_path)
     
     def get_nested_value(self, data: Dict[str, Any], key_path: str) -> Any:
-        """從巢狀字典中取得值 (例如: product.name -> data['product']['name'])"""
-        keys = key_path.split('.')
-        value = data
-        
-        try:
-            for key in keys:
-                value = value[key]
+        """從巢狀字典中取得值 (例如: product.name -> data['product']['name'])
+
+        支援清單索引（例如 specifications.functional_requirements[0].title）。
+        """
+        value = get_nested_value(data, key_path)
+        if value is None:
+            warn_missing(key_path)
+        return value
+
+    def list_resolver(self, table: SsotTable, lists: Optional[Dict[str, str]]):
+        """重複區域的清單查詢：模板中的別名 → 對應表 lists 指定的 SSOT 清單"""
+        lists = lists or {}
+
+        def resolve(alias: str) -> Any:
+            path = lists.get(alias, f"{alias}[]")
+            value = table.get(path) if alias in lists else None
+            if value is None:
+                warn_missing(path)
             return value
-        except (KeyError, TypeError):
-            logger.warning(f"找不到欄位: {key_path}")
-            return None
+        return resolve
     
-    def fill_word_template(self, template_file: str, mapping: Dict[str, str], 
-                          ssot_data: Dict[str, Any], output_file: str):
-        """填寫 Word 模板（自動選擇引擎）。"""
+    def fill_word_template(self, plan: TemplatePlan, table: SsotTable, output_file: str,
+                          receipt: Optional[Dict[str, Any]] = None):
+        """依填寫計畫填寫 Word 模板（自動選擇引擎）。
+
+        plan.lists（別名 → SSOT 清單路徑）用於展開 {別名[].欄位} 重複列，僅 python-docx 模式支援。
+        提供 receipt 時，以預編譯計畫填寫的文件會把填寫收據（fill_receipt）寫入其中。
+        """
         engine_pref = os.getenv("SPEC_SYNC_ENGINE", "auto").lower()
-        template_path = self.template_path / template_file
+        template_path = self.template_path / plan.template_file
         output_path = self.output_path / output_file
 
         if not template_path.exists():
             logger.error(f"Word 模板不存在: {template_path}")
             return False
 
-        Document, _ = _import_python_doc_libs()
-        win32com = _import_office_com() if engine_pref in ("auto", "office") else None
+        caps = capabilities()
+        Document, win32com = caps.Document, caps.win32com
+        values = plan.token_values(table)
+        lists = self.list_resolver(table, plan.lists)
+
+        def _fill_with_compiled_plan() -> Optional[bool]:
+            # 預編譯的渲染計畫：不建立 DOM，直接串接本文片段；模板不適用時回傳 None
+            try:
+                with span('load_plan'):
+                    render_plan = load_plan(template_path)
+            except CompileUnsupported as e:
+                logger.debug(f"{template_path.name} 不使用預編譯計畫：{e}")
+                return None
+            try:
+                fills: Optional[List[Dict[str, Any]]] = [] if receipt is not None else None
+                with span('render'):
+                    replaced, parts = render_docx(render_plan, values, lists, fills=fills)
+                with span('save'):
+                    write_package(template_path, output_path, parts)
+            except ValueError as e:
+                logger.debug(f"{template_path.name} 預編譯計畫無法渲染，改用 python-docx：{e}")
+                return None
+            if receipt is not None:
+                receipt.update(word_receipt(parts, fills, plan.mappings))
+            count_file_bytes('bytes_read', template_path)
+            count_file_bytes('bytes_written', output_path)
+            logger.info(f"Word 文件已產生: {output_path}（替換 {replaced['count']} 處）")
+            return True
 
         def _fill_with_python_docx() -> bool:
             if Document is None:
                 return False
             try:
-                doc = Document(str(template_path))
-                # 替換書籤/欄位（以 Token {Bookmark} 為主）
-                for ssot_field, word_bookmark in mapping.items():
-                    value = self.get_nested_value(ssot_data, ssot_field)
-                    if value is None:
-                        continue
-                    token = f"{{{word_bookmark}}}"
-                    for paragraph in doc.paragraphs:
-                        if token in paragraph.text:
-                            paragraph.text = paragraph.text.replace(token, str(value))
-                    for table in doc.tables:
-                        for row in table.rows:
-                            for cell in row.cells:
-                                if token in cell.text:
-                                    cell.text = cell.text.replace(token, str(value))
-                doc.save(str(output_path))
-                logger.info(f"Word 文件已產生: {output_path}")
+                compiled = _fill_with_compiled_plan()
+                if compiled is not None:
+                    return compiled
+                count('fallback.dom')
+                with span('open'):
+                    doc = Document(str(template_path))
+                count_file_bytes('bytes_read', template_path)
+                # 先展開重複列（整批複製後一次插入），再替換書籤/欄位（以 Token {Bookmark} 為主）
+                with span('expand_rows'):
+                    expand_repeating_regions(doc.element.body, lists)
+                with span('replace_tokens'):
+                    replaced = replace_tokens_in_document(doc, values)
+                with span('save'):
+                    # 只修改了本文 part：其餘 part 原樣複製，不經 doc.save() 重新壓縮
+                    write_package(template_path, output_path, {doc.part.partname.lstrip('/'): doc.part.blob})
+                count_file_bytes('bytes_written', output_path)
+                logger.info(f"Word 文件已產生: {output_path}（替換 {replaced['count']} 處）")
                 return True
             except Exception as e:
                 logger.warning(f"python-docx 處理失敗，將嘗試 Office 模式：{e}")
@@ -144,109 +187,127 @@ class SpecSyncEngine:
             if win32com is None:
                 return False
             try:
-                # 嘗試多種可能的 COM ProgID（Microsoft Word / Kingsoft WPS）
-                prog_ids = ["Word.Application", "kwps.Application", "wps.Application"]
-                word = None
-                for pid in prog_ids:
-                    try:
-                        word = win32com.Dispatch(pid)
-                        logger.info(f"使用 COM 程式：{pid}")
-                        break
-                    except Exception as _e:
-                        continue
-                if word is None:
-                    logger.error("找不到可用的 Word/WPS COM 介面")
-                    return False
-                word.Visible = False
-                # 嘗試不同開啟參數（有些受保護/IRM/WPS 需只讀模式）
-                open_attempts = [
-                    dict(Path=str(template_path)),
-                    dict(Path=str(template_path), ReadOnly=True),
-                    dict(Path=str(template_path), ReadOnly=True, AddToRecentFiles=False),
-                ]
-                doc = None
-                for args in open_attempts:
-                    try:
-                        doc = word.Documents.Open(**args)
-                        break
-                    except Exception as oe:
-                        logger.debug(f"開啟文件失敗（嘗試參數 {args}）：{oe}")
-                        continue
-                if doc is None:
-                    logger.error("無法開啟加密或受保護的文件，請確認權限/是否允許自動化。")
-                    return False
-                # 嘗試書籤填入；若無則使用尋找取代
-                for ssot_field, name in mapping.items():
-                    value = self.get_nested_value(ssot_data, ssot_field)
-                    if value is None:
-                        continue
-                    try:
-                        if doc.Bookmarks.Exists(name):
-                            doc.Bookmarks(name).Range.Text = str(value)
+                pool = self.get_office_pool(win32com)
+                with span('office'), pool.session('word') as word:
+                    # 嘗試不同開啟參數（有些受保護/IRM/WPS 需只讀模式）
+                    open_attempts = [
+                        dict(Path=str(template_path)),
+                        dict(Path=str(template_path), ReadOnly=True),
+                        dict(Path=str(template_path), ReadOnly=True, AddToRecentFiles=False),
+                    ]
+                    doc = None
+                    for args in open_attempts:
+                        try:
+                            doc = word.Documents.Open(**args)
+                            break
+                        except Exception as oe:
+                            logger.debug(f"開啟文件失敗（嘗試參數 {args}）：{oe}")
                             continue
-                    except Exception:
-                        pass
-                    # Find/Replace token {Name} 於整份文件
-                    rng = doc.Content
-                    find = rng.Find
-                    find.ClearFormatting()
-                    find.Text = f"{{{name}}}"
-                    find.Replacement.ClearFormatting()
-                    find.Replacement.Text = str(value)
-                    find.Execute(Replace=2)  # wdReplaceAll
-                # 另存新檔為 .docx
-                wdFormatXMLDocument = 12
-                doc.SaveAs(str(output_path), FileFormat=wdFormatXMLDocument)
-                doc.Close(False)
-                word.Quit()
+                    if doc is None:
+                        logger.error("無法開啟加密或受保護的文件，請確認權限/是否允許自動化。")
+                        return False
+                    try:
+                        # 嘗試書籤填入；若無則使用尋找取代
+                        for name, value in values.items():
+                            try:
+                                if doc.Bookmarks.Exists(name):
+                                    doc.Bookmarks(name).Range.Text = str(value)
+                                    continue
+                            except Exception:
+                                pass
+                            # Find/Replace token {Name} 於整份文件
+                            rng = doc.Content
+                            find = rng.Find
+                            find.ClearFormatting()
+                            find.Text = f"{{{name}}}"
+                            find.Replacement.ClearFormatting()
+                            find.Replacement.Text = str(value)
+                            find.Execute(Replace=2)  # wdReplaceAll
+                        # 另存新檔為 .docx
+                        wdFormatXMLDocument = 12
+                        doc.SaveAs(str(output_path), FileFormat=wdFormatXMLDocument)
+                    finally:
+                        doc.Close(False)
+                count_file_bytes('bytes_written', output_path)
                 logger.info(f"Word 文件已產生（Office 模式）: {output_path}")
                 return True
+            except OfficeUnavailable as e:
+                logger.error("找不到可用的 Word/WPS COM 介面")
+                router.mark_office_unavailable(str(e))
+                return False
             except Exception as e:
                 logger.error(f"Office Word 自動化失敗：{e}")
-                try:
-                    # 嘗試確保應用程式關閉
-                    word.Quit()
-                except Exception:
-                    pass
                 return False
 
-        # 根據偏好選擇
-        if engine_pref == "pure":
-            return _fill_with_python_docx()
-        elif engine_pref == "office":
-            return _fill_with_office_com()
-        else:
-            return _fill_with_python_docx() or _fill_with_office_com()
+        return self._run_engines('word', template_path, engine_pref,
+                                 {'pure': _fill_with_python_docx, 'office': _fill_with_office_com})
     
-    def fill_excel_template(self, template_file: str, sheet_name: str,
-                           mapping: Dict[str, str], ssot_data: Dict[str, Any], 
-                           output_file: str):
-        """填寫 Excel 模板（自動選擇引擎）。"""
+    def fill_excel_template(self, plan: TemplatePlan, table: SsotTable, output_file: str,
+                           receipt: Optional[Dict[str, Any]] = None):
+        """依填寫計畫填寫 Excel 模板（自動選擇引擎）。
+
+        plan.lists 用於展開 {別名[].欄位} 重複列；對應表的儲存格位址以模板（展開前）為準。
+        提供 receipt 時，直接修補的文件會把填寫收據（fill_receipt）寫入其中。
+        """
         engine_pref = os.getenv("SPEC_SYNC_ENGINE", "auto").lower()
-        template_path = self.template_path / template_file
+        template_path = self.template_path / plan.template_file
+        sheet_name = plan.sheet_name
         output_path = self.output_path / output_file
 
         if not template_path.exists():
             logger.error(f"Excel 模板不存在: {template_path}")
             return False
 
-        _, load_workbook = _import_python_doc_libs()
-        win32com = _import_office_com() if engine_pref in ("auto", "office") else None
+        caps = capabilities()
+        load_workbook, win32com = caps.load_workbook, caps.win32com
+        cells = {accessor.target: value for accessor, value in plan.resolve(table) if value is not None}
+        lists = self.list_resolver(table, plan.lists)
+
+        def _fill_with_xlsx_patch() -> bool:
+            # 直接修補 xlsx 套件：只改寫目標儲存格，其餘工作表原樣串流複製
+            written: Dict[str, bytes] = {}
+            locations: Dict[str, Tuple[str, int, int]] = {}
+            try:
+                with span('xlsx_patch'):
+                    patch_cells(template_path, output_path, sheet_name, cells,
+                                lists=lists, written=written,
+                                locations=locations)
+            except SheetNotFoundError:
+                logger.error(f"工作表不存在: {sheet_name}")
+                return False
+            except ValueError as e:
+                logger.error(f"Excel 對應表無法套用: {e}")
+                return False
+            except XlsxPatchUnsupported as e:
+                logger.info(f"改用 openpyxl 填寫：{e}")
+                count('fallback.openpyxl')
+                return _fill_with_openpyxl()
+            if receipt is not None:
+                receipt.update(excel_receipt(written, sheet_name, plan.mappings, cells, locations))
+            count_file_bytes('bytes_read', template_path)
+            count_file_bytes('bytes_written', output_path)
+            logger.info(f"Excel 文件已產生: {output_path}")
+            return True
 
         def _fill_with_openpyxl() -> bool:
             if load_workbook is None:
                 return False
             try:
-                wb = load_workbook(str(template_path))
+                with span('open'):
+                    wb = load_workbook(str(template_path))
+                count_file_bytes('bytes_read', template_path)
                 if sheet_name not in wb.sheetnames:
                     logger.error(f"工作表不存在: {sheet_name}")
                     return False
                 ws = wb[sheet_name]
-                for ssot_field, excel_cell in mapping.items():
-                    value = self.get_nested_value(ssot_data, ssot_field)
-                    if value is not None:
+                with span('replace_tokens'):
+                    for excel_cell, value in cells.items():
                         ws[excel_cell] = value
-                wb.save(str(output_path))
+                with span('expand_rows'):
+                    expand_repeat_rows_worksheet(ws, lists)
+                with span('save'):
+                    wb.save(str(output_path))
+                count_file_bytes('bytes_written', output_path)
                 logger.info(f"Excel 文件已產生: {output_path}")
                 return True
             except Exception as e:
@@ -257,85 +318,309 @@ class SpecSyncEngine:
             if win32com is None:
                 return False
             try:
-                excel = win32com.Dispatch("Excel.Application")
-                excel.Visible = False
-                wb = excel.Workbooks.Open(str(template_path))
-                ws = wb.Worksheets(sheet_name)
-                for ssot_field, excel_cell in mapping.items():
-                    value = self.get_nested_value(ssot_data, ssot_field)
-                    if value is not None:
-                        ws.Range(excel_cell).Value = value
-                # 另存新檔為 .xlsx
-                xlOpenXMLWorkbook = 51
-                wb.SaveAs(str(output_path), FileFormat=xlOpenXMLWorkbook)
-                wb.Close(SaveChanges=False)
-                excel.Quit()
+                pool = self.get_office_pool(win32com)
+                with span('office'), pool.session('excel') as excel:
+                    wb = excel.Workbooks.Open(str(template_path))
+                    try:
+                        ws = wb.Worksheets(sheet_name)
+                        for excel_cell, value in cells.items():
+                            ws.Range(excel_cell).Value = value
+                        # 另存新檔為 .xlsx
+                        xlOpenXMLWorkbook = 51
+                        wb.SaveAs(str(output_path), FileFormat=xlOpenXMLWorkbook)
+                    finally:
+                        wb.Close(SaveChanges=False)
+                count_file_bytes('bytes_written', output_path)
                 logger.info(f"Excel 文件已產生（Office 模式）: {output_path}")
                 return True
+            except OfficeUnavailable as e:
+                logger.error("找不到可用的 Excel/WPS COM 介面")
+                router.mark_office_unavailable(str(e))
+                return False
             except Exception as e:
                 logger.error(f"Office Excel 自動化失敗：{e}")
-                try:
-                    excel.Quit()
-                except Exception:
-                    pass
                 return False
 
-        if engine_pref == "pure":
-            return _fill_with_openpyxl()
-        elif engine_pref == "office":
-            return _fill_with_office_com()
-        else:
-            return _fill_with_openpyxl() or _fill_with_office_com()
+        return self._run_engines('excel', template_path, engine_pref,
+                                 {'pure': _fill_with_xlsx_patch, 'office': _fill_with_office_com})
+
+    def _run_engines(self, kind: str, template_path: Path, engine_pref: str, fills) -> bool:
+        """依引擎路由（偏好、可用性、該模板先前的結果）依序嘗試，並記錄結果"""
+        if engine_pref not in ('pure', 'office'):
+            engine_pref = 'auto'
+        for attempt, engine in enumerate(router.order(kind, template_path, engine_pref)):
+            if attempt:
+                count(f'fallback.{engine}')
+            ok = fills[engine]()
+            router.record(kind, template_path, engine, ok)
+            if ok:
+                return True
+        return False
     
-    def generate_all_documents(self):
-        """產生所有文件"""
+    def load_compiled_mapping(self, mapping_file: str = "customer_mapping.yaml") -> CompiledMapping:
+        """載入編譯後的對應表（依內容雜湊快取）"""
+        mapping_file_path = self.mapping_path / mapping_file
+        if not mapping_file_path.exists():
+            raise FileNotFoundError(f"對應表檔案不存在: {mapping_file_path}")
+        return load_compiled_mapping(mapping_file_path)
+
+    def build_tasks(self, mapping_config) -> List[Dict[str, Any]]:
+        """將對應表（dict 或 CompiledMapping）展開為逐一模板的填寫任務"""
+        if not isinstance(mapping_config, CompiledMapping):
+            mapping_config = CompiledMapping(mapping_config)
+        date_tag = datetime.now().strftime('%Y%m%d')
+        tasks: List[Dict[str, Any]] = []
+        for plan in mapping_config.templates():
+            ext = 'docx' if plan.kind == 'word' else 'xlsx'
+            tasks.append({
+                'kind': plan.kind,
+                'template_name': plan.name,
+                'plan': plan,
+                'output_file': f"{plan.name}_{date_tag}.{ext}",
+            })
+        return tasks
+
+    def select_tasks(self, tasks: List[Dict[str, Any]], only: Iterable[str]) -> List[Dict[str, Any]]:
+        """只保留指定的模板（名稱或 kind:名稱）"""
+        wanted = set(only)
+        selected = [t for t in tasks
+                    if t['template_name'] in wanted or f"{t['kind']}:{t['template_name']}" in wanted]
+        known = {t['template_name'] for t in tasks} | {f"{t['kind']}:{t['template_name']}" for t in tasks}
+        for name in sorted(wanted - known):
+            logger.warning(f"對應表中沒有模板: {name}")
+        return selected
+
+    def run_task(self, task: Dict[str, Any], table: SsotTable) -> Dict[str, Any]:
+        """執行單一填寫任務，回傳成功與否及耗時
+
+        task 帶有 write_to 時寫入該暫存檔（相對於 output/），由輸出儲存區收錄；
+        引擎產生填寫收據時放在結果的 receipt。
+        """
+        start = time.perf_counter()
+        error = None
+        write_to = task.get('write_to', task['output_file'])
+        receipt: Dict[str, Any] = {}
+        try:
+            with span('template', template=task['template_name'], kind=task['kind']):
+                ok = self._fill(task, table, write_to, receipt)
+        except Exception as e:
+            ok = False
+            error = str(e)
+            logger.error(f"{task['template_name']} 產生失敗: {e}")
+        return {
+            'template': task['template_name'],
+            'kind': task['kind'],
+            'output': task['output_file'],
+            'success': bool(ok),
+            'skipped': False,
+            'error': error,
+            'elapsed': time.perf_counter() - start,
+            'receipt': receipt or None,
+        }
+
+    def _fill(self, task: Dict[str, Any], table: SsotTable, write_to: str,
+              receipt: Optional[Dict[str, Any]] = None) -> bool:
+        if task['kind'] == 'word':
+            return self.fill_word_template(task['plan'], table, write_to, receipt=receipt)
+        return self.fill_excel_template(task['plan'], table, write_to, receipt=receipt)
+
+    def task_fingerprint(self, task: Dict[str, Any], table: SsotTable):
+        """計算任務輸入（模板、對應設定、解析後的 SSOT 值）的雜湊；模板不存在時回傳 None"""
+        plan: TemplatePlan = task['plan']
+        template_path = self.template_path / plan.template_file
+        if not template_path.exists():
+            return None
+        mapping_block = {
+            'kind': plan.kind,
+            'template_file': plan.template_file,
+            'sheet_name': plan.sheet_name,
+            'mappings': plan.mappings,
+        }
+        resolved = {f.path: table.get(f.path) for f in plan.fields}
+        if plan.lists:
+            mapping_block['lists'] = plan.lists
+            for alias, path in plan.lists.items():
+                resolved[f"{alias}[]"] = table.get(path)
+        return BuildManifest.fingerprint(template_path, mapping_block, resolved)
+
+    def generate_all_documents(self, jobs: int = 1, force: bool = False,
+                               only: Optional[Iterable[str]] = None):
+        """產生所有文件
+
+        jobs > 1 時以多個行程平行填寫模板；0 代表使用全部 CPU 核心。
+        only 指定時只處理這些模板（名稱或 'word:名稱' / 'excel:名稱'，例如 impact_analysis 的結果）。
+        依 output/.build_manifest.json 只重新產生輸入有變動的模板；force=True 時全部重建。
+        產生的文件由輸出儲存區（output/.store）依內容雜湊收錄，內容未變更時不重寫輸出檔。
+        各模板結果（成功與否、耗時）存於 self.last_results。
+        """
         try:
             # 載入 SSOT 和對應表
-            ssot_data = self.load_ssot()
-            mapping_config = self.load_mapping()
-            
-            logger.info("開始產生客戶文件...")
-            
-            # 處理 Word 文件
-            if 'word_mappings' in mapping_config:
-                for template_name, config in mapping_config['word_mappings'].items():
-                    template_file = config['file_path'].replace('templates/', '')
-                    output_file = f"{template_name}_{datetime.now().strftime('%Y%m%d')}.docx"
-                    
-                    self.fill_word_template(
-                        template_file, 
-                        config['mappings'], 
-                        ssot_data, 
-                        output_file
-                    )
-            
-            # 處理 Excel 文件
-            if 'excel_mappings' in mapping_config:
-                for template_name, config in mapping_config['excel_mappings'].items():
-                    template_file = config['file_path'].replace('templates/', '')
-                    sheet_name = config.get('sheet_name', 'Sheet1')
-                    output_file = f"{template_name}_{datetime.now().strftime('%Y%m%d')}.xlsx"
-                    
-                    self.fill_excel_template(
-                        template_file,
-                        sheet_name,
-                        config['mappings'], 
-                        ssot_data, 
-                        output_file
-                    )
-            
+            with span('load_ssot'):
+                ssot_data = self.load_ssot()
+                table = SsotTable(ssot_data)
+            with span('load_mapping'):
+                tasks = self.build_tasks(self.load_compiled_mapping())
+            if only is not None:
+                tasks = self.select_tasks(tasks, only)
+
+            manifest = BuildManifest(self.output_path / MANIFEST_FILENAME)
+            store = OutputStore(self.output_path)
+            results_by_key: Dict[str, Dict[str, Any]] = {}
+            pending: List[Dict[str, Any]] = []
+            for task in tasks:
+                key = f"{task['kind']}:{task['template_name']}"
+                with span('fingerprint', template=task['template_name']):
+                    task['fingerprint'] = self.task_fingerprint(task, table)
+                existing = None
+                if not force and task['fingerprint'] is not None:
+                    existing = manifest.is_up_to_date(key, task['fingerprint'], self.output_path)
+                if existing:
+                    results_by_key[key] = {
+                        'template': task['template_name'],
+                        'kind': task['kind'],
+                        'output': existing,
+                        'success': True,
+                        'skipped': True,
+                        'error': None,
+                        'elapsed': 0.0,
+                    }
+                else:
+                    task['write_to'] = store.staging_name(task['output_file'])
+                    pending.append(task)
+
+            if jobs == 0:
+                jobs = os.cpu_count() or 1
+            jobs = max(1, min(jobs, len(pending) or 1))
+
+            logger.info(
+                f"開始產生客戶文件...（{len(pending)}/{len(tasks)} 個模板需重新產生，{jobs} 個工作行程）"
+            )
+
+            if jobs == 1:
+                fresh = [self.run_task(task, table) for task in pending]
+            else:
+                fresh = self._run_tasks_parallel(pending, ssot_data, jobs)
+
+            for task, result in zip(pending, fresh):
+                key = f"{task['kind']}:{task['template_name']}"
+                results_by_key[key] = result
+                receipt = result.pop('receipt', None)
+                staged = self.output_path / task['write_to']
+                if not (result['success'] and staged.exists()):
+                    store.discard(staged)
+                    continue
+                with span('publish', template=task['template_name']):
+                    record, changed = store.publish(key, staged, task['output_file'], table.get('version'),
+                                                    receipt=receipt)
+                result['digest'] = record['digest']
+                result['unchanged'] = not changed
+                if task['fingerprint'] is not None:
+                    manifest.record(key, task['fingerprint'], result['output'])
+            manifest.save()
+            store.save()
+
+            results = [results_by_key[f"{t['kind']}:{t['template_name']}"] for t in tasks]
+            self.last_results = results
+            self._log_summary(results)
             logger.info("所有文件產生完成！")
             return True
-            
+
         except Exception as e:
             logger.error(f"產生文件時發生錯誤: {e}")
             return False
+        finally:
+            self.close_office_pool()
+
+    def _run_tasks_parallel(self, tasks: List[Dict[str, Any]], ssot_data: Dict[str, Any],
+                            jobs: int) -> List[Dict[str, Any]]:
+        """以行程池平行執行任務；SSOT 於各工作行程初始化時傳入一次"""
+        results: Dict[int, Dict[str, Any]] = {}
+        tracer = current()
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(str(self.base_path), ssot_data, tracer is not None)
+        ) as pool:
+            futures = {pool.submit(_run_worker_task, task): idx for idx, task in enumerate(tasks)}
+            for future in as_completed(futures):
+                idx = futures[future]
+                try:
+                    results[idx] = future.result()
+                    if tracer is not None:
+                        tracer.merge(results[idx].pop('trace', None))
+                except Exception as e:
+                    task = tasks[idx]
+                    logger.error(f"{task['template_name']} 工作行程失敗: {e}")
+                    results[idx] = {
+                        'template': task['template_name'],
+                        'kind': task['kind'],
+                        'output': task['output_file'],
+                        'success': False,
+                        'skipped': False,
+                        'error': str(e),
+                        'elapsed': 0.0,
+                    }
+        return [results[idx] for idx in range(len(tasks))]
+
+    def _log_summary(self, results: List[Dict[str, Any]]):
+        for r in results:
+            if r.get('skipped'):
+                status = "略過（輸入未變更）"
+            elif r.get('unchanged'):
+                status = "成功（內容未變更）"
+            else:
+                status = "成功" if r['success'] else "失敗"
+            logger.info(f"  {r['template']:<30} {status}  {r['elapsed']:.2f}s")
+        failed = [r for r in results if not r['success']]
+        if failed:
+            logger.warning(f"{len(failed)}/{len(results)} 個模板產生失敗")
+
+
+# 行程池工作行程狀態（每個行程初始化一次）
+_worker_engine = None
+_worker_table = None
+_worker_tracer = None
+
+
+def _init_worker(base_path: str, ssot_data: Dict[str, Any], trace: bool = False):
+    global _worker_engine, _worker_table, _worker_tracer
+    _worker_engine = SpecSyncEngine(base_path)
+    _worker_table = SsotTable(ssot_data)
+    _worker_tracer = Tracer() if trace else None
+    # 工作行程結束時關閉其 Office 實例池（atexit 在 multiprocessing 子行程中不會執行）
+    Finalize(_worker_engine, _worker_engine.close_office_pool, exitpriority=10)
+
+
+def _run_worker_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    with activate(_worker_tracer):
+        result = _worker_engine.run_task(task, _worker_table)
+    if _worker_tracer is not None:
+        result['trace'] = _worker_tracer.drain()
+    return result
+
 
 def main():
     """主程式入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Spec Sync SSOT 文件自動產生引擎')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='平行填寫的工作行程數（0 = CPU 核心數，預設 1）')
+    parser.add_argument('--force', action='store_true',
+                        help='忽略建置清單，重新產生所有文件')
+    parser.add_argument('--only', nargs='+', metavar='TEMPLATE',
+                        help='只產生指定的模板（名稱或 word:名稱 / excel:名稱）')
+    add_trace_argument(parser)
+    args = parser.parse_args()
+
     engine = SpecSyncEngine()
-    
-    if engine.generate_all_documents():
+    tracer = Tracer() if args.trace else None
+    with activate(tracer):
+        ok = engine.generate_all_documents(jobs=args.jobs, force=args.force, only=args.only)
+    if tracer is not None:
+        report(tracer, args.trace)
+
+    if ok:
         print("✅ 文件產生成功！請檢查 output/ 資料夾")
         sys.exit(0)
     else:
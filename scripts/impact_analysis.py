@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - SSOT 變更影響分析
+
+由 customer_mapping.yaml 與模板中實際出現的 Token 建立反向索引：SSOT 路徑 → 使用它的
+（模板, 位置）。位置為 Word 的書籤 Token（例如 {ProductName}）或真正的書籤（Office 路徑
+直接填入，例如「書籤 ProductName」）、Excel 的「工作表!儲存格」，以及重複區域的 {別名[].欄位}。
+
+比較兩個 SSOT 版本（逐欄位的結構化差異），列出受影響的模板與位置，並可只重新產生這些模板：
+
+    python scripts/impact_analysis.py index
+    python scripts/impact_analysis.py diff HEAD~1:ssot/master.yaml ssot/master.yaml
+    python scripts/impact_analysis.py diff old.yaml --json output/impact.json --regenerate
+
+版本可為檔案（含分割目錄與 SQLite 來源）或 git 的「修訂:路徑」；該修訂中不存在的檔案視為空白。
+路徑以鍵為單位比對：變更 product 會影響使用 product.name 的位置，反之亦然；清單項目的
+新增、刪除或修改影響使用該清單欄位的重複區域。模板中的 Token 以串流方式掃描，結果依檔案
+大小與修改時間快取於 output/.cache/template_tokens.json；模板不存在或無法掃描時，
+對應表中該模板的所有欄位都視為有使用。
+"""
+
+import json
+import logging
+import subprocess
+import sys
+import time
+import zipfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from docx_text import extract_docx_text
+from mapping_plan import PathKey, TemplatePlan, format_path, load_compiled_mapping, parse_path
+from ssot_store import default_ssot_name, materialize, open_ssot
+from token_replacer import REPEAT_TOKEN_PATTERN, TOKEN_PATTERN
+from xlsx_package import inline_string_parts, read_shared_strings
+from yaml_cache import parse_yaml
+
+logger = logging.getLogger(__name__)
+
+REPORT_VERSION = 1
+TOKEN_CACHE_VERSION = 2
+TOKEN_CACHE_FILENAME = "template_tokens.json"
+# 掃描結果中的 Word 書籤名稱加上此前綴（Token 名稱不含 #），與 Token 區分
+BOOKMARK_PREFIX = "#"
+
+# 重複區域路徑中的 [] 可對應任一清單索引
+ANY_INDEX = None
+
+
+def consumer_keys(path: str) -> Tuple[Optional[PathKey], ...]:
+    """解析索引中的 SSOT 路徑：'a.list[].title' -> ('a', 'list', ANY_INDEX, 'title')"""
+    if "[]" not in path:
+        return parse_path(path)
+    list_path, field = path.split("[]", 1)
+    keys = parse_path(list_path) + (ANY_INDEX,)
+    if field.startswith("."):
+        keys += parse_path(field[1:])
+    elif field:
+        keys += parse_path("_" + field)[1:]
+    return keys
+
+
+def paths_overlap(consumer: Tuple[Optional[PathKey], ...], changed: Tuple[PathKey, ...]) -> bool:
+    """兩個路徑是否互為前綴（consumer 中的 ANY_INDEX 對應任一清單索引）"""
+    for c, k in zip(consumer, changed):
+        if c is ANY_INDEX:
+            if not isinstance(k, int):
+                return False
+        elif c != k:
+            return False
+    return True
+
+
+# ============================================================================
+# 模板 Token 掃描
+# ============================================================================
+
+def _template_text(path: Path, bookmarks: Set[str]) -> str:
+    if path.suffix.lower() == ".docx":
+        return extract_docx_text(path, bookmarks=bookmarks)
+    with zipfile.ZipFile(path, "r") as zf:
+        texts = read_shared_strings(zf)
+        texts.extend(zf.read(name).decode("utf-8") for name in inline_string_parts(zf))
+    return "\n".join(t for t in texts if t)
+
+
+def scan_template_tokens(path: Path) -> Set[str]:
+    """模板中出現的 Token 名稱（含 Word 拆成多個 run 的 Token 與 {別名[].欄位}），
+    以及加上 BOOKMARK_PREFIX 的 Word 書籤名稱
+    """
+    bookmarks: Set[str] = set()
+    text = _template_text(path, bookmarks)
+    tokens = {m.group(1) for m in TOKEN_PATTERN.finditer(text)}
+    tokens.update(m.group(1) for m in REPEAT_TOKEN_PATTERN.finditer(text))
+    tokens.update(BOOKMARK_PREFIX + name for name in bookmarks)
+    return tokens
+
+
+class TokenCache:
+    """模板 Token 掃描結果，依檔案大小與修改時間判斷是否需要重新掃描"""
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        if path is not None and path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                if data.get("version") == TOKEN_CACHE_VERSION:
+                    self.entries = data.get("templates", {})
+            except (OSError, ValueError) as e:
+                logger.debug(f"忽略無法讀取的 Token 快取 {path}: {e}")
+
+    def tokens(self, template: Path) -> Optional[Set[str]]:
+        """模板中的 Token；模板不存在或無法掃描時回傳 None"""
+        try:
+            stat = template.stat()
+        except OSError:
+            return None
+        key = str(template.resolve())
+        entry = self.entries.get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return set(entry["tokens"])
+        try:
+            tokens = scan_template_tokens(template)
+        except (OSError, KeyError, ValueError, SyntaxError, zipfile.BadZipFile) as e:
+            # ElementTree.ParseError 為 SyntaxError 子類別
+            logger.warning(f"無法掃描模板 {template.name}，視為使用對應表中所有欄位：{e}")
+            return None
+        self.entries[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "tokens": sorted(tokens)}
+        self._dirty = True
+        return tokens
+
+    def save(self):
+        if self.path is None or not self._dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"version": TOKEN_CACHE_VERSION, "templates": self.entries},
+                                      ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.debug(f"無法寫入 Token 快取 {self.path}: {e}")
+
+
+# ============================================================================
+# 反向索引
+# ============================================================================
+
+@dataclass(frozen=True)
+class Consumer:
+    """使用某個 SSOT 路徑的位置"""
+    template: str  # 'word:名稱' / 'excel:名稱'，與建置清單及輸出儲存區的鍵相同
+    path: str
+    location: str
+
+
+class ImpactIndex:
+    """SSOT 路徑 → 使用它的（模板, 位置）"""
+
+    def __init__(self, plans: List[TemplatePlan], consumers: List[Consumer]):
+        self.plans = {f"{p.kind}:{p.name}": p for p in plans}
+        self.consumers = consumers
+        # 依第一個鍵分組，比對變更時只需檢查同一頂層區塊
+        self._by_head: Dict[Any, List[Tuple[Tuple[Optional[PathKey], ...], Consumer]]] = {}
+        for consumer in consumers:
+            keys = consumer_keys(consumer.path)
+            self._by_head.setdefault(keys[0] if keys else None, []).append((keys, consumer))
+
+    def by_path(self) -> Dict[str, List[Consumer]]:
+        index: Dict[str, List[Consumer]] = {}
+        for consumer in self.consumers:
+            index.setdefault(consumer.path, []).append(consumer)
+        return index
+
+    def consumers_of(self, changed: Tuple[PathKey, ...]) -> List[Consumer]:
+        """受某個變更路徑影響的位置"""
+        if not changed:
+            return list(self.consumers)
+        return [c for keys, c in self._by_head.get(changed[0], []) if paths_overlap(keys, changed)]
+
+
+def _plan_consumers(plan: TemplatePlan, tokens: Optional[Set[str]]) -> List[Consumer]:
+    key = f"{plan.kind}:{plan.name}"
+    consumers = []
+    for f in plan.fields:
+        if plan.kind == 'excel':
+            consumers.append(Consumer(key, f.path, f"{plan.sheet_name}!{f.target}"))
+        elif tokens is None or f.target in tokens:
+            consumers.append(Consumer(key, f.path, f"{{{f.target}}}"))
+        elif BOOKMARK_PREFIX + f.target in tokens:
+            # Office 路徑直接填入同名書籤，模板中不需要 Token
+            consumers.append(Consumer(key, f.path, f"書籤 {f.target}"))
+    if tokens is None:
+        for alias, list_path in plan.lists.items():
+            consumers.append(Consumer(key, f"{list_path}[]", f"{{{alias}[]}}"))
+        return consumers
+    for token in sorted(tokens):
+        m = REPEAT_TOKEN_PATTERN.fullmatch(f"{{{token}}}")
+        if m and m.group('list') in plan.lists:
+            consumers.append(Consumer(key, f"{plan.lists[m.group('list')]}[]{m.group('field')}", f"{{{token}}}"))
+    return consumers
+
+
+def build_index(base_path: Path, mapping_file: str = "customer_mapping.yaml") -> ImpactIndex:
+    """由對應表與模板 Token 掃描建立反向索引"""
+    base_path = Path(base_path)
+    compiled = load_compiled_mapping(base_path / "mapping" / mapping_file)
+    cache = TokenCache(base_path / "output" / ".cache" / TOKEN_CACHE_FILENAME)
+    plans = compiled.templates()
+    consumers: List[Consumer] = []
+    for plan in plans:
+        template = base_path / "templates" / plan.template_file
+        consumers.extend(_plan_consumers(plan, cache.tokens(template)))
+    cache.save()
+    return ImpactIndex(plans, consumers)
+
+
+# ============================================================================
+# SSOT 結構化差異
+# ============================================================================
+
+def diff_ssot(old: Any, new: Any) -> List[Dict[str, Any]]:
+    """逐欄位比較兩個 SSOT 版本，回傳最深一層的差異 {path, change, old, new}
+
+    新增或刪除的區塊只列出該區塊本身；清單依索引比較。
+    """
+    changes: List[Dict[str, Any]] = []
+
+    def walk(a: Any, b: Any, keys: Tuple[PathKey, ...]):
+        if isinstance(a, dict) and isinstance(b, dict):
+            for k, v in a.items():
+                child = keys + (str(k),)
+                if k in b:
+                    walk(v, b[k], child)
+                else:
+                    changes.append({'path': format_path(child), 'change': 'removed', 'old': v, 'new': None})
+            for k, v in b.items():
+                if k not in a:
+                    changes.append({'path': format_path(keys + (str(k),)), 'change': 'added',
+                                    'old': None, 'new': v})
+        elif isinstance(a, list) and isinstance(b, list):
+            for i in range(max(len(a), len(b))):
+                if i >= len(a):
+                    changes.append({'path': format_path(keys + (i,)), 'change': 'added', 'old': None, 'new': b[i]})
+                elif i >= len(b):
+                    changes.append({'path': format_path(keys + (i,)), 'change': 'removed', 'old': a[i], 'new': None})
+                else:
+                    walk(a[i], b[i], keys + (i,))
+        elif type(a) is not type(b) or a != b:
+            # 1、1.0 與 True 填入文件後的文字不同，型別改變也視為修改
+            changes.append({'path': format_path(keys), 'change': 'modified', 'old': a, 'new': b})
+
+    walk({} if old is None else old, {} if new is None else new, ())
+    return changes
+
+
+def analyze(index: ImpactIndex, changes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """依差異列出受影響的模板與位置"""
+    affected: Dict[str, Dict[Tuple[str, str], List[str]]] = {}
+    for change in changes:
+        for consumer in index.consumers_of(parse_path(change['path']) if change['path'] else ()):
+            locations = affected.setdefault(consumer.template, {})
+            locations.setdefault((consumer.location, consumer.path), []).append(change['path'])
+
+    templates = []
+    for key, plan in index.plans.items():
+        if key not in affected:
+            continue
+        templates.append({
+            'key': key,
+            'template': plan.name,
+            'kind': plan.kind,
+            'file_path': plan.file_path,
+            'locations': [
+                {'location': location, 'path': path, 'changes': changed}
+                for (location, path), changed in affected[key].items()
+            ],
+        })
+    return {
+        'version': REPORT_VERSION,
+        'changes': changes,
+        'templates': templates,
+        'unaffected': [key for key in index.plans if key not in affected],
+    }
+
+
+# ============================================================================
+# SSOT 版本讀取
+# ============================================================================
+
+def load_revision(spec: str, base_path: Path = Path(".")) -> Any:
+    """讀取 SSOT 版本：檔案／分割目錄／SQLite 路徑，或 git 的「修訂:路徑」"""
+    path = Path(spec)
+    if not path.is_absolute():
+        path = base_path / path
+    if path.exists():
+        return materialize(open_ssot(path))
+    if ":" not in spec:
+        raise FileNotFoundError(f"SSOT 版本不存在: {spec}")
+    result = subprocess.run(["git", "show", spec], cwd=str(base_path), capture_output=True)
+    if result.returncode != 0:
+        logger.warning(f"git 中沒有 {spec}，視為空白：{result.stderr.decode('utf-8', 'replace').strip()}")
+        return {}
+    return parse_yaml(result.stdout) or {}
+
+
+# ============================================================================
+# 命令列
+# ============================================================================
+
+def _print_report(report: Dict[str, Any], total: int):
+    changes = report['changes']
+    print(f"SSOT 變更 {len(changes)} 個欄位，影響 {len(report['templates'])}/{total} 個模板")
+    for template in report['templates']:
+        print(f"  {template['key']}")
+        for loc in template['locations']:
+            print(f"    {loc['location']:<24} ← {', '.join(loc['changes'])}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='SSOT 變更影響分析')
+    parser.add_argument('--base', default='.', help='專案根目錄（預設為目前目錄）')
+    sub = parser.add_subparsers(dest='command', required=True)
+    index_cmd = sub.add_parser('index', help='列出 SSOT 路徑 → 使用它的模板與位置')
+    index_cmd.add_argument('--json', metavar='FILE', help='將索引寫入 JSON 檔案')
+    diff_cmd = sub.add_parser('diff', help='比較兩個 SSOT 版本並列出受影響的模板')
+    diff_cmd.add_argument('old', help='舊版本（檔案路徑或 git 修訂:路徑，例如 HEAD~1:ssot/master.yaml）')
+    diff_cmd.add_argument('new', nargs='?', help='新版本（預設為目前的 ssot/ 來源）')
+    diff_cmd.add_argument('--json', metavar='FILE', help='將影響報告寫入 JSON 檔案')
+    diff_cmd.add_argument('--regenerate', action='store_true', help='只重新產生受影響的模板')
+    diff_cmd.add_argument('--jobs', '-j', type=int, default=1, help='重新產生時的工作行程數')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    base = Path(args.base)
+    start = time.perf_counter()
+    index = build_index(base)
+
+    if args.command == 'index':
+        by_path = {path: [asdict(c) for c in consumers] for path, consumers in sorted(index.by_path().items())}
+        if args.json:
+            Path(args.json).write_text(json.dumps(by_path, ensure_ascii=False, indent=2), encoding='utf-8')
+        for path, consumers in by_path.items():
+            print(f"{path}: " + ", ".join(f"{c['template']} {c['location']}" for c in consumers))
+        return
+
+    new_spec = args.new or str(Path("ssot") / default_ssot_name())
+    report = analyze(index, diff_ssot(load_revision(args.old, base), load_revision(new_spec, base)))
+    elapsed = time.perf_counter() - start
+    _print_report(report, len(index.plans))
+    print(f"（分析耗時 {elapsed * 1000:.0f} ms）")
+    if args.json:
+        out = Path(args.json)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, ensure_ascii=False, indent=2, default=str), encoding='utf-8')
+
+    if args.regenerate:
+        keys = [t['key'] for t in report['templates']]
+        if not keys:
+            print("沒有需要重新產生的模板")
+            return
+        from generate_docs import SpecSyncEngine
+        ok = SpecSyncEngine(str(base)).generate_all_documents(jobs=args.jobs, only=keys)
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
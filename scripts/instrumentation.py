@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - 效能量測（選用）
+
+以 span 記錄產生／驗證各階段的耗時（載入 SSOT、開啟模板、展開重複列、替換 Token、存檔、
+Office 回退……），並累計計數器（Office／openpyxl 回退次數、讀取與寫入的位元組）。
+
+- 預設關閉：沒有啟用中的 Tracer 時，span() 回傳共用的空 context manager
+- 啟用範圍以 contextvars 區分，Web 後端同時執行的工作各自記錄
+- 平行產生時各工作行程的紀錄隨結果傳回主行程合併
+- 匯出為 Chrome trace（chrome://tracing、Perfetto 可開啟），並可列印各階段摘要表
+
+CLI 以 --trace [檔案] 或環境變數 SPEC_SYNC_TRACE=檔案路徑 啟用。
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_TRACE_FILE = "output/trace.json"
+
+_active: ContextVar[Optional["Tracer"]] = ContextVar("spec_sync_tracer", default=None)
+_NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    """收集 span（Chrome trace 的 complete event）與計數器"""
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **args) -> Iterator[None]:
+        ts = time.time_ns() // 1000
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            event = {
+                'name': name,
+                'ph': 'X',
+                'ts': ts,
+                'dur': (time.perf_counter_ns() - start) // 1000,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+            }
+            if args:
+                event['args'] = args
+            with self._lock:
+                self.events.append(event)
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def drain(self) -> Dict[str, Any]:
+        """取出並清空目前的紀錄（工作行程傳回主行程用）"""
+        with self._lock:
+            data = {'events': self.events, 'counters': self.counters}
+            self.events, self.counters = [], {}
+        return data
+
+    def merge(self, data: Optional[Dict[str, Any]]):
+        """合併 drain() 或 to_chrome_trace() 的結果"""
+        if not data:
+            return
+        events = data.get('events', data.get('traceEvents', []))
+        counters = data.get('counters', data.get('otherData', {}).get('counters', {}))
+        with self._lock:
+            self.events.extend(e for e in events if e.get('ph') == 'X')
+            for name, n in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self) -> Dict[str, Any]:
+        """各階段的次數／總耗時／最大耗時（毫秒），以及計數器"""
+        phases: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+        for event in events:
+            phase = phases.setdefault(event['name'], {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            ms = event['dur'] / 1000
+            phase['count'] += 1
+            phase['total_ms'] += ms
+            phase['max_ms'] = max(phase['max_ms'], ms)
+        for phase in phases.values():
+            phase['total_ms'] = round(phase['total_ms'], 3)
+            phase['max_ms'] = round(phase['max_ms'], 3)
+        return {'phases': phases, 'counters': counters}
+
+    def format_summary(self) -> str:
+        summary = self.summary()
+        lines = [f"{'階段':<24}{'次數':>8}{'總耗時(ms)':>14}{'最大(ms)':>12}"]
+        ordered = sorted(summary['phases'].items(), key=lambda item: -item[1]['total_ms'])
+        for name, phase in ordered:
+            lines.append(f"{name:<24}{phase['count']:>8}{phase['total_ms']:>14.1f}{phase['max_ms']:>12.1f}")
+        for name, n in sorted(summary['counters'].items()):
+            lines.append(f"{name:<24}{n:>8}")
+        return "\n".join(lines)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        with self._lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'counters': counters},
+        }
+
+    def write(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+
+
+def current() -> Optional[Tracer]:
+    return _active.get()
+
+
+@contextmanager
+def activate(tracer: Optional[Tracer]) -> Iterator[Optional[Tracer]]:
+    """在此範圍內啟用 tracer（None 代表關閉）"""
+    token = _active.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _active.reset(token)
+
+
+def span(name: str, **args):
+    """以目前啟用的 Tracer 記錄一個階段；未啟用時不做任何事"""
+    tracer = _active.get()
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, **args)
+
+
+def count(name: str, n: int = 1):
+    tracer = _active.get()
+    if tracer is not None:
+        tracer.count(name, n)
+
+
+def count_file_bytes(name: str, path: Path):
+    """累計檔案大小（bytes_read / bytes_written）"""
+    tracer = _active.get()
+    if tracer is not None:
+        try:
+            tracer.count(name, os.path.getsize(path))
+        except OSError:
+            pass
+
+
+def trace_path_from_env() -> Optional[str]:
+    return os.getenv("SPEC_SYNC_TRACE") or None
+
+
+def add_trace_argument(parser):
+    """CLI 共用的 --trace 參數"""
+    parser.add_argument('--trace', nargs='?', const=DEFAULT_TRACE_FILE, default=trace_path_from_env(),
+                        metavar='FILE',
+                        help=f'記錄各階段耗時並輸出 Chrome trace（預設 {DEFAULT_TRACE_FILE}）')
+
+
+def report(tracer: Tracer, path: str):
+    """寫出 trace 檔並列印摘要表"""
+    tracer.write(Path(path))
+    print(tracer.format_summary())
+    print(f"Trace 已寫入 {path}")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - 編譯後的欄位對應（Compiled Mapping）
+
+generate / validate / export 與 Web 後端共用的 SSOT 路徑存取層：
+- parse_path: 將 "a.b[0].c" 解析為 ('a', 'b', 0, 'c')，結果快取，不再每次 split
+- SsotTable: 將 SSOT 一次扁平化為 路徑 → 值 對照表（含清單索引，例如
+  specifications.functional_requirements[0].title）；延遲載入的儲存區（ssot_store）
+  則逐路徑查詢並快取結果，不預先扁平化
+- CompiledMapping: 將 customer_mapping.yaml 一次解析為每個模板的填寫計畫（TemplatePlan）
+
+編譯結果以檔案內容雜湊快取，同一行程內重複載入不需重新解析。
+"""
+
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from yaml_cache import load_yaml_bytes
+
+logger = logging.getLogger(__name__)
+
+PathKey = Union[str, int]
+
+_SEGMENT = re.compile(r"([^\[\]]+)((?:\[\d+\])*)")
+_INDEX = re.compile(r"\[(\d+)\]")
+_MISSING = object()
+
+_warned_paths = set()
+
+
+@lru_cache(maxsize=8192)
+def parse_path(path: str) -> Tuple[PathKey, ...]:
+    """解析點分隔路徑，支援清單索引：'a.b[0].c' -> ('a', 'b', 0, 'c')"""
+    keys: List[PathKey] = []
+    for segment in path.split('.'):
+        m = _SEGMENT.fullmatch(segment)
+        if m is None:
+            # 非標準格式（例如鍵名本身含括號）視為一般鍵
+            keys.append(segment)
+            continue
+        keys.append(m.group(1))
+        keys.extend(int(i) for i in _INDEX.findall(m.group(2)))
+    return tuple(keys)
+
+
+def format_path(keys: Tuple[PathKey, ...]) -> str:
+    """parse_path 的反向操作：('a', 'b', 0, 'c') -> 'a.b[0].c'"""
+    out = ""
+    for key in keys:
+        if isinstance(key, int):
+            out += f"[{key}]"
+        else:
+            out = f"{out}.{key}" if out else key
+    return out
+
+
+def resolve_keys(data: Any, keys: Tuple[PathKey, ...]) -> Any:
+    """依已解析的鍵序列取值；找不到時回傳 None"""
+    cur = data
+    for key in keys:
+        if isinstance(key, int):
+            if not isinstance(cur, (list, tuple)) or not -len(cur) <= key < len(cur):
+                return None
+            cur = cur[key]
+        else:
+            try:
+                cur = cur[key]
+            except (KeyError, TypeError, IndexError):
+                return None
+    return cur
+
+
+def get_nested_value(data: Any, path: str) -> Any:
+    """從巢狀資料中取得值 (例如: product.name -> data['product']['name'])"""
+    if getattr(data, 'lazy', False):
+        return data.lookup(path)
+    return resolve_keys(data, parse_path(path))
+
+
+def warn_missing(path: str):
+    """同一路徑在行程內只警告一次"""
+    if path not in _warned_paths:
+        _warned_paths.add(path)
+        logger.warning(f"找不到欄位: {path}")
+
+
+def flatten_ssot(data: Any) -> Dict[str, Any]:
+    """將 SSOT 扁平化為 路徑 → 值（中間節點與清單項目皆列入）"""
+    flat: Dict[str, Any] = {}
+
+    def walk(node: Any, prefix: str):
+        if isinstance(node, dict):
+            for k, v in node.items():
+                path = f"{prefix}.{k}" if prefix else str(k)
+                flat[path] = v
+                walk(v, path)
+        elif isinstance(node, list) and prefix:
+            for i, v in enumerate(node):
+                path = f"{prefix}[{i}]"
+                flat[path] = v
+                walk(v, path)
+
+    walk(data, "")
+    return flat
+
+
+class SsotTable:
+    """SSOT 路徑 → 值 對照表（扁平化一次，之後每次查詢 O(1)）"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.lazy = getattr(data, 'lazy', False)
+        self.paths = {} if self.lazy else flatten_ssot(data or {})
+
+    def get(self, path: str) -> Any:
+        value = self.paths.get(path, _MISSING)
+        if value is _MISSING:
+            # 非標準寫法（例如多餘空白）時退回逐層取值
+            value = get_nested_value(self.data, path)
+            if self.lazy:
+                self.paths[path] = value
+        return value
+
+    def __contains__(self, path: str) -> bool:
+        return self.get(path) is not None
+
+
+class TokenValues:
+    """以 SSOT 路徑作為 Token 名稱的延遲查詢，例如模板中的 {product.name}"""
+
+    def __init__(self, table: SsotTable):
+        self.table = table
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        value = self.table.get(key)
+        return default if value is None else str(value)
+
+
+@dataclass(frozen=True)
+class FieldAccessor:
+    """單一對應欄位：SSOT 路徑 → 模板目標（書籤或儲存格）"""
+    path: str
+    target: str
+
+
+@dataclass
+class TemplatePlan:
+    """單一模板的填寫計畫"""
+    name: str
+    kind: str  # 'word' | 'excel'
+    file_path: str
+    sheet_name: Optional[str] = None
+    fields: List[FieldAccessor] = field(default_factory=list)
+    # 重複區域的清單：模板中 {別名[].欄位} 的別名 → SSOT 清單路徑
+    lists: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def template_file(self) -> str:
+        return self.file_path.replace('templates/', '')
+
+    @property
+    def mappings(self) -> Dict[str, str]:
+        return {f.path: f.target for f in self.fields}
+
+    def resolve(self, table: SsotTable) -> List[Tuple[FieldAccessor, Any]]:
+        """解析每個欄位的值（找不到時為 None，並只警告一次）"""
+        resolved = []
+        for f in self.fields:
+            value = table.get(f.path)
+            if value is None:
+                warn_missing(f.path)
+            resolved.append((f, value))
+        return resolved
+
+    def token_values(self, table: SsotTable) -> Dict[str, str]:
+        """目標 → 字串值（同一目標以第一個有值的欄位為準），供 Token 替換使用"""
+        values: Dict[str, str] = {}
+        for f, value in self.resolve(table):
+            if value is not None and f.target not in values:
+                values[f.target] = str(value)
+        return values
+
+
+class CompiledMapping:
+    """customer_mapping.yaml 編譯結果"""
+
+    SECTIONS = (('word', 'word_mappings'), ('excel', 'excel_mappings'))
+
+    def __init__(self, mapping_config: Dict[str, Any]):
+        self.config = mapping_config or {}
+        self.plans: Dict[Tuple[str, str], TemplatePlan] = {}
+        for kind, section in self.SECTIONS:
+            for name, cfg in (self.config.get(section) or {}).items():
+                self.plans[(kind, name)] = TemplatePlan(
+                    name=name,
+                    kind=kind,
+                    file_path=cfg['file_path'],
+                    sheet_name=cfg.get('sheet_name', 'Sheet1') if kind == 'excel' else None,
+                    fields=[
+                        FieldAccessor(path=p, target=t)
+                        for p, t in (cfg.get('mappings') or {}).items()
+                    ],
+                    lists=dict(cfg.get('lists') or {}),
+                )
+
+    def templates(self, kind: Optional[str] = None) -> List[TemplatePlan]:
+        return [p for (k, _), p in self.plans.items() if kind is None or k == kind]
+
+    def get(self, kind: str, name: str) -> Optional[TemplatePlan]:
+        return self.plans.get((kind, name))
+
+
+_compiled_cache: Dict[Tuple[str, str], CompiledMapping] = {}
+
+
+def load_compiled_mapping(path: Path) -> CompiledMapping:
+    """載入並編譯對應表；以 (路徑, 內容雜湊) 快取，檔案未變時直接重用"""
+    raw = Path(path).read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    key = (str(Path(path).resolve()), digest)
+    compiled = _compiled_cache.get(key)
+    if compiled is None:
+        compiled = CompiledMapping(load_yaml_bytes(raw, Path(path), digest))
+        _compiled_cache[key] = compiled
+    return compiled
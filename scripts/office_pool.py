@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - Office COM 應用程式池
+
+Office 模式原本每份文件都 Dispatch 一個新的 Word/Excel 再 Quit()，
+光是啟動應用程式就要數秒。本模組在整批處理期間保留 N 個已啟動的
+Word/Excel 實例重複使用：
+- 取用時做健康檢查，失效的實例會被丟棄並重新建立
+- 每個實例處理 K 份文件後回收（Quit 後重建），避免長時間執行的記憶體累積
+- 後端可抽換：ComBackend（win32com）或 FakeComBackend（可在 Linux 測試池邏輯）
+
+環境變數：
+- SPEC_SYNC_OFFICE_POOL_SIZE：每種應用程式的實例上限（預設 1）
+- SPEC_SYNC_OFFICE_RECYCLE：每個實例處理幾份文件後回收（預設 50）
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class OfficeUnavailable(Exception):
+    """找不到可用的 Office COM 介面"""
+
+
+class ComBackend:
+    """win32com 後端"""
+
+    PROG_IDS = {
+        # Microsoft Word / Kingsoft WPS
+        'word': ["Word.Application", "kwps.Application", "wps.Application"],
+        'excel': ["Excel.Application"],
+    }
+
+    def __init__(self, client):
+        self.client = client
+
+    def create(self, kind: str):
+        for pid in self.PROG_IDS[kind]:
+            try:
+                app = self.client.Dispatch(pid)
+            except Exception:
+                continue
+            logger.info(f"使用 COM 程式：{pid}")
+            app.Visible = False
+            return app
+        raise OfficeUnavailable(f"找不到可用的 {kind} COM 介面")
+
+    def is_healthy(self, kind: str, app) -> bool:
+        try:
+            if kind == 'word':
+                app.Documents.Count
+            else:
+                app.Workbooks.Count
+            return True
+        except Exception:
+            return False
+
+    def close(self, kind: str, app):
+        app.Quit()
+
+
+class FakeApp:
+    """模擬的 Office 應用程式（供測試與效能基準使用）"""
+
+    def __init__(self, kind: str, serial: int):
+        self.kind = kind
+        self.serial = serial
+        self.alive = True
+        self.Visible = False
+
+
+class FakeComBackend:
+    """行程內的假 COM 後端：以 startup_delay 模擬應用程式啟動成本"""
+
+    def __init__(self, startup_delay: float = 0.0):
+        self.startup_delay = startup_delay
+        self.created: List[FakeApp] = []
+        self.closed: List[FakeApp] = []
+        self._lock = threading.Lock()
+
+    def create(self, kind: str) -> FakeApp:
+        if self.startup_delay:
+            time.sleep(self.startup_delay)
+        with self._lock:
+            app = FakeApp(kind, len(self.created))
+            self.created.append(app)
+        return app
+
+    def is_healthy(self, kind: str, app: FakeApp) -> bool:
+        return app.alive
+
+    def close(self, kind: str, app: FakeApp):
+        app.alive = False
+        with self._lock:
+            self.closed.append(app)
+
+
+class _PooledApp:
+    def __init__(self, app):
+        self.app = app
+        self.uses = 0
+
+
+class OfficeAppPool:
+    """保留已啟動的 Word/Excel 實例供整批文件重複使用"""
+
+    def __init__(self, backend, size: Optional[int] = None, recycle_after: Optional[int] = None):
+        self.backend = backend
+        self.size = max(1, size or int(os.getenv("SPEC_SYNC_OFFICE_POOL_SIZE", "1")))
+        self.recycle_after = max(1, recycle_after or int(os.getenv("SPEC_SYNC_OFFICE_RECYCLE", "50")))
+        self._cond = threading.Condition()
+        self._idle: Dict[str, List[_PooledApp]] = {}
+        self._active: Dict[str, int] = {}
+        self.stats = {'created': 0, 'recycled': 0, 'discarded': 0, 'documents': 0}
+
+    def _acquire(self, kind: str) -> _PooledApp:
+        with self._cond:
+            while True:
+                idle = self._idle.setdefault(kind, [])
+                while idle:
+                    entry = idle.pop()
+                    if self.backend.is_healthy(kind, entry.app):
+                        self._active[kind] = self._active.get(kind, 0) + 1
+                        return entry
+                    logger.warning(f"{kind} 實例已失效，將重新建立")
+                    self.stats['discarded'] += 1
+                    self._safe_close(kind, entry)
+                if self._active.get(kind, 0) < self.size:
+                    self._active[kind] = self._active.get(kind, 0) + 1
+                    break
+                self._cond.wait()
+        # 啟動應用程式耗時，於鎖外進行
+        try:
+            app = self.backend.create(kind)
+        except BaseException:
+            with self._cond:
+                self._active[kind] -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.stats['created'] += 1
+        return _PooledApp(app)
+
+    def _release(self, kind: str, entry: _PooledApp, failed: bool):
+        entry.uses += 1
+        discard = False
+        if failed and not self.backend.is_healthy(kind, entry.app):
+            discard = True
+            self.stats['discarded'] += 1
+        elif entry.uses >= self.recycle_after:
+            discard = True
+            self.stats['recycled'] += 1
+        if discard:
+            self._safe_close(kind, entry)
+        with self._cond:
+            self.stats['documents'] += 1
+            self._active[kind] -= 1
+            if not discard:
+                self._idle.setdefault(kind, []).append(entry)
+            self._cond.notify()
+
+    def _safe_close(self, kind: str, entry: _PooledApp):
+        try:
+            self.backend.close(kind, entry.app)
+        except Exception as e:
+            logger.debug(f"關閉 {kind} 實例失敗：{e}")
+
+    @contextmanager
+    def session(self, kind: str):
+        """取得一個 'word' 或 'excel' 實例；離開時歸還（或依規則回收）"""
+        entry = self._acquire(kind)
+        failed = False
+        try:
+            yield entry.app
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._release(kind, entry, failed)
+
+    def close_all(self):
+        """結束所有閒置實例（批次結束時呼叫）"""
+        with self._cond:
+            idle = self._idle
+            self._idle = {}
+        for kind, entries in idle.items():
+            for entry in entries:
+                self._safe_close(kind, entry)
+        if self.stats['created']:
+            logger.info(
+                f"Office 實例池：建立 {self.stats['created']} 個、處理 {self.stats['documents']} 份文件、"
+                f"回收 {self.stats['recycled']} 個、丟棄 {self.stats['discarded']} 個"
+            )
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - 內容定址的輸出儲存區
+
+產生的文件依內容雜湊只保存一份（output/.store/objects/），並以索引
+（output/.store/index.json）記錄每個模板的輸出歷程（雜湊、輸出檔名、SSOT 版本、時間）：
+- 重新產生但內容相同時，物件與 output/ 下的輸出檔都不會重寫
+- 「模板 X 的最新輸出」直接查索引，不需掃描 output/ 並比較 mtime
+- output/ 下的 {模板}_{日期}.docx 為物件的複本（不使用硬連結，就地編輯輸出檔不會改到物件）
+
+docx/xlsx 的雜湊以各 part 的名稱與壓縮後的資料位元組計算（不解壓），不受 zip 時間戳影響。
+物件旁另存填寫收據（{雜湊}.receipt.json，見 fill_receipt），驗證時不需重新解析文件。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from build_manifest import hash_file
+from package_writer import raw_data_offset
+
+logger = logging.getLogger(__name__)
+
+STORE_DIRNAME = ".store"
+INDEX_VERSION = 2
+HISTORY_LIMIT = 50
+RECEIPT_SUFFIX = ".receipt.json"
+DIGEST_CHUNK = 1 << 20
+
+
+def artifact_digest(path: Path) -> str:
+    """輸出檔的內容雜湊；zip 套件依序雜湊各 part 的名稱與資料位元組（略過含時間戳的標頭）
+
+    資料以壓縮後的位元組雜湊，不需解壓；無法定位原始資料（Zip64 等）的 part 改為解壓後雜湊。
+    """
+    try:
+        with zipfile.ZipFile(path, 'r') as zf:
+            h = hashlib.sha256(b"ooxml\0")
+            for info in sorted(zf.infolist(), key=lambda i: i.filename):
+                offset = raw_data_offset(zf, info)
+                h.update(f"{info.filename}\0{info.compress_type}\0{offset is None}\n".encode('utf-8'))
+                if offset is None:
+                    with zf.open(info) as part:
+                        while chunk := part.read(DIGEST_CHUNK):
+                            h.update(chunk)
+                    continue
+                zf.fp.seek(offset)
+                remaining = info.compress_size
+                while remaining:
+                    chunk = zf.fp.read(min(DIGEST_CHUNK, remaining))
+                    if not chunk:
+                        raise zipfile.BadZipFile(f"{info.filename} 內容不完整")
+                    h.update(chunk)
+                    remaining -= len(chunk)
+            return h.hexdigest()
+    except zipfile.BadZipFile:
+        return hash_file(path)
+
+
+class OutputStore:
+    """output/.store：物件（依雜湊）與各模板的輸出索引"""
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.root = self.output_dir / STORE_DIRNAME
+        self.objects_dir = self.root / "objects"
+        self.staging_dir = self.root / "tmp"
+        self.index_path = self.root / "index.json"
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"輸出索引無法讀取，將重新建立: {e}")
+            return
+        if data.get('version') != INDEX_VERSION:
+            logger.info("輸出索引版本不同，將重新建立")
+            return
+        self.entries = data.get('templates', {})
+
+    def save(self):
+        if not self._dirty:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'templates': self.entries},
+                      f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp, self.index_path)
+        self._dirty = False
+
+    # ------------------------------------------------------------------
+    # 寫入
+    # ------------------------------------------------------------------
+
+    def staging_name(self, output_file: str) -> str:
+        """產生時暫存的檔名（相對於 output/），由 publish 移入儲存區"""
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        return f"{STORE_DIRNAME}/tmp/{os.getpid()}-{output_file}"
+
+    def object_path(self, digest: str, suffix: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}{suffix}"
+
+    def _copy_output(self, obj: Path, public: Path, digest: str) -> bool:
+        """將物件複製為 output/ 下的輸出檔；內容已相同時不動，回傳是否有寫入
+
+        不使用硬連結：輸出檔被就地編輯時物件會跟著改變，之後的比對也無從察覺。
+        """
+        if public.exists():
+            try:
+                if artifact_digest(public) == digest:
+                    return False
+            except OSError:
+                pass
+        tmp = public.with_name(f".{public.name}.{os.getpid()}.tmp")
+        tmp.unlink(missing_ok=True)
+        shutil.copyfile(obj, tmp)
+        os.replace(tmp, public)
+        return True
+
+    def publish(self, key: str, staged: Path, output_file: str,
+                ssot_version: Optional[str] = None,
+                receipt: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], bool]:
+        """將暫存的輸出移入儲存區並更新索引，回傳 (紀錄, 內容是否有變更)"""
+        staged = Path(staged)
+        digest = artifact_digest(staged)
+        obj = self.object_path(digest, Path(output_file).suffix)
+        if obj.exists():
+            staged.unlink()
+        else:
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(staged, obj)
+        if receipt is not None:
+            self._write_receipt(digest, receipt)
+        self._copy_output(obj, self.output_dir / output_file, digest)
+
+        entry = self.entries.setdefault(key, {'history': []})
+        latest = entry.get('latest')
+        if latest and latest['digest'] == digest and latest['output'] == output_file:
+            return latest, False
+        record = {
+            'digest': digest,
+            'output': output_file,
+            'ssot_version': None if ssot_version is None else str(ssot_version),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'size': obj.stat().st_size,
+        }
+        changed = latest is None or latest['digest'] != digest
+        entry['latest'] = record
+        entry['history'] = [record] + entry['history'][:HISTORY_LIMIT - 1]
+        self._dirty = True
+        return record, changed
+
+    def _write_receipt(self, digest: str, receipt: Dict[str, Any]):
+        path = self.object_path(digest, RECEIPT_SUFFIX)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        # json.dumps 使用 C 編碼器；json.dump 直接寫檔會逐段以 Python 編碼
+        tmp.write_text(json.dumps(receipt, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def discard(self, staged: Path):
+        Path(staged).unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+
+    def latest(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        return entry.get('latest') if entry else None
+
+    def history(self, key: str) -> List[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        return list(entry['history']) if entry else []
+
+    def latest_path(self, key: str) -> Optional[Path]:
+        """最新輸出的路徑：output/ 下的輸出檔，已被刪除時使用物件"""
+        record = self.latest(key)
+        if record is None:
+            return None
+        public = self.output_dir / record['output']
+        if public.exists():
+            return public
+        obj = self.object_path(record['digest'], Path(record['output']).suffix)
+        return obj if obj.exists() else None
+
+    def receipt(self, digest: str) -> Optional[Dict[str, Any]]:
+        """物件的填寫收據；沒有收據（Office 等路徑產生）時回傳 None"""
+        try:
+            with open(self.object_path(digest, RECEIPT_SUFFIX), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"填寫收據無法讀取: {e}")
+            return None
+
+    # ------------------------------------------------------------------
+    # 清理
+    # ------------------------------------------------------------------
+
+    def gc(self) -> int:
+        """刪除索引歷程不再引用的物件與殘留的暫存檔，回傳刪除數量"""
+        referenced = set()
+        for entry in self.entries.values():
+            for r in entry.get('history', []):
+                referenced.add(self.object_path(r['digest'], Path(r['output']).suffix))
+                referenced.add(self.object_path(r['digest'], RECEIPT_SUFFIX))
+        removed = 0
+        if self.objects_dir.exists():
+            for obj in self.objects_dir.glob("*/*"):
+                if obj not in referenced:
+                    obj.unlink()
+                    removed += 1
+        if self.staging_dir.exists():
+            for tmp in self.staging_dir.iterdir():
+                tmp.unlink()
+                removed += 1
+        return removed
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='輸出儲存區查詢與清理')
+    parser.add_argument('--output', default='output', help='輸出目錄（預設 output）')
+    sub = parser.add_subparsers(dest='command', required=True)
+    latest = sub.add_parser('latest', help='列出模板的最新輸出')
+    latest.add_argument('key', nargs='?', help='例如 word:customer_template_1；省略時列出全部')
+    sub.add_parser('gc', help='刪除不再引用的物件')
+    args = parser.parse_args()
+
+    store = OutputStore(Path(args.output))
+    if args.command == 'gc':
+        print(f"已刪除 {store.gc()} 個檔案")
+        return
+    keys = [args.key] if args.key else sorted(store.entries)
+    for key in keys:
+        record = store.latest(key)
+        if record is None:
+            print(f"{key}: （沒有紀錄）")
+            continue
+        print(f"{key}: {record['output']}  SSOT {record['ssot_version'] or '-'}  "
+              f"{record['created']}  {record['digest'][:12]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - OOXML 套件（docx/xlsx zip）寫出工具
+
+只替換有修改的 part；其餘 zip 項目（圖片、字型、OLE 物件等）直接複製壓縮後的原始位元組，
+不解壓也不重新壓縮，輸出大小與內容與模板相同。修改過的 part 以 deflate 壓縮，
+壓縮等級可由參數或環境變數 SPEC_SYNC_DEFLATE_LEVEL（0-9）指定。
+
+原樣複製需要 zipfile 的內部介面（_strip_extra、ZipFile._writecheck、ZipInfo.FileHeader
+與 filelist / NameToInfo / start_dir）；匯入時檢查，缺少時改用一般的解壓後重新壓縮寫入。
+"""
+
+import io
+import logging
+import os
+import shutil
+import struct
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 1024 * 1024
+DEFLATE_LEVEL_ENV = "SPEC_SYNC_DEFLATE_LEVEL"
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_LOCAL_SIGNATURE = b"PK\x03\x04"
+_FLAG_DATA_DESCRIPTOR = 0x08
+
+
+def _raw_copy_supported() -> bool:
+    """目前的 Python 是否提供原始複製所需的 zipfile 內部介面"""
+    if not callable(getattr(zipfile, '_strip_extra', None)):
+        return False
+    if not callable(getattr(zipfile.ZipFile, '_writecheck', None)):
+        return False
+    if not callable(getattr(zipfile.ZipInfo, 'FileHeader', None)):
+        return False
+    try:
+        with zipfile.ZipFile(io.BytesIO(), 'w') as probe:
+            return (isinstance(getattr(probe, 'filelist', None), list)
+                    and isinstance(getattr(probe, 'NameToInfo', None), dict)
+                    and isinstance(getattr(probe, 'start_dir', None), int))
+    except Exception:
+        return False
+
+
+RAW_COPY_SUPPORTED = _raw_copy_supported()
+if not RAW_COPY_SUPPORTED:
+    logger.info("zipfile 不提供原始複製所需的內部介面，未修改的項目將重新壓縮寫出")
+
+
+def deflate_level(level: Optional[int] = None) -> Optional[int]:
+    """修改過的 part 使用的壓縮等級；None 為 zlib 預設值"""
+    if level is not None:
+        return level
+    env = os.getenv(DEFLATE_LEVEL_ENV)
+    if not env:
+        return None
+    try:
+        level = int(env)
+    except ValueError:
+        level = -1
+    if not 0 <= level <= 9:
+        logger.warning(f"{DEFLATE_LEVEL_ENV} 必須為 0-9，改用預設壓縮等級: {env}")
+        return None
+    return level
+
+
+def _clone_info(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    clone = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    clone.compress_type = info.compress_type
+    clone.external_attr = info.external_attr
+    clone.internal_attr = info.internal_attr
+    clone.create_system = info.create_system
+    clone.file_size = info.file_size
+    return clone
+
+
+def raw_data_offset(zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> Optional[int]:
+    """項目壓縮後資料在 zip 檔中的起點；Zip64 或本地標頭不符時回傳 None"""
+    limit = zipfile.ZIP64_LIMIT
+    if info.file_size >= limit or info.compress_size >= limit or info.header_offset >= limit:
+        return None
+    zf.fp.seek(info.header_offset)
+    header = zf.fp.read(_LOCAL_HEADER.size)
+    if len(header) != _LOCAL_HEADER.size or header[:4] != _LOCAL_SIGNATURE:
+        return None
+    name_length, extra_length = _LOCAL_HEADER.unpack(header)[-2:]
+    return info.header_offset + _LOCAL_HEADER.size + name_length + extra_length
+
+
+def _raw_copy(zin: zipfile.ZipFile, zout: zipfile.ZipFile, info: zipfile.ZipInfo) -> bool:
+    """以壓縮後的原始位元組複製單一項目；無法安全複製（Zip64、標頭不符、zipfile 不支援）時回傳 False"""
+    if not RAW_COPY_SUPPORTED:
+        return False
+    offset = raw_data_offset(zin, info)
+    if offset is None:
+        return False
+    zin.fp.seek(offset)
+
+    clone = _clone_info(info)
+    clone.CRC = info.CRC
+    clone.compress_size = info.compress_size
+    # 大小與 CRC 直接寫在本地標頭，不需要 data descriptor
+    clone.flag_bits = info.flag_bits & ~_FLAG_DATA_DESCRIPTOR
+    # 中央目錄的 Zip64 額外欄位不適用於本地標頭
+    clone.extra = zipfile._strip_extra(info.extra, (1,))
+    zout._writecheck(clone)
+    clone.header_offset = zout.fp.tell()
+    zout.fp.write(clone.FileHeader(False))
+    remaining = info.compress_size
+    while remaining:
+        chunk = zin.fp.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"{info.filename} 內容不完整")
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+    zout.filelist.append(clone)
+    zout.NameToInfo[clone.filename] = clone
+    zout.start_dir = zout.fp.tell()
+    return True
+
+
+def write_package(src_path: Path, dst_path: Path, replacements: Dict[str, bytes],
+                  compresslevel: Optional[int] = None, omit: Iterable[str] = ()):
+    """複製 src 套件到 dst，replacements 中的 part 以新內容取代，omit 中的 part 不寫出"""
+    level = deflate_level(compresslevel)
+    omit = set(omit)
+    try:
+        with zipfile.ZipFile(src_path, 'r') as zin, zipfile.ZipFile(dst_path, 'w') as zout:
+            for info in zin.infolist():
+                if info.filename in omit:
+                    continue
+                if info.filename in replacements:
+                    clone = _clone_info(info)
+                    clone.compress_type = zipfile.ZIP_DEFLATED
+                    zout.writestr(clone, replacements[info.filename], compresslevel=level)
+                    continue
+                if _raw_copy(zin, zout, info):
+                    continue
+                clone = _clone_info(info)
+                with zin.open(info) as src, zout.open(clone, 'w') as dst:
+                    shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+    except BaseException:
+        Path(dst_path).unlink(missing_ok=True)
+        raise
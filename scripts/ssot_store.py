@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - 延遲載入的 SSOT 儲存區
+
+需求、測試案例等清單成長到數萬列時，不必每次都載入整份 master.yaml：
+- 分割目錄（例如 ssot/master.d/）：每個頂層區塊一個 YAML 檔，子目錄代表再分割的區塊，
+  _root.yaml 存放不分割的純量欄位；區塊在第一次存取時才載入
+- SQLite 資料庫（例如 ssot/master.db）：每個節點一列並以路徑建立索引，
+  查詢單一欄位只讀取該列，查詢區塊時只讀取其子樹
+
+兩者皆為唯讀的 Mapping，可直接交給 get_nested_value / SsotTable（逐路徑查詢，不預先扁平化）；
+需要完整資料時使用 materialize()。以環境變數 SPEC_SYNC_SSOT 指定 ssot/ 下要使用的來源。
+
+轉換：
+    python scripts/ssot_store.py split ssot/master.yaml ssot/master.d --depth 2
+    python scripts/ssot_store.py sqlite ssot/master.yaml ssot/master.db
+"""
+
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from abc import ABCMeta, abstractmethod
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import yaml
+
+from mapping_plan import format_path, parse_path, resolve_keys
+from yaml_cache import load_yaml
+
+logger = logging.getLogger(__name__)
+
+SSOT_ENV = "SPEC_SYNC_SSOT"
+DEFAULT_SSOT = "master.yaml"
+ROOT_SHARD = "_root.yaml"
+YAML_SUFFIXES = (".yaml", ".yml")
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+SQLITE_SCHEMA_VERSION = 1
+
+
+def default_ssot_name() -> str:
+    """ssot/ 下預設使用的來源（檔案或分割目錄）"""
+    return os.getenv(SSOT_ENV) or DEFAULT_SSOT
+
+
+def materialize(data: Any) -> Any:
+    """將儲存區（含巢狀的分割目錄）轉為一般 dict；一般資料原樣回傳"""
+    if isinstance(data, SsotStore):
+        return data.to_dict()
+    return data
+
+
+class SsotStore(Mapping, metaclass=ABCMeta):
+    """延遲載入的 SSOT：頂層區塊在第一次存取時載入並快取"""
+
+    # SsotTable / get_nested_value 依此改為逐路徑查詢
+    lazy = True
+
+    def __init__(self):
+        self._key_order: Optional[List[str]] = None
+        self._sections: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    @abstractmethod
+    def _list_keys(self) -> List[str]:
+        """頂層鍵（依原始順序）"""
+
+    @abstractmethod
+    def _load_section(self, key: str) -> Any:
+        """載入單一頂層區塊"""
+
+    def _keys(self) -> List[str]:
+        with self._lock:
+            if self._key_order is None:
+                self._key_order = self._list_keys()
+            return self._key_order
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            if key not in self._sections:
+                if key not in self._keys():
+                    raise KeyError(key)
+                self._sections[key] = self._load_section(key)
+                logger.debug(f"載入 SSOT 區塊: {key}")
+            return self._sections[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys()
+
+    @property
+    def loaded_sections(self) -> List[str]:
+        return list(self._sections)
+
+    def lookup(self, path: str) -> Any:
+        """與 get_nested_value 相同的點分隔路徑查詢，只載入路徑經過的區塊"""
+        return materialize(resolve_keys(self, parse_path(path)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: materialize(self[key]) for key in self}
+
+    def __getstate__(self):
+        # 傳給工作行程時只傳來源位置，各行程自行延遲載入需要的區塊
+        state = self.__dict__.copy()
+        state['_key_order'] = None
+        state['_sections'] = {}
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+
+# ============================================================================
+# 分割目錄
+# ============================================================================
+
+class ShardedSsotStore(SsotStore):
+    """分割目錄：_root.yaml 的鍵在前，其餘區塊依檔名排序"""
+
+    def __init__(self, directory: Path):
+        super().__init__()
+        self.directory = Path(directory)
+        self._root: Optional[Dict[str, Any]] = None
+        self._entries: Dict[str, Path] = {}
+
+    def _list_keys(self) -> List[str]:
+        if not self.directory.is_dir():
+            raise FileNotFoundError(f"SSOT 分割目錄不存在: {self.directory}")
+        root_file = self.directory / ROOT_SHARD
+        self._root = (load_yaml(root_file) or {}) if root_file.exists() else {}
+        if not isinstance(self._root, dict):
+            raise ValueError(f"{root_file} 必須是對照表")
+        self._entries = {}
+        for entry in sorted(self.directory.iterdir()):
+            if entry.name.startswith(('.', '_')):
+                continue
+            if entry.is_dir():
+                key = entry.name
+            elif entry.suffix.lower() in YAML_SUFFIXES:
+                key = entry.stem
+            else:
+                continue
+            if key in self._root or key in self._entries:
+                raise ValueError(f"SSOT 區塊重複定義: {entry}")
+            self._entries[key] = entry
+        return list(self._root) + list(self._entries)
+
+    def _load_section(self, key: str) -> Any:
+        if key in self._root:
+            return self._root[key]
+        entry = self._entries[key]
+        if entry.is_dir():
+            return ShardedSsotStore(entry)
+        return load_yaml(entry)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['_root'] = None
+        state['_entries'] = {}
+        return state
+
+
+def write_sharded(data: Dict[str, Any], directory: Path, depth: int = 1) -> Path:
+    """將 SSOT 分割為目錄；depth > 1 時非空的對照表區塊再分割為子目錄"""
+    directory = Path(directory)
+    if directory.exists() and any(directory.iterdir()):
+        raise FileExistsError(f"目的目錄不是空的: {directory}")
+    directory.mkdir(parents=True, exist_ok=True)
+
+    def dump(value: Any, path: Path):
+        with open(path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(value, f, allow_unicode=True, sort_keys=False)
+
+    root = {}
+    for key, value in (data or {}).items():
+        name = str(key)
+        if not isinstance(value, (dict, list)) or name.startswith(('.', '_')) or '/' in name:
+            root[key] = value
+        elif isinstance(value, dict) and value and depth > 1:
+            write_sharded(value, directory / name, depth - 1)
+        else:
+            dump(value, directory / f"{name}.yaml")
+    if root:
+        dump(root, directory / ROOT_SHARD)
+    return directory
+
+
+# ============================================================================
+# SQLite
+# ============================================================================
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE nodes (
+    seq INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    parent TEXT NOT NULL,
+    key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT
+);
+CREATE INDEX nodes_parent ON nodes (parent, seq);
+"""
+
+
+def _encode_value(value: Any) -> Tuple[str, Optional[str]]:
+    if isinstance(value, dict):
+        return 'dict', None
+    if isinstance(value, list):
+        return 'list', None
+    if isinstance(value, datetime.datetime):
+        return 'datetime', value.isoformat()
+    if isinstance(value, datetime.date):
+        return 'date', value.isoformat()
+    return 'json', json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _decode_value(kind: str, value: Optional[str]) -> Any:
+    if kind == 'dict':
+        return {}
+    if kind == 'list':
+        return []
+    if kind == 'datetime':
+        return datetime.datetime.fromisoformat(value)
+    if kind == 'date':
+        return datetime.date.fromisoformat(value)
+    return json.loads(value)
+
+
+class SqliteSsotStore(SsotStore):
+    """SQLite 儲存區：nodes 表每個節點一列（依原始順序編號），以路徑查詢"""
+
+    def __init__(self, db_path: Path):
+        super().__init__()
+        self.db_path = Path(db_path)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if not self.db_path.exists():
+                raise FileNotFoundError(f"SSOT 資料庫不存在: {self.db_path}")
+            uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            if row is None or int(row[0]) != SQLITE_SCHEMA_VERSION:
+                conn.close()
+                raise ValueError(f"不支援的 SSOT 資料庫版本: {self.db_path}")
+            self._conn = conn
+        return self._conn
+
+    def _list_keys(self) -> List[str]:
+        rows = self._connection().execute(
+            "SELECT key FROM nodes WHERE parent = '' ORDER BY seq"
+        ).fetchall()
+        return [key for (key,) in rows]
+
+    def _subtree(self, path: str, container: Any) -> Any:
+        """以路徑範圍查詢（path. 與 path[ 開頭）重建子樹"""
+        rows = self._connection().execute(
+            "SELECT path, parent, key, kind, value FROM nodes"
+            " WHERE (path > ? AND path < ?) OR (path > ? AND path < ?) ORDER BY seq",
+            (path + '.', path + '/', path + '[', path + '\\'),
+        ).fetchall()
+        nodes = {path: container}
+        for node_path, parent, key, kind, value in rows:
+            node = _decode_value(kind, value)
+            target = nodes[parent]
+            if isinstance(target, list):
+                target.append(node)
+            else:
+                target[key] = node
+            if kind in ('dict', 'list'):
+                nodes[node_path] = node
+        return container
+
+    def _load_path(self, path: str) -> Any:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT kind, value FROM nodes WHERE path = ?", (path,)
+            ).fetchone()
+            if row is None:
+                return None
+            node = _decode_value(*row)
+            if isinstance(node, (dict, list)):
+                self._subtree(path, node)
+            return node
+
+    def _load_section(self, key: str) -> Any:
+        return self._load_path(key)
+
+    def lookup(self, path: str) -> Any:
+        keys = parse_path(path)
+        if not keys:
+            return None
+        if keys[0] in self._sections:
+            return resolve_keys(self, keys)
+        # 區塊尚未載入時直接以索引查詢該節點，不載入整個區塊
+        return self._load_path(format_path(keys))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['_conn'] = None
+        return state
+
+
+def write_sqlite(data: Dict[str, Any], db_path: Path) -> Path:
+    """將 SSOT 寫入 SQLite（整檔重建後原子替換）"""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = db_path.with_name(f"{db_path.name}.{os.getpid()}.tmp")
+    if tmp.exists():
+        tmp.unlink()
+
+    def walk(node: Any, prefix: str):
+        if isinstance(node, dict):
+            children = ((f"{prefix}.{k}" if prefix else str(k), str(k), v) for k, v in node.items())
+        else:
+            children = ((f"{prefix}[{i}]", str(i), v) for i, v in enumerate(node))
+        for path, key, value in children:
+            kind, encoded = _encode_value(value)
+            yield path, prefix, key, kind, encoded
+            if kind in ('dict', 'list'):
+                yield from walk(value, path)
+
+    conn = sqlite3.connect(str(tmp))
+    try:
+        conn.executescript(_SCHEMA)
+        conn.execute("INSERT INTO meta VALUES ('schema_version', ?)", (str(SQLITE_SCHEMA_VERSION),))
+        conn.executemany(
+            "INSERT INTO nodes (path, parent, key, kind, value) VALUES (?, ?, ?, ?, ?)",
+            walk(data or {}, ""),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, db_path)
+    return db_path
+
+
+# ============================================================================
+# 載入
+# ============================================================================
+
+def open_ssot(path: Path) -> Union[Dict[str, Any], SsotStore]:
+    """依來源類型開啟 SSOT：目錄與 SQLite 為延遲載入，YAML / JSON 整檔載入"""
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"SSOT 檔案不存在: {path}")
+    if path.is_dir():
+        return ShardedSsotStore(path)
+    suffix = path.suffix.lower()
+    if suffix in SQLITE_SUFFIXES:
+        return SqliteSsotStore(path)
+    if suffix in YAML_SUFFIXES:
+        return load_yaml(path)
+    if suffix == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    raise ValueError(f"不支援的 SSOT 檔案格式: {suffix}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='SSOT 分割 / 轉換為 SQLite')
+    sub = parser.add_subparsers(dest='command', required=True)
+    split = sub.add_parser('split', help='分割為每個區塊一個 YAML 檔的目錄')
+    split.add_argument('source')
+    split.add_argument('dest')
+    split.add_argument('--depth', type=int, default=1, help='再分割的層數（預設 1：只分割頂層區塊）')
+    to_db = sub.add_parser('sqlite', help='轉換為 SQLite 資料庫')
+    to_db.add_argument('source')
+    to_db.add_argument('dest')
+    args = parser.parse_args()
+
+    data = materialize(open_ssot(Path(args.source)))
+    if args.command == 'split':
+        try:
+            out = write_sharded(data, Path(args.dest), depth=args.depth)
+        except FileExistsError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    else:
+        out = write_sqlite(data, Path(args.dest))
+    print(f"✅ 已輸出：{out}")
+    print(f"   使用方式：設定環境變數 {SSOT_ENV}={out.name}（位於 ssot/ 目錄下時）")
+
+
+if __name__ == "__main__":
+    main()
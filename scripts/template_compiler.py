@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - 模板預編譯快取
+
+客戶模板很少變動，但每次填寫都要重新解壓、解析整份 XML 再序列化。本模組將模板
+編譯一次成「填寫計畫」，之後只需把值拼接進預先序列化好的位元組片段：
+
+- Word：word/document.xml 解析一次，Token（含被 Word 拆成多個 run 的 Token）合併到
+  第一個 run 並換成插槽，整份 XML 序列化為「原樣位元組片段＋插槽」；含 {清單[].欄位}
+  的表格列／段落另存三種版本（原樣、第一份、其後的複本），填寫時依清單項目重複輸出
+- Excel：記錄哪些工作表含 inline string，Token 替換時不需逐一掃描每張工作表
+- 計畫以 marshal 格式快取於 output/.cache/templates/，以模板內容 SHA-256 為鍵；
+  行程內另依檔案 mtime/大小保留，未變更時連雜湊都不需重算
+- 快取位置：模板位於專案的 templates/ 目錄時為同層的 output/.cache/templates，
+  或以環境變數 SPEC_SYNC_TEMPLATE_CACHE 指定；設為 "off" 則只保留在記憶體
+
+無法安全預編譯的模板（巢狀的重複區域等）拋出 CompileUnsupported，由呼叫端改用完整解析。
+"""
+
+import copy
+import hashlib
+import logging
+import marshal
+import os
+import re
+import threading
+import zipfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from build_manifest import hash_file
+from token_replacer import (
+    REPEAT_TOKEN_PATTERN,
+    TOKEN_PATTERN,
+    W_NS,
+    RepeatValues,
+    as_list,
+    enclosing_table,
+    find_repeat_units,
+    group_text_nodes,
+    new_report,
+    paragraph_of,
+    repeat_list_path,
+    replace_in_nodes,
+    strip_clone_ids,
+)
+
+logger = logging.getLogger(__name__)
+
+PLAN_VERSION = 2
+CACHE_ENV = "SPEC_SYNC_TEMPLATE_CACHE"
+DOCX_BODY_PART = "word/document.xml"
+_W_P = f"{{{W_NS}}}p"
+_W_TR = f"{{{W_NS}}}tr"
+
+# 插槽標記使用私用區字元（合法的 XML 字元，模板中幾乎不會出現）
+_SLOT_OPEN = "\ue000"
+_SLOT_CLOSE = "\ue001"
+_MARK_RE = re.compile(
+    _SLOT_OPEN.encode("utf-8") + rb"(\d+)" + _SLOT_CLOSE.encode("utf-8")
+    + rb"|<!--ss:(\d+):(orig|first|clone|end)-->"
+)
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+class CompileUnsupported(Exception):
+    """模板無法預編譯，需改用完整解析"""
+
+
+# ============================================================================
+# 編譯
+# ============================================================================
+
+class _SlotAllocator:
+    """replace_in_texts 的值來源：每個 Token 換成插槽標記，並記錄插槽種類與名稱"""
+
+    def __init__(self, slots: List[Tuple[str, str]], index: Dict[Tuple[str, str], int], kind: str):
+        self.slots = slots
+        self.index = index
+        self.kind = kind
+
+    def get(self, key: str, default=None) -> str:
+        slot = self.index.get((self.kind, key))
+        if slot is None:
+            slot = self.index[(self.kind, key)] = len(self.slots)
+            self.slots.append((self.kind, key))
+        return f"{_SLOT_OPEN}{slot}{_SLOT_CLOSE}"
+
+
+def _split_segments(xml: bytes, units: List[Dict[str, Any]]) -> List[Any]:
+    """序列化後的 XML 切成片段：bytes 為原樣內容、int 為插槽、('u', n) 為重複區域"""
+    top: List[Any] = []
+    target = top
+    pos = 0
+    for m in _MARK_RE.finditer(xml):
+        if m.start() > pos:
+            target.append(xml[pos:m.start()])
+        pos = m.end()
+        if m.group(1) is not None:
+            target.append(int(m.group(1)))
+            continue
+        n, variant = int(m.group(2)), m.group(3).decode("ascii")
+        if variant == "end":
+            top.append(("u", n))
+            target = top
+        else:
+            target = units[n][variant] = []
+    if pos < len(xml):
+        target.append(xml[pos:])
+    return top
+
+
+def compile_docx_xml(xml: bytes) -> Dict[str, Any]:
+    """編譯 document.xml，回傳 {segments, slots, units}"""
+    from lxml import etree  # type: ignore
+
+    if _SLOT_OPEN.encode("utf-8") in xml or b"<!--ss:" in xml:
+        raise CompileUnsupported("模板含保留的標記字元")
+    root = etree.fromstring(xml)
+
+    found = find_repeat_units(root)
+    for unit in found:
+        if any(ancestor in found for ancestor in unit.iterancestors()):
+            raise CompileUnsupported("重複區域巢狀於另一個重複區域中")
+
+    units: List[Dict[str, Any]] = []
+    repeat_paragraphs = set()
+    # 所有列都是重複列的表格：清單為空時整個表格需移除，交給完整解析處理
+    only_repeat_rows = {}
+    for unit in found:
+        table = enclosing_table(unit) if unit.tag == _W_TR else None
+        if table is not None and table not in only_repeat_rows:
+            only_repeat_rows[table] = all(
+                row in found for row in table.iter(_W_TR) if enclosing_table(row) is table
+            )
+    for n, (unit, names) in enumerate(found.items()):
+        first = strip_clone_ids(copy.deepcopy(unit), drop_bookmarks=False)
+        clone = strip_clone_ids(copy.deepcopy(unit), drop_bookmarks=True)
+        first.tail = clone.tail = None
+        parent = unit.getparent()
+        pos = parent.index(unit)
+        parent.insert(pos, etree.Comment(f"ss:{n}:orig"))
+        markers = [etree.Comment(f"ss:{n}:first"), first, etree.Comment(f"ss:{n}:clone"), clone,
+                   etree.Comment(f"ss:{n}:end")]
+        for offset, node in enumerate(markers):
+            parent.insert(pos + 2 + offset, node)
+        for variant in (first, clone):
+            repeat_paragraphs.update(variant.iter(_W_P))
+        table = enclosing_table(unit) if unit.tag == _W_TR else None
+        units.append({'names': names, 'whole_table': bool(table is not None and only_repeat_rows[table])})
+
+    slots: List[Tuple[str, str]] = []
+    index: Dict[Tuple[str, str], int] = {}
+    report = new_report()
+    for nodes in group_text_nodes(root):
+        if paragraph_of(nodes[0]) in repeat_paragraphs:
+            replace_in_nodes(nodes, _SlotAllocator(slots, index, 'r'), report, REPEAT_TOKEN_PATTERN)
+        replace_in_nodes(nodes, _SlotAllocator(slots, index, 't'), report, TOKEN_PATTERN)
+
+    serialized = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    segments = _split_segments(serialized, units)
+    return {'segments': segments, 'slots': slots, 'units': units}
+
+
+def compile_template(path: Path) -> Dict[str, Any]:
+    """編譯單一模板（.docx / .xlsx）"""
+    path = Path(path)
+    ext = path.suffix.lower()
+    try:
+        with zipfile.ZipFile(path, "r") as zf:
+            if ext == ".docx":
+                plan = compile_docx_xml(zf.read(DOCX_BODY_PART))
+                plan['kind'] = 'docx'
+            elif ext == ".xlsx":
+                from xlsx_package import inline_string_parts
+                plan = {'kind': 'xlsx', 'inline_parts': inline_string_parts(zf)}
+            else:
+                raise CompileUnsupported(f"不支援的檔案類型: {ext}")
+    except (zipfile.BadZipFile, KeyError, SyntaxError) as e:
+        # lxml 的 XMLSyntaxError 為 SyntaxError 子類別
+        raise CompileUnsupported(f"無法解析模板: {e}")
+    plan['version'] = PLAN_VERSION
+    return plan
+
+
+# ============================================================================
+# 快取
+# ============================================================================
+
+def default_cache_dir(path: Path) -> Optional[Path]:
+    env = os.getenv(CACHE_ENV)
+    if env:
+        return None if env.lower() in ("off", "0", "false") else Path(env)
+    for parent in Path(path).resolve().parents:
+        if parent.name == "templates":
+            return parent.parent / "output" / ".cache" / "templates"
+    return None
+
+
+def _cache_prefix(path: Path) -> str:
+    location = hashlib.sha256(str(Path(path).resolve()).encode("utf-8")).hexdigest()[:8]
+    return f"{Path(path).stem}-{location}"
+
+
+def _read_plan(cache_file: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(cache_file, "rb") as f:
+            plan = marshal.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, TypeError) as e:
+        logger.debug(f"模板計畫快取無法讀取，將重新編譯: {e}")
+        return None
+    return plan if isinstance(plan, dict) and plan.get('version') == PLAN_VERSION else None
+
+
+def _write_plan(cache_file: Path, path: Path, plan: Dict[str, Any]):
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(marshal.dumps(plan))
+        os.replace(tmp, cache_file)
+        for old in cache_file.parent.glob(f"{_cache_prefix(path)}-*.marshal"):
+            if old != cache_file:
+                old.unlink()
+    except (OSError, ValueError) as e:
+        logger.debug(f"寫入模板計畫快取失敗: {e}")
+
+
+_memory: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+_memory_lock = threading.Lock()
+
+
+def load_plan(path: Path, cache_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """取得模板的填寫計畫（記憶體 → 磁碟快取 → 編譯）；無法預編譯時拋出 CompileUnsupported"""
+    path = Path(path)
+    st = os.stat(path)
+    signature = (st.st_mtime_ns, st.st_size)
+    key = str(path.resolve())
+    with _memory_lock:
+        hit = _memory.get(key)
+    if hit is not None and hit[0] == signature:
+        plan = hit[1]
+    else:
+        cache_dir = cache_dir if cache_dir is not None else default_cache_dir(path)
+        cache_file = None
+        plan = None
+        if cache_dir is not None:
+            cache_file = Path(cache_dir) / f"{_cache_prefix(path)}-{hash_file(path)[:24]}.v{PLAN_VERSION}.marshal"
+            plan = _read_plan(cache_file)
+        if plan is None:
+            try:
+                plan = compile_template(path)
+            except CompileUnsupported as e:
+                plan = {'version': PLAN_VERSION, 'kind': 'unsupported', 'reason': str(e)}
+            if cache_file is not None:
+                _write_plan(cache_file, path, plan)
+        with _memory_lock:
+            _memory[key] = (signature, plan)
+    if plan['kind'] == 'unsupported':
+        raise CompileUnsupported(plan['reason'])
+    return plan
+
+
+# ============================================================================
+# 填寫
+# ============================================================================
+
+def _xml_text(value: str) -> bytes:
+    if _ILLEGAL_XML_CHARS.search(value):
+        raise ValueError("All strings must be XML compatible")
+    return escape(value).encode("utf-8")
+
+
+def render_docx(plan: Dict[str, Any], values: Mapping[str, str],
+                resolve: Optional[Callable[[str], Any]] = None,
+                report: Optional[Dict[str, Any]] = None,
+                fills: Optional[List[Dict[str, Any]]] = None) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+    """依計畫填入值，回傳 (統計, {part: 新內容})；統計與完整解析路徑相同
+
+    提供 fills 時記錄每個一般 Token 填入的位置（part 內的位元組位移與長度）與值。
+    """
+    if report is None:
+        report = new_report()
+    resolve = resolve or (lambda path: None)
+    slots = plan['slots']
+    units = plan['units']
+    lists: Dict[str, Optional[List[Any]]] = {}
+    out: List[bytes] = []
+    filled: List[Tuple[str, str, int]] = []
+    if units:
+        rows = report.setdefault("rows", {})
+
+    def emit_slot(slot: int, source: Mapping[str, str]):
+        kind, key = slots[slot]
+        report["tokens"].add(key)
+        value = source.get(key)
+        if value is None:
+            report["missing"].add(key)
+            out.append(_xml_text(f"{{{key}}}"))
+            return
+        report["replaced"][key] = value
+        report["count"] += 1
+        if fills is not None and kind == 't':
+            filled.append((key, value, len(out)))
+        out.append(_xml_text(value))
+
+    def emit(segments: List[Any], repeat: Optional[Mapping[str, str]] = None):
+        for seg in segments:
+            if type(seg) is bytes:
+                out.append(seg)
+            elif type(seg) is int:
+                emit_slot(seg, repeat if slots[seg][0] == 'r' else values)
+            else:
+                emit_unit(units[seg[1]])
+
+    def emit_unit(unit: Dict[str, Any]):
+        names = unit['names']
+        report["tokens"].update(names)
+        paths = list(dict.fromkeys(repeat_list_path(n) for n in names))
+        for path in paths:
+            if path not in lists:
+                lists[path] = as_list(resolve(path))
+        items = lists[paths[0]]
+        if items is None:
+            report["missing"].update(n for n in names if lists[repeat_list_path(n)] is None)
+            emit(unit['orig'])
+            return
+        if not items and unit.get('whole_table'):
+            raise ValueError("空清單可能移除表格的所有列，需以完整解析移除表格")
+        for i in range(len(items)):
+            emit(unit['first'] if i == 0 else unit['clone'], RepeatValues(lists, i))
+        rows[paths[0]] = rows.get(paths[0], 0) + len(items)
+
+    emit(plan['segments'])
+    if filled:
+        # 片段索引換算為位元組位移（只在需要時計算一次）
+        chunks = iter(filled)
+        key, value, at = next(chunks)
+        offset = 0
+        for i, chunk in enumerate(out):
+            while i == at:
+                fills.append({'token': key, 'part': DOCX_BODY_PART, 'offset': offset,
+                              'length': len(chunk), 'value': value})
+                key, value, at = next(chunks, (None, None, -1))
+            if at < 0:
+                break
+            offset += len(chunk)
+    return report, {DOCX_BODY_PART: b"".join(out)}
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='預編譯模板（建立填寫計畫快取）')
+    parser.add_argument('templates', nargs='*', default=['templates'], help='模板檔案或目錄（預設 templates/）')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    files: List[Path] = []
+    for item in map(Path, args.templates):
+        files.extend(sorted(item.glob('*.docx')) + sorted(item.glob('*.xlsx')) if item.is_dir() else [item])
+    for file in files:
+        start = time.perf_counter()
+        try:
+            plan = load_plan(file)
+        except CompileUnsupported as e:
+            logger.info(f"{file.name}: 無法預編譯（{e}）")
+            continue
+        detail = f"{len(plan['slots'])} 個插槽、{len(plan['units'])} 個重複區域" if plan['kind'] == 'docx' \
+            else f"{len(plan['inline_parts'])} 張含 inline string 的工作表"
+        logger.info(f"{file.name}: {detail}（{(time.perf_counter() - start) * 1000:.1f} ms）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - Word Token 單次替換引擎
+
+一次走訪文件 XML，將所有 {Token} 依預先建立的 token → 值 對照表替換。
+
+- 只走訪一次 w:t 節點，依所屬段落分組，段落與表格（含巢狀表格、文字方塊）一併處理
+- 以單一編譯後的 Regex 找出所有 Token，與對應表大小無關
+- 直接修改 w:t 文字，保留各 run 的格式；Token 被 Word 拆成多個 run 時亦可正確替換
+- 重複區域：含 {清單[].欄位} 的表格列（不在表格中時為段落）依清單項目一次複製插入
+"""
+
+import copy
+import re
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set
+
+from mapping_plan import parse_path, resolve_keys
+
+# Token 名稱可含 SSOT 清單索引，例如 {specifications.functional_requirements[0].title}
+TOKEN_PATTERN = re.compile(r"\{([A-Za-z0-9_.-]+(?:\[\d+\][A-Za-z0-9_.-]*)*)\}")
+
+# 重複區域 Token：{清單路徑[].欄位}，例如 {specifications.functional_requirements[].title}；
+# 省略欄位（{project.team_members[]}）時為項目本身
+REPEAT_TOKEN_PATTERN = re.compile(
+    r"\{((?P<list>[A-Za-z0-9_.-]+(?:\[\d+\][A-Za-z0-9_.-]*)*)\[\](?P<field>(?:\.[A-Za-z0-9_-]+|\[\d+\])*))\}"
+)
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W_P = f"{{{W_NS}}}p"
+_W_T = f"{{{W_NS}}}t"
+_W_TR = f"{{{W_NS}}}tr"
+_W_TBL = f"{{{W_NS}}}tbl"
+_W_TC = f"{{{W_NS}}}tc"
+_W_BOOKMARK_START = f"{{{W_NS}}}bookmarkStart"
+_W_BOOKMARK_END = f"{{{W_NS}}}bookmarkEnd"
+_W14_IDS = (
+    "{http://schemas.microsoft.com/office/word/2010/wordml}paraId",
+    "{http://schemas.microsoft.com/office/word/2010/wordml}textId",
+)
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+
+def paragraph_of(node):
+    parent = node.getparent()
+    while parent is not None and parent.tag != _W_P:
+        parent = parent.getparent()
+    return parent
+
+
+def group_text_nodes(root) -> List[List[Any]]:
+    """單次走訪，將 w:t 節點依最近的 w:p 祖先分組（保持文件順序）"""
+    groups: Dict[Any, List[Any]] = {}
+    for t in root.iter(_W_T):
+        groups.setdefault(paragraph_of(t), []).append(t)
+    return list(groups.values())
+
+
+def replace_in_texts(texts: List[str], values: Mapping[str, str],
+                     report: Dict[str, Any], pattern=TOKEN_PATTERN) -> Set[int]:
+    """替換依序相連的文字片段（例如同一段落的多個 run）中的 Token
+
+    直接修改 texts，回傳有變動的片段索引；Token 跨越多個片段時，
+    值寫入第一個片段，其餘片段移除對應字元。
+    """
+    full = "".join(texts)
+    if "{" not in full:
+        return set()
+    matches = list(pattern.finditer(full))
+    if not matches:
+        return set()
+
+    offsets = []
+    pos = 0
+    for text in texts:
+        offsets.append(pos)
+        pos += len(text)
+
+    def node_at(char_pos: int) -> int:
+        # 二分搜尋字元位置所在的片段（略過空字串片段）
+        lo, hi = 0, len(offsets) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if offsets[mid] <= char_pos:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    touched: Set[int] = set()
+    # 由後往前替換，前面 Token 的位移不受影響
+    for m in reversed(matches):
+        key = m.group(1)
+        report["tokens"].add(key)
+        value = values.get(key)
+        if value is None:
+            report["missing"].add(key)
+            continue
+        start, end = m.span()
+        i = node_at(start)
+        j = node_at(end - 1)
+        head = texts[i][:start - offsets[i]]
+        if i == j:
+            texts[i] = head + value + texts[i][end - offsets[i]:]
+        else:
+            texts[i] = head + value
+            for k in range(i + 1, j):
+                texts[k] = ""
+            texts[j] = texts[j][end - offsets[j]:]
+            touched.update(range(i + 1, j + 1))
+        touched.add(i)
+        report["replaced"][key] = value
+        report["count"] += 1
+    return touched
+
+
+def replace_in_nodes(nodes: List[Any], values: Mapping[str, str], report: Dict[str, Any],
+                      pattern=TOKEN_PATTERN):
+    texts = [t.text or "" for t in nodes]
+    for k in replace_in_texts(texts, values, report, pattern):
+        nodes[k].text = texts[k]
+        nodes[k].set(_XML_SPACE, "preserve")
+
+
+def new_report() -> Dict[str, Any]:
+    return {"tokens": set(), "missing": set(), "replaced": {}, "count": 0}
+
+
+def replace_tokens_in_element(root, values: Mapping[str, str],
+                              report: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """替換 root 之下所有段落中的 Token，回傳 tokens/missing/replaced/count 統計"""
+    if report is None:
+        report = new_report()
+    for nodes in group_text_nodes(root):
+        replace_in_nodes(nodes, values, report)
+    return report
+
+
+def replace_tokens_in_document(doc, values: Mapping[str, str]) -> Dict[str, Any]:
+    """替換 python-docx Document 本文（段落與表格）中的 Token"""
+    return replace_tokens_in_element(doc.element.body, values)
+
+
+# ============================================================================
+# 重複區域（清單展開）
+# ============================================================================
+
+def repeat_list_path(token: str) -> str:
+    """'a.items[].title' -> 'a.items'"""
+    return token.split("[]", 1)[0]
+
+
+def as_list(value: Any) -> Optional[List[Any]]:
+    """清單值；None（找不到）維持 None，其他非清單值視為單一項目"""
+    if value is None or isinstance(value, list):
+        return value
+    if isinstance(value, tuple):
+        return list(value)
+    return [value]
+
+
+def repeat_value(items: List[Any], index: int, token: str) -> Any:
+    """清單第 index 個項目中 Token 指定的欄位值（超出範圍或找不到時為 None）"""
+    if index >= len(items):
+        return None
+    field = token.split("[]", 1)[1].lstrip(".")
+    return resolve_keys(items[index], parse_path(field)) if field else items[index]
+
+
+class RepeatValues:
+    """重複區域第 index 列的 Token 值；清單找不到時回傳 None（Token 保留並列為缺少）"""
+
+    def __init__(self, lists: Mapping[str, Optional[List[Any]]], index: int):
+        self.lists = lists
+        self.index = index
+
+    def get(self, token: str, default: Optional[str] = None) -> Optional[str]:
+        items = self.lists.get(repeat_list_path(token))
+        if items is None:
+            return default
+        value = repeat_value(items, self.index, token)
+        return "" if value is None else str(value)
+
+
+def repeat_unit(paragraph):
+    """重複的單位：段落所在的表格列，不在表格中時為段落本身"""
+    node = paragraph
+    while node is not None:
+        if node.tag == _W_TR:
+            return node
+        node = node.getparent()
+    return paragraph
+
+
+def enclosing_table(node):
+    """node 所屬的最近一層表格（不在表格中時為 None）"""
+    while node is not None and node.tag != _W_TBL:
+        node = node.getparent()
+    return node
+
+
+def remove_table_if_empty(table):
+    """沒有任何列的表格 Word 視為損毀：整個移除，所在儲存格至少保留一個段落"""
+    if table is None or next(table.iter(_W_TR), None) is not None:
+        return
+    container = table.getparent()
+    container.remove(table)
+    if container.tag == _W_TC and container.find(_W_P) is None:
+        container.append(container.makeelement(_W_P, {}))
+
+
+def strip_clone_ids(unit, drop_bookmarks: bool):
+    """複本不可重複 Word 段落識別碼；第二份起的複本亦移除書籤"""
+    for el in unit.iter():
+        for attr in _W14_IDS:
+            if attr in el.attrib:
+                del el.attrib[attr]
+    if drop_bookmarks:
+        for el in list(unit.iter(_W_BOOKMARK_START, _W_BOOKMARK_END)):
+            el.getparent().remove(el)
+    return unit
+
+
+def _clone_unit(unit, count: int, lists: Mapping[str, Optional[List[Any]]],
+                report: Dict[str, Any]) -> int:
+    """以 unit 為範本建立 count 份複本，一次取代原本的範本"""
+    # 範本中含重複 Token 的段落（以 w:t 在 unit 中的順序表示，複本順序相同）
+    groups: Dict[Any, List[int]] = {}
+    for k, t in enumerate(unit.iter(_W_T)):
+        groups.setdefault(paragraph_of(t), []).append(k)
+    template_nodes = list(unit.iter(_W_T))
+    groups_with_tokens = [
+        idxs for idxs in groups.values()
+        if "[]" in "".join(template_nodes[k].text or "" for k in idxs)
+    ]
+
+    clones = []
+    for i in range(count):
+        clone = copy.deepcopy(unit)
+        nodes = list(clone.iter(_W_T))
+        values = RepeatValues(lists, i)
+        for idxs in groups_with_tokens:
+            replace_in_nodes([nodes[k] for k in idxs], values, report, REPEAT_TOKEN_PATTERN)
+        clones.append(strip_clone_ids(clone, drop_bookmarks=i > 0))
+
+    parent = unit.getparent()
+    pos = parent.index(unit)
+    parent[pos:pos + 1] = clones
+    if not clones and unit.tag == _W_TR:
+        remove_table_if_empty(enclosing_table(parent))
+    return count
+
+
+def find_repeat_units(root) -> Dict[Any, List[str]]:
+    """含 {清單[].欄位} 的重複單位（表格列／段落）→ 其中的重複 Token（文件順序）"""
+    units: Dict[Any, List[str]] = {}
+    # 大部分文件沒有重複區域：先以單純的字元檢查略過分組
+    if not any("[" in (t.text or "") for t in root.iter(_W_T)):
+        return units
+    for nodes in group_text_nodes(root):
+        text = "".join(t.text or "" for t in nodes)
+        if "[]" not in text:
+            continue
+        names = [m.group(1) for m in REPEAT_TOKEN_PATTERN.finditer(text)]
+        if names:
+            units.setdefault(repeat_unit(paragraph_of(nodes[0])), []).extend(names)
+    return units
+
+
+def expand_repeating_regions(root, resolve: Callable[[str], Any],
+                             report: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """展開 root 之下含 {清單[].欄位} 的表格列／段落
+
+    resolve(清單路徑) 回傳清單（找不到時為 None，範本原樣保留並列為缺少）；
+    同一列中第一個清單的項目數決定複製的列數，空清單時移除範本列
+    （表格因此沒有任何列時整個表格一併移除）。
+    統計加入 report 的 tokens/missing/count，並以 rows 記錄各清單展開的列數。
+    """
+    if report is None:
+        report = new_report()
+    units = find_repeat_units(root)
+    if not units:
+        return report
+
+    lists: Dict[str, Optional[List[Any]]] = {}
+    rows = report.setdefault("rows", {})
+    for unit, names in units.items():
+        if unit.getparent() is None:
+            continue
+        report["tokens"].update(names)
+        paths = list(dict.fromkeys(repeat_list_path(n) for n in names))
+        for path in paths:
+            if path not in lists:
+                lists[path] = as_list(resolve(path))
+        items = lists[paths[0]]
+        if items is None:
+            report["missing"].update(n for n in names if lists[repeat_list_path(n)] is None)
+            continue
+        rows[paths[0]] = rows.get(paths[0], 0) + _clone_unit(unit, len(items), lists, report)
+    return report
@@ -4,95 +4,190 @@ Spec Sync SSOT - 文件一致性驗證工具
 檢查輸出文件與 SSOT 是否一致
 
 支援純 Python 與 Office COM 兩種模式，與 generate_docs.py 相同。
+輸出有填寫收據（fill_receipt）時只比對被改寫 part 的雜湊並讀取記錄的位置；
+雜湊不符或沒有收據時才讀取全文比對。
 """
 
+import json
+import math
 import os
+import re
 import sys
-import yaml
-import json
 import logging
+from datetime import date, datetime, time
+from decimal import Decimal
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
+
+from aho_corasick import AhoCorasick
+from docx_text import extract_docx_text
+from engine_registry import capabilities, router
+from fill_receipt import read_fills
+from instrumentation import Tracer, activate, add_trace_argument, count, count_file_bytes, report, span
+from mapping_plan import SsotTable, TemplatePlan, load_compiled_mapping
+from office_pool import ComBackend, OfficeAppPool, OfficeUnavailable
+from output_store import OutputStore
+from ssot_store import default_ssot_name, open_ssot
+from xlsx_package import RowShift, SheetNotFoundError, XlsxPatchUnsupported, read_cells, repeat_row_shift, split_ref
+from yaml_cache import load_yaml
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def _import_python_doc_libs():
-    try:
-        from docx import Document  # type: ignore
-    except Exception as e:
-        Document = None  # type: ignore
-        logger.debug(f"python-docx 載入失敗: {e}")
-    try:
-        from openpyxl import load_workbook  # type: ignore
-    except Exception as e:
-        load_workbook = None  # type: ignore
-        logger.debug(f"openpyxl 載入失敗: {e}")
-    return Document, load_workbook
-
-def _import_office_com():
-    try:
-        import win32com.client  # type: ignore
-        return win32com.client
-    except Exception as e:
-        logger.debug(f"win32com 載入失敗: {e}")
+DIFF_REPORT_VERSION = 1
+_ISO_DATETIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?$")
+
+
+def normalize_cell_value(value: Any) -> Any:
+    """比較用的值：字串去除前後空白（空字串視為空白）、ISO 日期字串與 date 轉為 datetime、
+    datetime 去除時區、Decimal 轉為 float"""
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+        if _ISO_DATETIME_RE.match(value):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                return value
+        return value
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _as_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
         return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def cell_values_equal(actual: Any, expected: Any) -> bool:
+    """依型別比較儲存格值與 SSOT 值：100000 與 "100000"、日期儲存格與 2024-01-31 視為相同"""
+    a, e = normalize_cell_value(actual), normalize_cell_value(expected)
+    if isinstance(a, bool) or isinstance(e, bool):
+        if isinstance(a, bool) and isinstance(e, bool):
+            return a == e
+        return str(a).lower() == str(e).lower()
+    if a == e:
+        return True
+    a_num, e_num = _as_number(a), _as_number(e)
+    if a_num is not None and e_num is not None:
+        return math.isclose(a_num, e_num, rel_tol=1e-9, abs_tol=1e-9)
+    return False
+
+
+def _json_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _read_only_cells(ws, refs: List[str]) -> Dict[str, Any]:
+    """openpyxl 唯讀工作表：以單次 iter_rows 讀取涵蓋所有儲存格的範圍"""
+    values: Dict[str, Any] = {ref: None for ref in refs}
+    if not refs:
+        return values
+    coords = {split_ref(ref): ref for ref in refs}
+    cols = [c for c, _ in coords]
+    rows = [r for _, r in coords]
+    min_col, min_row = min(cols), min(rows)
+    for r_offset, row in enumerate(ws.iter_rows(min_row=min_row, max_row=max(rows), min_col=min_col,
+                                                max_col=max(cols), values_only=True)):
+        for c_offset, value in enumerate(row):
+            ref = coords.get((min_col + c_offset, min_row + r_offset))
+            if ref is not None:
+                values[ref] = value
+    return values
+
 
 class ConsistencyValidator:
     """文件一致性驗證器"""
     
-    def __init__(self, base_path: str = "."):
+    def __init__(self, base_path: str = ".", office_pool: Optional[OfficeAppPool] = None):
         self.base_path = Path(base_path)
         self.ssot_path = self.base_path / "ssot"
         self.mapping_path = self.base_path / "mapping"
+        self.template_path = self.base_path / "templates"
         self.output_path = self.base_path / "output"
+        self._office_pool = office_pool
+        self.excel_diffs: List[Dict[str, Any]] = []
+
+    def get_office_pool(self, win32com) -> OfficeAppPool:
+        """取得（必要時建立）Office 實例池，整批驗證共用已啟動的 Word/Excel"""
+        if self._office_pool is None:
+            self._office_pool = OfficeAppPool(ComBackend(win32com))
+        return self._office_pool
+
+    def close_office_pool(self):
+        if self._office_pool is not None:
+            self._office_pool.close_all()
         
-    def load_ssot(self, ssot_file: str = "master.yaml") -> Dict[str, Any]:
-        """載入 SSOT 檔案"""
-        ssot_file_path = self.ssot_path / ssot_file
-        
-        with open(ssot_file_path, 'r', encoding='utf-8') as f:
-            if ssot_file_path.suffix.lower() == '.yaml':
-                return yaml.safe_load(f)
-            elif ssot_file_path.suffix.lower() == '.json':
-                return json.load(f)
+    def load_ssot(self, ssot_file: Optional[str] = None) -> Dict[str, Any]:
+        """載入 SSOT 檔案（分割目錄與 SQLite 來源為延遲載入）"""
+        return open_ssot(self.ssot_path / (ssot_file or default_ssot_name()))
                 
     def load_mapping(self, mapping_file: str = "customer_mapping.yaml") -> Dict[str, Any]:
         """載入對應表"""
         mapping_file_path = self.mapping_path / mapping_file
         
-        with open(mapping_file_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return load_yaml(mapping_file_path)
     
-    def get_nested_value(self, data: Dict[str, Any], key_path: str) -> Any:
-        """從巢狀字典中取得值"""
-        keys = key_path.split('.')
-        value = data
-        
-        try:
-            for key in keys:
-                value = value[key]
-            return value
-        except (KeyError, TypeError):
-            return None
-    
-    def validate_word_document(self, doc_path: Path, mapping: Dict[str, str], 
-                              ssot_data: Dict[str, Any]) -> List[str]:
-        """驗證 Word 文件一致性（自動選擇引擎）。"""
+    def validate_word_document(self, doc_path: Path, plan: TemplatePlan, table: SsotTable,
+                              receipt: Optional[Dict[str, Any]] = None) -> List[str]:
+        """依填寫計畫驗證 Word 文件一致性（有收據時只讀取填寫位置，否則自動選擇引擎讀取全文）。"""
         errors: List[str] = []
         if not doc_path.exists():
             return [f"Word 文件不存在: {doc_path}"]
+        expected = [(f, value) for f, value in plan.resolve(table) if value is not None]
+
+        if receipt is not None:
+            with span('receipt'):
+                filled = read_fills(doc_path, receipt, plan.mappings)
+            if filled is not None:
+                for accessor, expected_value in expected:
+                    actual = filled.get(accessor.target)
+                    if not actual or any(value != str(expected_value) for value in actual):
+                        errors.append(f"Word文件中找不到 {accessor.path} 的值: {expected_value}")
+                return errors
+            logger.info(f"{doc_path.name} 與填寫收據不符，改用全文比對")
+            count('fallback.full_scan')
 
         engine_pref = os.getenv("SPEC_SYNC_ENGINE", "auto").lower()
-        Document, _ = _import_python_doc_libs()
-        win32com = _import_office_com() if engine_pref in ("auto", "office") else None
+        caps = capabilities()
+        Document = caps.Document
+        win32com = caps.win32com if caps.available('word', 'office') else None
 
         doc_text = None
+        count_file_bytes('bytes_read', doc_path)
 
-        # 試 Python 解析
-        if engine_pref in ("auto", "pure") and Document is not None:
+        # 串流讀取 XML（含頁首、頁尾、註腳），不建立 python-docx 物件模型
+        if engine_pref in ("auto", "pure"):
             try:
-                doc = Document(str(doc_path))
+                with span('extract_text'):
+                    doc_text = extract_docx_text(doc_path)
+            except Exception as e:
+                logger.debug(f"串流讀取 docx 失敗：{e}")
+
+        # 試 python-docx 解析
+        if doc_text is None and engine_pref in ("auto", "pure") and Document is not None:
+            count('fallback.python_docx')
+            try:
+                with span('open'):
+                    doc = Document(str(doc_path))
                 text = []
                 for p in doc.paragraphs:
                     text.append(p.text)
@@ -106,143 +201,229 @@ class ConsistencyValidator:
 
         # COM 讀取全文
         if doc_text is None and engine_pref in ("auto", "office") and win32com is not None:
+            if engine_pref == "auto":
+                count('fallback.office')
             try:
-                word = win32com.Dispatch("Word.Application")
-                word.Visible = False
-                doc = word.Documents.Open(str(doc_path))
-                doc_text = doc.Content.Text
-                doc.Close(False)
-                word.Quit()
+                with span('office'), self.get_office_pool(win32com).session('word') as word:
+                    doc = word.Documents.Open(str(doc_path))
+                    try:
+                        doc_text = doc.Content.Text
+                    finally:
+                        doc.Close(False)
+            except OfficeUnavailable as e:
+                router.mark_office_unavailable(str(e))
             except Exception as e:
                 logger.debug(f"Office Word 自動化讀取失敗：{e}")
-                try:
-                    word.Quit()
-                except Exception:
-                    pass
 
         if doc_text is None:
             return ["無法讀取 Word 文件內容（請確認權限或安裝必要套件）"]
 
-        # 檢查每個對應欄位
-        for ssot_field, _bookmark in mapping.items():
-            expected_value = self.get_nested_value(ssot_data, ssot_field)
-            if expected_value is None:
-                continue
-            if str(expected_value) not in doc_text:
+        # 檢查每個對應欄位：所有預期值以 Aho-Corasick 一次掃描全文
+        with span('check'):
+            found = AhoCorasick(str(v) for _, v in expected).find(doc_text)
+        for accessor, expected_value in expected:
+            text = str(expected_value)
+            if text and text not in found:
                 errors.append(
-                    f"Word文件中找不到 {ssot_field} 的值: {expected_value}"
+                    f"Word文件中找不到 {accessor.path} 的值: {expected_value}"
                 )
         return errors
     
-    def validate_excel_document(self, excel_path: Path, sheet_name: str,
-                               mapping: Dict[str, str], ssot_data: Dict[str, Any]) -> List[str]:
-        """驗證 Excel 文件一致性（自動選擇引擎）。"""
-        errors: List[str] = []
+    def validate_excel_document(self, excel_path: Path, plan: TemplatePlan, table: SsotTable,
+                               receipt: Optional[Dict[str, Any]] = None,
+                               diff: Optional[Dict[str, Any]] = None,
+                               row_shift: Optional[RowShift] = None) -> List[str]:
+        """依填寫計畫驗證 Excel 文件一致性：只讀取對應表中的儲存格，依型別比較（見 cell_values_equal）。
+
+        取值順序：填寫收據 → 串流唯讀（xlsx_package.read_cells）→ openpyxl 唯讀模式 → Office。
+        模板含重複列時以 row_shift 將對應表的位址（展開前）換算為輸出文件中的位置；
+        收據以對應表位址為鍵，不需換算。
+        提供 diff 時填入逐格比對結果（sheet、checked、mismatches），供輸出 JSON 報告。
+        """
         if not excel_path.exists():
             return [f"Excel 文件不存在: {excel_path}"]
 
+        sheet_name = plan.sheet_name
+        checks = [(f.path, f.target, value) for f, value in plan.resolve(table) if value is not None]
+        refs = list(dict.fromkeys(cell for _, cell, _ in checks))
+
+        actual: Optional[Dict[str, Any]] = None
+        if receipt is not None:
+            with span('receipt'):
+                filled = read_fills(excel_path, receipt, plan.mappings, sheet_name)
+            # 產生時值為空而未寫入的儲存格不在收據中，改用完整讀取
+            if filled is not None and all(cell in filled for cell in refs):
+                actual = {cell: values[0] for cell, values in filled.items()}
+            else:
+                logger.info(f"{excel_path.name} 與填寫收據不符，改用完整讀取")
+                count('fallback.full_scan')
+        if actual is None:
+            try:
+                located = {cell: row_shift.cell(cell) if row_shift else cell for cell in refs}
+                values, errors = self.read_excel_cells(excel_path, sheet_name, list(dict.fromkeys(located.values())))
+            except ValueError as e:
+                values, errors = None, [str(e)]
+            if values is None:
+                if diff is not None:
+                    diff.update({'sheet': sheet_name, 'checked': 0, 'mismatches': [], 'error': errors[0]})
+                return errors
+            actual = {cell: values.get(ref) for cell, ref in located.items()}
+
+        errors = []
+        mismatches = []
+        with span('check'):
+            for ssot_field, excel_cell, expected_value in checks:
+                actual_value = actual.get(excel_cell)
+                if cell_values_equal(actual_value, expected_value):
+                    continue
+                errors.append(
+                    f"Excel {excel_cell} 儲存格不一致: 期望 '{expected_value}', 實際 '{actual_value}'"
+                )
+                mismatches.append({
+                    'cell': excel_cell,
+                    'field': ssot_field,
+                    'expected': _json_value(expected_value),
+                    'actual': _json_value(actual_value),
+                    'expected_type': type(expected_value).__name__,
+                    'actual_type': type(actual_value).__name__,
+                })
+        if diff is not None:
+            diff.update({'sheet': sheet_name, 'checked': len(checks), 'mismatches': mismatches})
+        return errors
+
+    def read_excel_cells(self, excel_path: Path, sheet_name: str,
+                         refs: List[str]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """唯讀取得指定儲存格的值（自動選擇引擎），回傳 (儲存格 → 值, 錯誤)；無法讀取時值為 None"""
         engine_pref = os.getenv("SPEC_SYNC_ENGINE", "auto").lower()
-        _, load_workbook = _import_python_doc_libs()
-        win32com = _import_office_com() if engine_pref in ("auto", "office") else None
+        caps = capabilities()
+        load_workbook = caps.load_workbook
+        win32com = caps.win32com if caps.available('excel', 'office') else None
 
-        used_openpyxl = False
-        if engine_pref in ("auto", "pure") and load_workbook is not None:
+        count_file_bytes('bytes_read', excel_path)
+        if engine_pref in ("auto", "pure"):
             try:
-                wb = load_workbook(str(excel_path))
-                if sheet_name not in wb.sheetnames:
-                    return [f"工作表不存在: {sheet_name}"]
-                ws = wb[sheet_name]
-                for ssot_field, excel_cell in mapping.items():
-                    expected_value = self.get_nested_value(ssot_data, ssot_field)
-                    if expected_value is None:
-                        continue
-                    actual_value = ws[excel_cell].value
-                    if str(actual_value) != str(expected_value):
-                        errors.append(
-                            f"Excel {excel_cell} 儲存格不一致: 期望 '{expected_value}', 實際 '{actual_value}'"
-                        )
-                used_openpyxl = True
-            except Exception as e:
-                logger.debug(f"openpyxl 讀取失敗：{e}")
+                with span('read_cells'):
+                    return read_cells(excel_path, sheet_name, refs), []
+            except SheetNotFoundError:
+                return None, [f"工作表不存在: {sheet_name}"]
+            except XlsxPatchUnsupported as e:
+                logger.info(f"改用 openpyxl 唯讀模式：{e}")
+                count('fallback.openpyxl')
 
-        if not used_openpyxl and engine_pref in ("auto", "office") and win32com is not None:
+            if load_workbook is not None:
+                try:
+                    with span('open'):
+                        wb = load_workbook(str(excel_path), read_only=True)
+                    try:
+                        if sheet_name not in wb.sheetnames:
+                            return None, [f"工作表不存在: {sheet_name}"]
+                        return _read_only_cells(wb[sheet_name], refs), []
+                    finally:
+                        wb.close()
+                except Exception as e:
+                    logger.debug(f"openpyxl 讀取失敗：{e}")
+
+        if engine_pref in ("auto", "office") and win32com is not None:
+            if engine_pref == "auto":
+                count('fallback.office')
             try:
-                excel = win32com.Dispatch("Excel.Application")
-                excel.Visible = False
-                wb = excel.Workbooks.Open(str(excel_path))
-                ws = wb.Worksheets(sheet_name)
-                for ssot_field, excel_cell in mapping.items():
-                    expected_value = self.get_nested_value(ssot_data, ssot_field)
-                    if expected_value is None:
-                        continue
-                    actual_value = ws.Range(excel_cell).Value
-                    if str(actual_value) != str(expected_value):
-                        errors.append(
-                            f"Excel {excel_cell} 儲存格不一致: 期望 '{expected_value}', 實際 '{actual_value}'"
-                        )
-                wb.Close(SaveChanges=False)
-                excel.Quit()
+                with span('office'), self.get_office_pool(win32com).session('excel') as excel:
+                    wb = excel.Workbooks.Open(str(excel_path))
+                    try:
+                        ws = wb.Worksheets(sheet_name)
+                        return {ref: ws.Range(ref).Value for ref in refs}, []
+                    finally:
+                        wb.Close(SaveChanges=False)
+            except OfficeUnavailable as e:
+                router.mark_office_unavailable(str(e))
+                return None, [f"Office Excel 無法使用：{e}"]
             except Exception as e:
-                errors.append(f"Office Excel 自動化讀取失敗：{e}")
-                try:
-                    excel.Quit()
-                except Exception:
-                    pass
+                return None, [f"Office Excel 自動化讀取失敗：{e}"]
 
-        return errors
+        return None, ["無法讀取 Excel 文件內容（請確認權限或安裝必要套件）"]
     
+    def excel_row_shift(self, plan: TemplatePlan, table: SsotTable) -> Optional[RowShift]:
+        """模板重複列展開後的列號對應（模板沒有重複列或無法讀取時為 None）"""
+        if not plan.lists:
+            return None
+
+        def resolve(alias: str) -> Any:
+            return table.get(plan.lists[alias]) if alias in plan.lists else None
+        try:
+            return repeat_row_shift(self.template_path / plan.template_file, plan.sheet_name, resolve)
+        except (OSError, SheetNotFoundError, XlsxPatchUnsupported) as e:
+            logger.info(f"無法讀取 {plan.template_file} 的重複列，依對應表位址驗證：{e}")
+            return None
+
+    def latest_receipt(self, store: OutputStore, kind: str, template_name: str) -> Optional[Dict[str, Any]]:
+        """最新輸出的填寫收據（沒有時回傳 None）"""
+        record = store.latest(f"{kind}:{template_name}")
+        return store.receipt(record['digest']) if record else None
+
+    def latest_output(self, store: OutputStore, kind: str, template_name: str, ext: str) -> Optional[Path]:
+        """查找模板的最新輸出：優先使用輸出儲存區索引，沒有紀錄時依 mtime 比較 output/ 下的檔案"""
+        latest = store.latest_path(f"{kind}:{template_name}")
+        if latest is not None:
+            return latest
+        matching_files = list(self.output_path.glob(f"{template_name}_*.{ext}"))
+        if not matching_files:
+            return None
+        return max(matching_files, key=lambda x: x.stat().st_mtime)
+
     def validate_all_documents(self) -> Tuple[bool, List[str]]:
         """驗證所有文件一致性"""
         all_errors = []
+        self.excel_diffs = []
         
         try:
             # 載入 SSOT 和對應表
-            ssot_data = self.load_ssot()
-            mapping_config = self.load_mapping()
+            with span('load_ssot'):
+                table = SsotTable(self.load_ssot())
+            with span('load_mapping'):
+                compiled = load_compiled_mapping(self.mapping_path / "customer_mapping.yaml")
+            store = OutputStore(self.output_path)
             
             logger.info("開始驗證文件一致性...")
             
             # 驗證 Word 文件
-            if 'word_mappings' in mapping_config:
-                for template_name, config in mapping_config['word_mappings'].items():
-                    # 查找最新的輸出文件
-                    pattern = f"{template_name}_*.docx"
-                    matching_files = list(self.output_path.glob(pattern))
-                    
-                    if not matching_files:
+            if compiled.templates('word'):
+                for plan in compiled.templates('word'):
+                    template_name = plan.name
+                    latest_file = self.latest_output(store, 'word', template_name, 'docx')
+                    if latest_file is None:
                         all_errors.append(f"找不到 {template_name} 的輸出文件")
                         continue
                     
-                    # 取最新的檔案
-                    latest_file = max(matching_files, key=lambda x: x.stat().st_mtime)
-                    
-                    errors = self.validate_word_document(
-                        latest_file, 
-                        config['mappings'], 
-                        ssot_data
-                    )
+                    with span('template', template=template_name, kind='word'):
+                        errors = self.validate_word_document(
+                            latest_file,
+                            plan,
+                            table,
+                            receipt=self.latest_receipt(store, 'word', template_name)
+                        )
                     all_errors.extend(errors)
             
             # 驗證 Excel 文件
-            if 'excel_mappings' in mapping_config:
-                for template_name, config in mapping_config['excel_mappings'].items():
-                    # 查找最新的輸出文件
-                    pattern = f"{template_name}_*.xlsx"
-                    matching_files = list(self.output_path.glob(pattern))
-                    
-                    if not matching_files:
+            if compiled.templates('excel'):
+                for plan in compiled.templates('excel'):
+                    template_name = plan.name
+                    latest_file = self.latest_output(store, 'excel', template_name, 'xlsx')
+                    if latest_file is None:
                         all_errors.append(f"找不到 {template_name} 的輸出文件")
+                        self.excel_diffs.append({'template': template_name, 'error': "找不到輸出文件"})
                         continue
                     
-                    # 取最新的檔案
-                    latest_file = max(matching_files, key=lambda x: x.stat().st_mtime)
-                    
-                    errors = self.validate_excel_document(
-                        latest_file,
-                        config.get('sheet_name', 'Sheet1'),
-                        config['mappings'], 
-                        ssot_data
-                    )
+                    diff = {'template': template_name, 'file': latest_file.name}
+                    with span('template', template=template_name, kind='excel'):
+                        errors = self.validate_excel_document(
+                            latest_file,
+                            plan,
+                            table,
+                            receipt=self.latest_receipt(store, 'excel', template_name),
+                            diff=diff,
+                            row_shift=self.excel_row_shift(plan, table)
+                        )
+                    self.excel_diffs.append(diff)
                     all_errors.extend(errors)
             
             is_valid = len(all_errors) == 0
@@ -258,12 +439,37 @@ class ConsistencyValidator:
             error_msg = f"驗證過程中發生錯誤: {e}"
             logger.error(error_msg)
             return False, [error_msg]
+        finally:
+            self.close_office_pool()
+
+    def write_diff_report(self, path: Path, is_valid: bool, errors: List[str]):
+        """將 Excel 逐格比對結果寫成 JSON（供 CI 上傳為 artifact）"""
+        report = {
+            'version': DIFF_REPORT_VERSION,
+            'ok': is_valid,
+            'errors': errors,
+            'excel': self.excel_diffs,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
 
 def main():
     """主程式入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Spec Sync SSOT 文件一致性驗證')
+    add_trace_argument(parser)
+    parser.add_argument('--diff-json', metavar='FILE', help='將 Excel 逐格比對結果寫入 JSON 檔案')
+    args = parser.parse_args()
+
     validator = ConsistencyValidator()
-    
-    is_valid, errors = validator.validate_all_documents()
+    tracer = Tracer() if args.trace else None
+    with activate(tracer):
+        is_valid, errors = validator.validate_all_documents()
+    if tracer is not None:
+        report(tracer, args.trace)
+    if args.diff_json:
+        validator.write_diff_report(Path(args.diff_json), is_valid, errors)
     
     if errors:
         print("\n❌ 發現以下一致性問題:")
@@ -0,0 +1,1071 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - 串流式 Excel 填寫（直接修補 xlsx 套件）
+
+openpyxl 的 load_workbook 會把所有工作表載入記憶體，面對 5 萬列以上的資料表
+即使只填十幾個儲存格也要數百 MB 與數十秒。本模組直接修補 xlsx 套件：
+- patch_cells: 只改寫目標工作表中的目標儲存格（以 inline string / 數值寫入）；
+  模板含重複列時先展開，再把對應表的位址依 RowShift 換算到展開後的位置寫入。
+  活頁簿含公式時設定 <calcPr fullCalcOnLoad="1"> 並移除 calcChain.xml（與 openpyxl
+  儲存時相同），開啟時重新計算，相依公式不會保留舊的快取結果
+- replace_tokens: 只改寫含 Token 的 sharedStrings 與 inline string
+- expand_repeat_rows_xml: 含 {清單[].欄位} 的範本列依清單項目展開，單次改寫整份工作表，
+  其後各列與合併儲存格等範圍一併下移
+- read_cells: 唯讀取得少數儲存格的值（串流讀取，讀到需要的列即停止）
+其餘 part（包括未修改的大型工作表）以串流方式原樣複製。
+
+遇到無法安全修補的情況（公式儲存格、日期等需樣式的值、帶命名空間前綴的
+工作表 XML 等）會拋出 XlsxPatchUnsupported，由呼叫端改用 openpyxl；
+openpyxl 路徑的重複列展開使用 expand_repeat_rows_worksheet（含公式平移）。
+"""
+
+import copy
+import html
+import math
+import posixpath
+import re
+import zipfile
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from package_writer import write_package
+from token_replacer import (
+    REPEAT_TOKEN_PATTERN,
+    RepeatValues,
+    as_list,
+    new_report,
+    repeat_list_path,
+    repeat_value,
+    replace_in_texts,
+)
+
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_REF_RE = re.compile(r"^([A-Za-z]{1,3})([1-9][0-9]*)$")
+_ROW_RE = re.compile(r"<row\b([^>]*?)(/>|>(.*?)</row>)", re.S)
+_CELL_RE = re.compile(r"<c\b([^>]*?)(/>|>(.*?)</c>)", re.S)
+_ATTR_R = re.compile(r'\sr="([^"]*)"')
+_ATTR_S = re.compile(r'\ss="([^"]*)"')
+_ATTR_SPANS = re.compile(r'\sspans="[^"]*"')
+_ATTR_T = re.compile(r'\st="([^"]*)"')
+_V_RE = re.compile(r"<v>([^<]*)</v>")
+_DIMENSION_RE = re.compile(r'<dimension\s+ref="([^"]*)"\s*/>')
+_SI_RE = re.compile(r"<si>(.*?)</si>", re.S)
+_IS_RE = re.compile(r"<is>(.*?)</is>", re.S)
+_T_RE = re.compile(r"(<t\b[^>]*?)(?:/>|>(.*?)</t>)", re.S)
+_RPH_RE = re.compile(r"<rPh\b.*?</rPh>", re.S)
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_FORMULA_TEXT_RE = re.compile(r"<f\b[^>]*>([^<]+)</f>")
+_CALC_PR_RE = re.compile(r"<calcPr\b([^>]*?)(/?)>")
+_FULL_CALC_RE = re.compile(r'\sfullCalcOnLoad="[^"]*"')
+# CT_Workbook 中位於 calcPr 之前的元素
+_CALC_PR_AFTER = ("</sheets>", "</functionGroups>", "</externalReferences>", "</definedNames>")
+_CALC_CHAIN_OVERRIDE_RE = re.compile(r'<Override\b[^>]*PartName="/xl/calcChain\.xml"[^>]*/>')
+_CALC_CHAIN_REL_RE = re.compile(r'<Relationship\b[^>]*Target="[^"]*calcChain\.xml"[^>]*/>')
+
+CALC_CHAIN_PART = "xl/calcChain.xml"
+
+
+class XlsxPatchUnsupported(Exception):
+    """無法以直接修補方式處理，需改用 openpyxl"""
+
+
+class SheetNotFoundError(KeyError):
+    """工作表不存在"""
+
+
+def column_index(letters: str) -> int:
+    """'A' -> 1, 'AB' -> 28"""
+    idx = 0
+    for ch in letters.upper():
+        idx = idx * 26 + (ord(ch) - 64)
+    return idx
+
+
+def column_letters(idx: int) -> str:
+    """1 -> 'A', 28 -> 'AB'"""
+    letters = ""
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def split_ref(ref: str) -> Tuple[int, int]:
+    """'B12' -> (2, 12)"""
+    m = _REF_RE.match(ref.strip())
+    if not m:
+        raise XlsxPatchUnsupported(f"不支援的儲存格位址: {ref}")
+    return column_index(m.group(1)), int(m.group(2))
+
+
+def normalize_ref(ref: str) -> str:
+    """'b12' -> 'B12'"""
+    col, row = split_ref(ref)
+    return f"{column_letters(col)}{row}"
+
+
+def sheet_part_names(zf: zipfile.ZipFile) -> Dict[str, str]:
+    """工作表名稱 → 套件內 part 路徑（例如 xl/worksheets/sheet1.xml）"""
+    workbook = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+    rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    targets = {
+        rel.get("Id"): rel.get("Target")
+        for rel in rels.iter(f"{{{_NS_PKG_REL}}}Relationship")
+    }
+    parts: Dict[str, str] = {}
+    for sheet in workbook.iter(f"{{{_NS_MAIN}}}sheet"):
+        target = targets.get(sheet.get(f"{{{_NS_REL}}}id"))
+        if not target:
+            continue
+        if target.startswith("/"):
+            part = target.lstrip("/")
+        else:
+            part = posixpath.normpath(posixpath.join("xl", target))
+        parts[sheet.get("name")] = part
+    return parts
+
+
+def _cell_xml(ref: str, value: Any, style: Optional[str]) -> str:
+    s_attr = f' s="{style}"' if style else ""
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{s_attr} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, int):
+        return f'<c r="{ref}"{s_attr}><v>{value}</v></c>'
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise XlsxPatchUnsupported(f"{ref} 的數值無法寫入: {value}")
+        return f'<c r="{ref}"{s_attr}><v>{value!r}</v></c>'
+    if isinstance(value, str):
+        if value.startswith("=") or _ILLEGAL_XML_CHARS.search(value):
+            raise XlsxPatchUnsupported(f"{ref} 的字串需由 openpyxl 處理")
+        return (f'<c r="{ref}"{s_attr} t="inlineStr"><is>'
+                f'<t xml:space="preserve">{escape(value)}</t></is></c>')
+    # 日期等型別需要數值格式樣式，交由 openpyxl 處理
+    raise XlsxPatchUnsupported(f"{ref} 的值型別需由 openpyxl 處理: {type(value).__name__}")
+
+
+Marks = List[Tuple[str, int]]
+
+
+def _patch_row(attrs: str, content: str, row: int, cols: Dict[int, Tuple[str, Any]],
+               out: List[str], marks: Marks):
+    """改寫單一列並附加到 out；寫入的儲存格以 (位址, out 中的索引) 記錄於 marks"""
+    pending = sorted(cols)
+    out.append(f"<row{_ATTR_SPANS.sub('', attrs)}>")
+    pos = 0
+    pi = 0
+
+    def write(col: int, style: Optional[str]):
+        ref, value = cols[col]
+        marks.append((ref, len(out)))
+        out.append(_cell_xml(ref, value, style))
+
+    for m in _CELL_RE.finditer(content):
+        ref_m = _ATTR_R.search(m.group(1))
+        if not ref_m:
+            raise XlsxPatchUnsupported(f"第 {row} 列含無位址的儲存格")
+        col, _ = split_ref(ref_m.group(1))
+        while pi < len(pending) and pending[pi] < col:
+            out.append(content[pos:m.start()])
+            pos = m.start()
+            write(pending[pi], None)
+            pi += 1
+        if pi < len(pending) and pending[pi] == col:
+            if m.group(3) and "<f" in m.group(3):
+                raise XlsxPatchUnsupported(f"{ref_m.group(1)} 為公式儲存格")
+            style_m = _ATTR_S.search(m.group(1))
+            out.append(content[pos:m.start()])
+            write(col, style_m.group(1) if style_m else None)
+            pos = m.end()
+            pi += 1
+    out.append(content[pos:])
+    for col in pending[pi:]:
+        write(col, None)
+    out.append("</row>")
+
+
+def _new_row(row: int, cols: Dict[int, Tuple[str, Any]], out: List[str], marks: Marks):
+    out.append(f'<row r="{row}">')
+    for c in sorted(cols):
+        marks.append((cols[c][0], len(out)))
+        out.append(_cell_xml(cols[c][0], cols[c][1], None))
+    out.append("</row>")
+
+
+def _update_dimension(xml: str, targets: Dict[int, Dict[int, Tuple[str, Any]]]) -> str:
+    m = _DIMENSION_RE.search(xml)
+    if not m or not targets:
+        return xml
+    bounds = m.group(1).split(":")
+    try:
+        c1, r1 = split_ref(bounds[0])
+        c2, r2 = split_ref(bounds[-1])
+    except XlsxPatchUnsupported:
+        return xml
+    max_row = max(r2, max(targets))
+    max_col = max(c2, max(c for cols in targets.values() for c in cols))
+    min_row = min(r1, min(targets))
+    min_col = min(c1, min(c for cols in targets.values() for c in cols))
+    ref = f"{column_letters(min_col)}{min_row}:{column_letters(max_col)}{max_row}"
+    return xml[:m.start()] + f'<dimension ref="{ref}"/>' + xml[m.end():]
+
+
+def _byte_locations(out: List[str], marks: Marks) -> Dict[str, Tuple[int, int]]:
+    """marks 中各儲存格在 "".join(out) 以 UTF-8 編碼後的 (位元組位移, 長度)"""
+    at = {index: ref for ref, index in marks}
+    last = max(at, default=-1)
+    locations: Dict[str, Tuple[int, int]] = {}
+    offset = 0
+    for index, piece in enumerate(out[:last + 1]):
+        size = len(piece) if piece.isascii() else len(piece.encode("utf-8"))
+        if index in at:
+            locations[at[index]] = (offset, size)
+        offset += size
+    return locations
+
+
+def patch_sheet_xml(xml: str, cells: Mapping[str, Any],
+                    locations: Optional[Dict[str, Tuple[int, int]]] = None) -> str:
+    """在工作表 XML 中寫入指定儲存格；只改寫目標列，其餘內容原樣保留
+
+    提供 locations 時填入寫入的每個儲存格（正規化位址）在結果 UTF-8 編碼中的 (位元組位移, 長度)。
+    """
+    targets: Dict[int, Dict[int, Tuple[str, Any]]] = {}
+    for ref, value in cells.items():
+        col, row = split_ref(ref)
+        targets.setdefault(row, {})[col] = (f"{column_letters(col)}{row}", value)
+
+    out: List[str] = []
+    marks: Marks = []
+    empty = re.search(r"<sheetData\s*/>", xml)
+    if empty:
+        out.append(_update_dimension(xml[:empty.start()], targets) + "<sheetData>")
+        for r in sorted(targets):
+            _new_row(r, targets[r], out, marks)
+        out.append("</sheetData>" + xml[empty.end():])
+    else:
+        open_m = re.search(r"<sheetData\b[^>]*>", xml)
+        close = xml.find("</sheetData>", open_m.end()) if open_m else -1
+        if close < 0:
+            raise XlsxPatchUnsupported("找不到 sheetData（可能使用命名空間前綴）")
+
+        pending = sorted(targets)
+        pi = 0
+        # dimension 位於 sheetData 之前，先更新以免改變之後的位移
+        out.append(_update_dimension(xml[:open_m.end()], targets))
+        pos = open_m.end()
+        for m in _ROW_RE.finditer(xml, pos, close):
+            if pi >= len(pending):
+                break
+            r_m = _ATTR_R.search(m.group(1))
+            if not r_m:
+                raise XlsxPatchUnsupported("工作表含無列號的 row")
+            row = int(r_m.group(1))
+            while pi < len(pending) and pending[pi] < row:
+                out.append(xml[pos:m.start()])
+                pos = m.start()
+                _new_row(pending[pi], targets[pending[pi]], out, marks)
+                pi += 1
+            if pi < len(pending) and pending[pi] == row:
+                out.append(xml[pos:m.start()])
+                _patch_row(m.group(1), m.group(3) or "", row, targets[row], out, marks)
+                pos = m.end()
+                pi += 1
+        out.append(xml[pos:close])
+        for row in pending[pi:]:
+            _new_row(row, targets[row], out, marks)
+        out.append(xml[close:])
+    if locations is not None:
+        locations.update(_byte_locations(out, marks))
+    return "".join(out)
+
+
+def full_calc_on_load(workbook_xml: str) -> str:
+    """在 workbook.xml 設定 <calcPr fullCalcOnLoad="1">（沒有 calcPr 時新增），開啟時重新計算公式"""
+    m = _CALC_PR_RE.search(workbook_xml)
+    if m:
+        attrs = _FULL_CALC_RE.sub("", m.group(1))
+        return workbook_xml[:m.start()] + f'<calcPr{attrs} fullCalcOnLoad="1"{m.group(2)}>' + workbook_xml[m.end():]
+    ends = [workbook_xml.find(tag) + len(tag) for tag in _CALC_PR_AFTER if tag in workbook_xml]
+    if not ends:
+        raise XlsxPatchUnsupported("找不到 workbook.xml 的 sheets（可能使用命名空間前綴）")
+    at = max(ends)
+    return workbook_xml[:at] + '<calcPr fullCalcOnLoad="1"/>' + workbook_xml[at:]
+
+
+def _has_formulas(zf: zipfile.ZipFile, parts: Dict[str, str], part: str, xml: str) -> bool:
+    """活頁簿是否含公式：有 calcChain、改寫的工作表或其他工作表含 <f>"""
+    names = set(zf.namelist())
+    if CALC_CHAIN_PART in names or _FORMULA_TAG_RE.search(xml):
+        return True
+    # 共用公式的從屬儲存格為 <f .../>，但其主儲存格必有 </f>
+    return any(_part_contains(zf, other, b"</f>") for other in parts.values() if other != part and other in names)
+
+
+def recalc_parts(zf: zipfile.ZipFile) -> Tuple[Dict[str, bytes], Set[str]]:
+    """設定開啟時重新計算所需改寫的 part 與應移除的 part（calcChain 及其登錄）"""
+    replacements = {
+        "xl/workbook.xml": full_calc_on_load(zf.read("xl/workbook.xml").decode("utf-8")).encode("utf-8")
+    }
+    if CALC_CHAIN_PART not in zf.namelist():
+        return replacements, set()
+    for name, pattern in (("[Content_Types].xml", _CALC_CHAIN_OVERRIDE_RE),
+                          ("xl/_rels/workbook.xml.rels", _CALC_CHAIN_REL_RE)):
+        replacements[name] = pattern.sub("", zf.read(name).decode("utf-8")).encode("utf-8")
+    return replacements, {CALC_CHAIN_PART}
+
+
+def patch_cells(template_path: Path, output_path: Path, sheet_name: str,
+                cells: Mapping[str, Any],
+                lists: Optional[Callable[[str], Any]] = None,
+                written: Optional[Dict[str, bytes]] = None,
+                locations: Optional[Dict[str, Tuple[str, int, int]]] = None) -> int:
+    """將 cells（儲存格位址 → 值）寫入 sheet_name，輸出至 output_path；回傳寫入數量
+
+    提供 lists（清單路徑 → 清單）時先展開重複列；cells 的位址以範本（展開前）為準，
+    寫入展開後對應的位置（RowShift.cell）。提供 written 時填入改寫後的 part 內容，
+    提供 locations 時填入 範本位址 → (實際位址, 位元組位移, 長度)，供 fill_receipt 建立填寫收據。
+    活頁簿含公式時一併設定開啟時重新計算（見 recalc_parts）。
+    """
+    try:
+        with zipfile.ZipFile(template_path, "r") as zf:
+            parts = sheet_part_names(zf)
+            if sheet_name not in parts:
+                raise SheetNotFoundError(sheet_name)
+            part = parts[sheet_name]
+            xml = zf.read(part).decode("utf-8")
+            shared = read_shared_strings(zf) if lists is not None else None
+            replacements: Dict[str, bytes] = {}
+            omit: Set[str] = set()
+            if _has_formulas(zf, parts, part, xml):
+                replacements, omit = recalc_parts(zf)
+    except (zipfile.BadZipFile, KeyError) as e:
+        if isinstance(e, SheetNotFoundError):
+            raise
+        raise XlsxPatchUnsupported(f"無法解析 xlsx 套件: {e}")
+
+    shift = None
+    if lists is not None:
+        xml, shift = expand_repeat_rows_xml(xml, shared, lists, new_report())
+    targets = {ref: shift.cell(ref) if shift else normalize_ref(ref) for ref in cells}
+    written_at: Dict[str, Tuple[int, int]] = {}
+    patched = patch_sheet_xml(xml, {targets[ref]: value for ref, value in cells.items()}, written_at)
+    data = patched.encode("utf-8")
+    replacements[part] = data
+    write_package(template_path, output_path, replacements, omit=omit)
+    if written is not None:
+        written[part] = data
+    if locations is not None:
+        for ref, target in targets.items():
+            locations[ref] = (target, *written_at[target])
+    return len(cells)
+
+
+def _typed_value(attrs: str, body: str, shared: Optional[List[str]],
+                 dates: Optional[Set[int]] = None, date1904: bool = False) -> Any:
+    kind = _ATTR_T.search(attrs)
+    kind = kind.group(1) if kind else None
+    if "<f" in body:
+        # 與 openpyxl（data_only=False）相同，公式儲存格回傳公式文字
+        f = _FORMULA_TEXT_RE.search(body)
+        if not f:
+            raise XlsxPatchUnsupported("共用公式需由 openpyxl 讀取")
+        return "=" + html.unescape(f.group(1))
+    if kind in ("s", "inlineStr"):
+        return _cell_text(attrs, body, shared or [])
+    v = _V_RE.search(body)
+    if not v or not v.group(1):
+        return None
+    text = html.unescape(v.group(1))
+    if kind == "b":
+        return text == "1"
+    if kind in ("str", "e"):
+        return text
+    try:
+        if kind == "d":
+            return iso_datetime(text)
+        try:
+            number: Any = int(text)
+        except ValueError:
+            number = float(text)
+    except ValueError as e:
+        raise XlsxPatchUnsupported(f"無法解析儲存格的值 {text!r}: {e}")
+    style = _ATTR_S.search(attrs)
+    if dates and style and int(style.group(1)) in dates:
+        return excel_datetime(number, date1904)
+    return number
+
+
+def cell_value(cell_xml: str, shared: Optional[List[str]] = None) -> Any:
+    """單一 <c> 元素的值，型別與 openpyxl 讀到的相同（數值、布林、字串；空儲存格為 None）
+
+    共用字串需提供 shared（read_shared_strings），否則回傳 None；日期格式不轉換（見 read_cells）。
+    """
+    m = _CELL_RE.match(cell_xml)
+    if not m:
+        raise ValueError(f"不是儲存格元素: {cell_xml[:40]}")
+    return _typed_value(m.group(1), m.group(3) or "", shared)
+
+
+# ============================================================================
+# 唯讀取值
+# ============================================================================
+
+# 內建的日期／時間格式（含中日韓地區格式 27-36、50-58）
+_DATE_FORMAT_IDS = frozenset(list(range(14, 23)) + list(range(27, 37)) + [45, 46, 47] + list(range(50, 59)))
+_FORMAT_LITERAL_RE = re.compile(r'"[^"]*"|\\.|_.|\*.|\[(?!(?:h+|m+|s+)\])[^\]]*\]')
+_DATE1904_RE = re.compile(r'<workbookPr\b[^>]*\sdate1904="(?:1|true)"')
+_ROW_END = b"</row>"
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def is_date_format(code: str) -> bool:
+    """數值格式是否為日期／時間（去除引號文字、跳脫字元與 [色彩] 等區段後含 d/m/y/h/s）"""
+    section = _FORMAT_LITERAL_RE.sub("", code.split(";")[0]).lower()
+    return bool(re.search(r"[dmyhs]", section))
+
+
+def excel_datetime(serial: float, date1904: bool = False) -> datetime:
+    """Excel 日期序號 → datetime（1900 系統含 1900/2/29 的相容性偏移）"""
+    if date1904:
+        base = datetime(1904, 1, 1)
+    else:
+        base = datetime(1899, 12, 30)
+        if serial < 60:
+            serial += 1
+    return base + timedelta(milliseconds=round(serial * 86400000))
+
+
+def iso_datetime(text: str) -> Any:
+    """t="d" 儲存格的 ISO 8601 值，型別與 openpyxl 相同（date、time 或不含時區的 datetime）"""
+    if "T" not in text and ":" in text:
+        return time.fromisoformat(text)
+    if len(text) == 10:
+        return date.fromisoformat(text)
+    value = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def date_styles(zf: zipfile.ZipFile) -> Set[int]:
+    """cellXfs 中使用日期格式的樣式索引"""
+    try:
+        root = ElementTree.fromstring(zf.read("xl/styles.xml"))
+    except KeyError:
+        return set()
+    custom = {
+        int(fmt.get("numFmtId", -1)): fmt.get("formatCode", "")
+        for fmt in root.iter(f"{{{_NS_MAIN}}}numFmt")
+    }
+    xfs = root.find(f"{{{_NS_MAIN}}}cellXfs")
+    styles: Set[int] = set()
+    for index, xf in enumerate(xfs if xfs is not None else []):
+        fmt_id = int(xf.get("numFmtId", 0))
+        if fmt_id in _DATE_FORMAT_IDS or (fmt_id in custom and is_date_format(custom[fmt_id])):
+            styles.add(index)
+    return styles
+
+
+def _iter_rows(stream) -> Iterator[Tuple[int, str]]:
+    """逐塊讀取工作表 XML，依序產生 (列號, 列內容)"""
+    pending = b""
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        data = pending + chunk
+        if chunk:
+            end = data.rfind(_ROW_END)
+            if end < 0:
+                pending = data
+                continue
+            cut = end + len(_ROW_END)
+        else:
+            cut = len(data)
+        text, pending = data[:cut].decode("utf-8"), data[cut:]
+        for m in _ROW_RE.finditer(text):
+            r_m = _ATTR_R.search(m.group(1))
+            if not r_m:
+                raise XlsxPatchUnsupported("工作表含無列號的 row")
+            yield int(r_m.group(1)), m.group(3) or ""
+        if not chunk:
+            return
+
+
+def read_cells(path: Path, sheet_name: str, refs: Iterable[str]) -> Dict[str, Any]:
+    """唯讀取得 sheet_name 中指定儲存格的值（不存在的儲存格為 None）
+
+    型別與 openpyxl 相同（數值、布林、字串，日期格式的數值轉為 datetime）。工作表 XML
+    逐塊串流讀取，讀到最後一個需要的列即停止；共用字串與樣式只在需要時才讀取。
+    無法處理時拋出 XlsxPatchUnsupported，由呼叫端改用 openpyxl。
+    """
+    wanted: Dict[int, Dict[int, str]] = {}
+    for ref in refs:
+        col, row = split_ref(ref)
+        wanted.setdefault(row, {})[col] = ref
+    values: Dict[str, Any] = {ref: None for cols in wanted.values() for ref in cols.values()}
+    raw: Dict[str, Tuple[str, str]] = {}
+    try:
+        with zipfile.ZipFile(path, "r") as zf:
+            parts = sheet_part_names(zf)
+            if sheet_name not in parts:
+                raise SheetNotFoundError(sheet_name)
+            last = max(wanted, default=0)
+            with zf.open(parts[sheet_name]) as stream:
+                for row, content in _iter_rows(stream):
+                    if row > last:
+                        break
+                    cols = wanted.get(row)
+                    if not cols:
+                        continue
+                    for m in _CELL_RE.finditer(content):
+                        ref_m = _ATTR_R.search(m.group(1))
+                        if not ref_m:
+                            raise XlsxPatchUnsupported(f"第 {row} 列含無位址的儲存格")
+                        col, _ = split_ref(ref_m.group(1))
+                        if col in cols:
+                            raw[cols[col]] = (m.group(1), m.group(3) or "")
+            kinds = [_ATTR_T.search(attrs) for attrs, _ in raw.values()]
+            shared = read_shared_strings(zf) if any(k and k.group(1) == "s" for k in kinds) else None
+            styled = any((not k or k.group(1) == "n") and _ATTR_S.search(attrs)
+                         for k, (attrs, _) in zip(kinds, raw.values()))
+            dates = date_styles(zf) if styled else set()
+            date1904 = bool(dates) and bool(_DATE1904_RE.search(zf.read("xl/workbook.xml").decode("utf-8")))
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+        if isinstance(e, SheetNotFoundError):
+            raise
+        raise XlsxPatchUnsupported(f"無法解析 xlsx 套件: {e}")
+    for ref, (attrs, body) in raw.items():
+        values[ref] = _typed_value(attrs, body, shared, dates, date1904)
+    return values
+
+
+def _text_runs(body: str) -> list:
+    """字串項目中的 <t> 片段（略過注音 rPh）"""
+    phonetic = [(m.start(), m.end()) for m in _RPH_RE.finditer(body)]
+    return [
+        m for m in _T_RE.finditer(body)
+        if not any(s <= m.start() < e for s, e in phonetic)
+    ]
+
+
+def _item_text(body: str) -> str:
+    return "".join(html.unescape(m.group(2) or "") for m in _text_runs(body))
+
+
+def read_shared_strings(zf: zipfile.ZipFile) -> List[str]:
+    """sharedStrings 的純文字（依索引）"""
+    if "xl/sharedStrings.xml" not in zf.namelist():
+        return []
+    xml = zf.read("xl/sharedStrings.xml").decode("utf-8")
+    return [_item_text(m.group(1)) for m in _SI_RE.finditer(xml)]
+
+
+def _replace_in_string_items(xml: str, item_re, values: Mapping[str, str],
+                             report: Dict[str, Any]) -> str:
+    """替換 <si>/<is> 字串項目（含 rich text 多個 run）中的 Token"""
+    out: List[str] = []
+    pos = 0
+    for item in item_re.finditer(xml):
+        body = item.group(1)
+        if "{" not in body:
+            continue
+        t_matches = _text_runs(body)
+        texts = [html.unescape(m.group(2) or "") for m in t_matches]
+        touched = replace_in_texts(texts, values, report)
+        if not touched:
+            continue
+        new_body: List[str] = []
+        bpos = 0
+        for k in sorted(touched):
+            m = t_matches[k]
+            open_tag = m.group(1)
+            if "xml:space" not in open_tag:
+                open_tag += ' xml:space="preserve"'
+            new_body.append(body[bpos:m.start()])
+            new_body.append(f"{open_tag}>{escape(texts[k])}</t>")
+            bpos = m.end()
+        new_body.append(body[bpos:])
+        out.append(xml[pos:item.start(1)])
+        out.append("".join(new_body))
+        pos = item.end(1)
+    if not out:
+        return xml
+    out.append(xml[pos:])
+    return "".join(out)
+
+
+def _part_contains(zf: zipfile.ZipFile, name: str, needle: bytes) -> bool:
+    """逐塊搜尋 part 內容，不需整份載入記憶體"""
+    tail = b""
+    with zf.open(name) as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            if needle in tail + chunk:
+                return True
+            tail = chunk[-(len(needle) - 1):]
+    return False
+
+
+def inline_string_parts(zf: zipfile.ZipFile) -> List[str]:
+    """含 inline string（<is>）的工作表 part"""
+    names = set(zf.namelist())
+    return [part for part in sheet_part_names(zf).values()
+            if part in names and _part_contains(zf, part, b"<is>")]
+
+
+def token_replacements(template_path: Path, values: Mapping[str, str],
+                       lists: Optional[Callable[[str], Any]] = None,
+                       inline_parts: Optional[List[str]] = None
+                       ) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+    """單次讀取 sharedStrings 與 inline string，回傳 (統計, 有修改的 part 內容)
+
+    lists（清單路徑 → 清單）用於展開重複列；未提供時重複 Token 只列入統計。
+    inline_parts 為預先掃描（template_compiler）得到的含 inline string 工作表，
+    提供時不再逐一搜尋每張工作表。
+    """
+    report = new_report()
+    replacements: Dict[str, bytes] = {}
+    resolve = lists or (lambda path: None)
+    try:
+        with zipfile.ZipFile(template_path, "r") as zf:
+            names = set(zf.namelist())
+            shared: List[str] = []
+            if "xl/sharedStrings.xml" in names:
+                xml = zf.read("xl/sharedStrings.xml").decode("utf-8")
+                if "[]" in xml:
+                    shared = [_item_text(m.group(1)) for m in _SI_RE.finditer(xml)]
+                patched = _replace_in_string_items(xml, _SI_RE, values, report)
+                if patched is not xml:
+                    replacements["xl/sharedStrings.xml"] = patched.encode("utf-8")
+            has_repeat = any("[]" in text for text in shared)
+            for part in sheet_part_names(zf).values():
+                if part not in names:
+                    continue
+                if inline_parts is not None:
+                    has_inline = part in inline_parts
+                else:
+                    has_inline = _part_contains(zf, part, b"<is>")
+                if not has_repeat and not has_inline:
+                    continue
+                xml = zf.read(part).decode("utf-8")
+                patched, _ = expand_repeat_rows_xml(xml, shared, resolve, report)
+                if "<is>" in patched:
+                    patched = _replace_in_string_items(patched, _IS_RE, values, report)
+                if patched is not xml:
+                    replacements[part] = patched.encode("utf-8")
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise XlsxPatchUnsupported(f"無法解析 xlsx 套件: {e}")
+    return report, replacements
+
+
+def replace_tokens(template_path: Path, output_path: Optional[Path],
+                   values: Mapping[str, str]) -> Dict[str, Any]:
+    """替換 sharedStrings 與 inline string 中的 {Token}
+
+    values 需提供 get(token)，找不到時回傳 None。output_path 為 None 時只掃描不寫出。
+    回傳 tokens/missing/replaced/count 統計。
+    """
+    report, replacements = token_replacements(template_path, values)
+    if output_path is not None:
+        write_package(template_path, output_path, replacements)
+    return report
+
+
+# ============================================================================
+# 重複列展開
+# ============================================================================
+
+# 公式中的儲存格參照（略過函式名稱、其他工作表的參照與字串常值）
+_FORMULA_REF_RE = re.compile(
+    r"(?<![A-Za-z0-9_.!$])(\$?)([A-Za-z]{1,3})(\$?)([1-9][0-9]*)"
+    r"(?::(\$?)([A-Za-z]{1,3})(\$?)([1-9][0-9]*))?(?![A-Za-z0-9_(!])"
+)
+_RANGE_ATTR_RE = re.compile(
+    r'(<(?:hyperlink|autoFilter|conditionalFormatting|dataValidation)\b[^>]*?\s(?:ref|sqref)=")([^"]*)(")'
+)
+_FORMULA_TAG_RE = re.compile(r"<f[\s>/]")
+_MERGE_CELL_RE = re.compile(r'<mergeCell\s+ref="([^"]*)"\s*/>')
+_MERGE_COUNT_RE = re.compile(r'(<mergeCells\b[^>]*?\scount=")\d+(")')
+
+
+class RowShift:
+    """重複列展開後的列號對應；breaks 為 (範本列, 項目數)，皆為展開前的列號"""
+
+    def __init__(self, breaks: List[Tuple[int, int]]):
+        self.breaks = sorted(breaks)
+        self.templates = {t for t, _ in breaks}
+
+    def point(self, row: int) -> int:
+        """單一儲存格或範圍起點：位於範本列之後的列下移"""
+        return row + sum(n - 1 for t, n in self.breaks if row > t)
+
+    def range_end(self, row: int) -> int:
+        """範圍終點：終點為範本列時延伸至最後一個展開列"""
+        return row + sum(n - 1 for t, n in self.breaks if row >= t)
+
+    def cell(self, ref: str) -> str:
+        """對應表中的儲存格位址（展開前）→ 展開後的位址；位於範本列時拋出 ValueError"""
+        col, row = split_ref(ref)
+        if row in self.templates:
+            raise ValueError(f"對應儲存格 {ref} 位於重複列範本列（第 {row} 列），展開後位置不明確")
+        return f"{column_letters(col)}{self.point(row)}"
+
+
+def _shift_ref_range(ref: str, shift: RowShift) -> str:
+    """平移 'A1'、'A1:C3' 或以空白分隔的多個範圍"""
+    out = []
+    for part in ref.split():
+        bounds = part.split(":")
+        try:
+            c1, r1 = split_ref(bounds[0].replace("$", ""))
+            c2, r2 = split_ref(bounds[-1].replace("$", ""))
+        except XlsxPatchUnsupported:
+            out.append(part)
+            continue
+        start = f"{column_letters(c1)}{shift.point(r1)}"
+        if len(bounds) == 1:
+            out.append(start)
+        else:
+            out.append(f"{start}:{column_letters(c2)}{shift.range_end(r2)}")
+    return " ".join(out)
+
+
+def shift_formula(formula: str, shift: RowShift, clone: Optional[Tuple[int, int]] = None) -> str:
+    """依展開後的列號改寫公式中同一工作表的參照
+
+    clone 為 (範本列, 複本列) 時，指向範本列的相對參照改指向複本列（例如 =B5*C5 → =B7*C7）。
+    其他工作表指向本工作表的參照不會改寫。
+    """
+    def move(row: str, absolute: str, end: bool) -> int:
+        row = int(row)
+        if clone and not absolute and row == clone[0]:
+            return clone[1]
+        return shift.range_end(row) if end else shift.point(row)
+
+    def repl(m) -> str:
+        out = f"{m.group(1)}{m.group(2)}{m.group(3)}{move(m.group(4), m.group(3), False)}"
+        if m.group(6):
+            out += f":{m.group(5)}{m.group(6)}{m.group(7)}{move(m.group(8), m.group(7), True)}"
+        return out
+
+    parts = formula.split('"')
+    for k in range(0, len(parts), 2):
+        parts[k] = _FORMULA_REF_RE.sub(repl, parts[k])
+    return '"'.join(parts)
+
+
+def _repeat_text_value(text: str, lists: Mapping[str, Optional[List[Any]]], index: int,
+                       report: Dict[str, Any]) -> Any:
+    """範本儲存格文字在第 index 列的值：整格只有一個 Token 且值為數值/布林時保留型別"""
+    full = REPEAT_TOKEN_PATTERN.fullmatch(text)
+    if full:
+        items = lists.get(repeat_list_path(full.group(1)))
+        if items is not None:
+            raw = repeat_value(items, index, full.group(1))
+            if isinstance(raw, (bool, int, float)):
+                report["tokens"].add(full.group(1))
+                report["count"] += 1
+                return raw
+    texts = [text]
+    replace_in_texts(texts, RepeatValues(lists, index), report, REPEAT_TOKEN_PATTERN)
+    return texts[0]
+
+
+def _resolve_lists(names: List[str], lists: Dict[str, Optional[List[Any]]],
+                   resolve: Callable[[str], Any], report: Dict[str, Any]) -> Optional[List[Any]]:
+    """解析一列中各 Token 的清單；回傳決定列數的第一個清單（找不到時為 None）"""
+    report["tokens"].update(names)
+    paths = list(dict.fromkeys(repeat_list_path(n) for n in names))
+    for path in paths:
+        if path not in lists:
+            lists[path] = as_list(resolve(path))
+    items = lists[paths[0]]
+    if items is None:
+        report["missing"].update(n for n in names if lists[repeat_list_path(n)] is None)
+    return items
+
+
+def _cell_text(attrs: str, body: str, shared: List[str]) -> Optional[str]:
+    kind = _ATTR_T.search(attrs)
+    kind = kind.group(1) if kind else None
+    if kind == "s":
+        v = _V_RE.search(body)
+        try:
+            return shared[int(v.group(1))] if v else None
+        except (ValueError, IndexError):
+            return None
+    if kind == "inlineStr":
+        m = _IS_RE.search(body)
+        return _item_text(m.group(1)) if m else None
+    return None
+
+
+def _with_ref(cell_xml: str, attrs: str, ref: str) -> str:
+    new_attrs = _ATTR_R.sub(f' r="{ref}"', attrs, count=1)
+    return f"<c{new_attrs}{cell_xml[2 + len(attrs):]}"
+
+
+def _shift_row(row_xml: str, attrs: str, content: str, new_row: int) -> str:
+    cells = []
+    pos = 0
+    for m in _CELL_RE.finditer(content):
+        ref_m = _ATTR_R.search(m.group(1))
+        if not ref_m:
+            raise XlsxPatchUnsupported(f"第 {new_row} 列含無位址的儲存格")
+        col, _ = split_ref(ref_m.group(1))
+        cells.append(content[pos:m.start()])
+        cells.append(_with_ref(m.group(0), m.group(1), f"{column_letters(col)}{new_row}"))
+        pos = m.end()
+    cells.append(content[pos:])
+    new_attrs = _ATTR_R.sub(f' r="{new_row}"', attrs, count=1)
+    if row_xml.endswith("/>") and not content:
+        return f"<row{new_attrs}/>"
+    return f"<row{new_attrs}>{''.join(cells)}</row>"
+
+
+def _expand_row(attrs: str, content: str, first_row: int, count: int,
+                lists: Mapping[str, Optional[List[Any]]], shared: List[str],
+                report: Dict[str, Any]) -> str:
+    cells = []
+    for m in _CELL_RE.finditer(content):
+        ref_m = _ATTR_R.search(m.group(1))
+        if not ref_m:
+            raise XlsxPatchUnsupported(f"第 {first_row} 列含無位址的儲存格")
+        col, _ = split_ref(ref_m.group(1))
+        text = _cell_text(m.group(1), m.group(3) or "", shared)
+        style = _ATTR_S.search(m.group(1))
+        cells.append((m.group(0), m.group(1), column_letters(col),
+                      text if text and REPEAT_TOKEN_PATTERN.search(text) else None,
+                      style.group(1) if style else None))
+    rows = []
+    for i in range(count):
+        row = first_row + i
+        out = []
+        for cell_xml, cell_attrs, letters, text, style in cells:
+            ref = f"{letters}{row}"
+            if text is None:
+                out.append(_with_ref(cell_xml, cell_attrs, ref))
+            else:
+                out.append(_cell_xml(ref, _repeat_text_value(text, lists, i, report), style))
+        row_attrs = _ATTR_R.sub(f' r="{row}"', attrs, count=1)
+        rows.append(f"<row{row_attrs}>{''.join(out)}</row>")
+    return "".join(rows)
+
+
+def _shift_tail(tail: str, shift: RowShift, template_rows: Dict[int, int]) -> str:
+    """平移 sheetData 之後的範圍（合併儲存格、超連結、條件式格式、資料驗證、篩選）"""
+    def merge(m) -> str:
+        bounds = m.group(1).split(":")
+        try:
+            c1, r1 = split_ref(bounds[0])
+            c2, r2 = split_ref(bounds[-1])
+        except XlsxPatchUnsupported:
+            return m.group(0)
+        if r1 == r2 and r1 in template_rows:
+            # 範本列內的合併儲存格複製到每個展開列
+            first = shift.point(r1)
+            return "".join(
+                f'<mergeCell ref="{column_letters(c1)}{first + i}:{column_letters(c2)}{first + i}"/>'
+                for i in range(template_rows[r1])
+            )
+        return f'<mergeCell ref="{_shift_ref_range(m.group(1), shift)}"/>'
+
+    tail = _MERGE_CELL_RE.sub(merge, tail)
+    tail = _MERGE_COUNT_RE.sub(lambda m: f"{m.group(1)}{len(_MERGE_CELL_RE.findall(tail))}{m.group(2)}", tail)
+    tail = tail.replace("<mergeCells count=\"0\"></mergeCells>", "").replace('<mergeCells count="0"/>', "")
+    return _RANGE_ATTR_RE.sub(lambda m: f"{m.group(1)}{_shift_ref_range(m.group(2), shift)}{m.group(3)}", tail)
+
+
+def _repeat_row_scanner(xml: str, shared: List[str], resolve: Callable[[str], Any], report: Dict[str, Any],
+                        lists: Dict[str, Optional[List[Any]]]
+                        ) -> Optional[Callable[[str], Tuple[Optional[List[Any]], List[str]]]]:
+    """回傳判斷單列是否為重複範本列的函式（列內容 → (清單項目或 None, 清單名稱)）；
+    工作表不含 {清單[].欄位} 時回傳 None。解析過的清單快取於 lists。
+    """
+    repeat_shared = [str(i) for i, text in enumerate(shared) if "[]" in text and REPEAT_TOKEN_PATTERN.search(text)]
+    if "[]" not in xml and not repeat_shared:
+        return None
+    shared_re = re.compile(r"<v>(?:%s)</v>" % "|".join(repeat_shared)) if repeat_shared else None
+
+    def scan(content: str) -> Tuple[Optional[List[Any]], List[str]]:
+        if "[]" not in content and not (shared_re is not None and shared_re.search(content)):
+            return None, []
+        names = []
+        for cm in _CELL_RE.finditer(content):
+            text = _cell_text(cm.group(1), cm.group(3) or "", shared)
+            if text and "[]" in text:
+                names.extend(t.group(1) for t in REPEAT_TOKEN_PATTERN.finditer(text))
+        if not names:
+            return None, []
+        return _resolve_lists(names, lists, resolve, report), names
+
+    return scan
+
+
+def repeat_row_shift(template_path: Path, sheet_name: str, resolve: Callable[[str], Any]) -> Optional[RowShift]:
+    """只偵測範本工作表的重複列（不展開），回傳展開後的列號對應；沒有重複列時為 None
+
+    驗證時用來把對應表的儲存格位址換算為輸出文件中的位置。
+    """
+    try:
+        with zipfile.ZipFile(template_path, "r") as zf:
+            parts = sheet_part_names(zf)
+            if sheet_name not in parts:
+                raise SheetNotFoundError(sheet_name)
+            xml = zf.read(parts[sheet_name]).decode("utf-8")
+            shared = read_shared_strings(zf)
+    except (zipfile.BadZipFile, KeyError) as e:
+        if isinstance(e, SheetNotFoundError):
+            raise
+        raise XlsxPatchUnsupported(f"無法解析 xlsx 套件: {e}")
+    scan = _repeat_row_scanner(xml, shared, resolve, new_report(), {})
+    if scan is None:
+        return None
+    breaks: List[Tuple[int, int]] = []
+    for m in _ROW_RE.finditer(xml):
+        items, _ = scan(m.group(3) or "")
+        if items is not None:
+            r_m = _ATTR_R.search(m.group(1))
+            if not r_m:
+                raise XlsxPatchUnsupported("工作表含無列號的 row")
+            breaks.append((int(r_m.group(1)), len(items)))
+    return RowShift(breaks) if breaks else None
+
+
+def expand_repeat_rows_xml(xml: str, shared: Optional[List[str]], resolve: Callable[[str], Any],
+                           report: Optional[Dict[str, Any]] = None) -> Tuple[str, Optional[RowShift]]:
+    """展開工作表 XML 中含 {清單[].欄位} 的範本列，回傳 (展開後 XML, 列號對應)
+
+    resolve(清單路徑) 回傳清單（找不到時為 None，範本列原樣保留並列為缺少）；
+    同一列中第一個清單的項目數決定列數，空清單時移除範本列。範本列之後的各列、
+    合併儲存格與條件式格式等範圍一併下移；沒有展開任何列時列號對應為 None。
+    工作表含公式時拋出 XlsxPatchUnsupported，改由 openpyxl 路徑平移公式。
+    """
+    if report is None:
+        report = new_report()
+    shared = shared or []
+    lists: Dict[str, Optional[List[Any]]] = {}
+    scan = _repeat_row_scanner(xml, shared, resolve, report, lists)
+    if scan is None:
+        return xml, None
+
+    open_m = re.search(r"<sheetData\b[^>]*>", xml)
+    close = xml.find("</sheetData>", open_m.end()) if open_m else -1
+    if close < 0:
+        return xml, None
+
+    rows = report.setdefault("rows", {})
+    breaks: List[Tuple[int, int]] = []
+    out: List[str] = [xml[:open_m.end()]]
+    pos = open_m.end()
+    offset = 0
+    for m in _ROW_RE.finditer(xml, pos, close):
+        attrs, content = m.group(1), m.group(3) or ""
+        items, names = scan(content)
+        if items is None and not offset:
+            continue
+        r_m = _ATTR_R.search(attrs)
+        if not r_m:
+            raise XlsxPatchUnsupported("工作表含無列號的 row")
+        row = int(r_m.group(1))
+        out.append(xml[pos:m.start()])
+        pos = m.end()
+        if items is not None:
+            if _FORMULA_TAG_RE.search(xml):
+                raise XlsxPatchUnsupported("含公式的工作表需由 openpyxl 展開重複列")
+            out.append(_expand_row(attrs, content, row + offset, len(items), lists, shared, report))
+            breaks.append((row, len(items)))
+            path = repeat_list_path(names[0])
+            rows[path] = rows.get(path, 0) + len(items)
+            offset += len(items) - 1
+        else:
+            out.append(_shift_row(m.group(0), attrs, content, row + offset))
+    if not breaks:
+        return xml, None
+    out.append(xml[pos:close])
+
+    shift = RowShift(breaks)
+    head = "".join(out)
+    m = _DIMENSION_RE.search(head)
+    if m:
+        head = head[:m.start()] + f'<dimension ref="{_shift_ref_range(m.group(1), shift)}"/>' + head[m.end():]
+    return head + _shift_tail(xml[close:], shift, dict(breaks)), shift
+
+
+def expand_repeat_rows_worksheet(ws, resolve: Callable[[str], Any],
+                                 report: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """openpyxl 工作表的重複列展開：插入列、平移公式與合併儲存格
+
+    條件式格式與資料驗證的範圍不會調整。回傳 tokens/missing/count/rows 統計。
+    """
+    if report is None:
+        report = new_report()
+    lists: Dict[str, Optional[List[Any]]] = {}
+    rows = report.setdefault("rows", {})
+    templates: Dict[int, List[Any]] = {}
+    breaks: List[Tuple[int, int]] = []
+    for row in ws.iter_rows():
+        names = [
+            t.group(1)
+            for cell in row if isinstance(cell.value, str) and "[]" in cell.value
+            for t in REPEAT_TOKEN_PATTERN.finditer(cell.value)
+        ]
+        if not names:
+            continue
+        items = _resolve_lists(names, lists, resolve, report)
+        if items is None:
+            continue
+        r = row[0].row
+        templates[r] = [(cell.column, cell.value, copy.copy(cell._style)) for cell in row]
+        breaks.append((r, len(items)))
+        path = repeat_list_path(names[0])
+        rows[path] = rows.get(path, 0) + len(items)
+    if not breaks:
+        return report
+    shift = RowShift(breaks)
+
+    # 公式依展開後的列號改寫（範本列的公式於複製時個別處理）
+    for row in ws.iter_rows():
+        for cell in row:
+            if cell.row not in templates and isinstance(cell.value, str) and cell.value.startswith("="):
+                cell.value = shift_formula(cell.value, shift)
+
+    merged = [(str(r), r.min_col, r.min_row, r.max_col, r.max_row) for r in ws.merged_cells.ranges]
+    for ref, *_ in merged:
+        ws.unmerge_cells(ref)
+
+    # 由下往上插入，上方範本列的列號不受影響
+    for t, count in reversed(breaks):
+        height = ws.row_dimensions[t].height
+        if count == 0:
+            ws.delete_rows(t)
+            continue
+        if count > 1:
+            ws.insert_rows(t + 1, count - 1)
+        first = shift.point(t)
+        for i in range(count):
+            for col, value, style in templates[t]:
+                if isinstance(value, str) and "[]" in value and REPEAT_TOKEN_PATTERN.search(value):
+                    value = _repeat_text_value(value, lists, i, report)
+                elif isinstance(value, str) and value.startswith("="):
+                    value = shift_formula(value, shift, clone=(t, first + i))
+                target = ws.cell(row=t + i, column=col)
+                target.value = value
+                target._style = copy.copy(style)
+            if height is not None:
+                ws.row_dimensions[t + i].height = height
+
+    for ref, c1, r1, c2, r2 in merged:
+        if r1 == r2 and r1 in templates:
+            first = shift.point(r1)
+            for i in range(dict(breaks)[r1]):
+                ws.merge_cells(start_row=first + i, start_column=c1, end_row=first + i, end_column=c2)
+        else:
+            ws.merge_cells(start_row=shift.point(r1), start_column=c1,
+                           end_row=shift.range_end(r2), end_column=c2)
+    return report
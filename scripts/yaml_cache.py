@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Spec Sync SSOT - 共用 YAML 載入（libyaml C 解析器＋磁碟解析快取）
+
+- 有安裝 libyaml 時使用 yaml.CSafeLoader，否則使用純 Python 的 SafeLoader
+- 解析結果以 marshal 格式快取於 output/.cache/yaml/，以檔案內容 SHA-256 為鍵；
+  檔案未變更時（重複執行 CLI、CI 各步驟、Web 後端重啟）直接讀取快取，不需解析 YAML
+- 快取位置：檔案位於專案的 ssot/ 或 mapping/ 目錄（含子目錄，例如分割後的 SSOT）時
+  為同層的 output/.cache/yaml，或以環境變數 SPEC_SYNC_YAML_CACHE 指定；設為 "off" 則停用磁碟快取
+"""
+
+import datetime
+import hashlib
+import logging
+import marshal
+import os
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+USING_LIBYAML = SafeLoader is not yaml.SafeLoader
+
+CACHE_VERSION = 1
+CACHE_ENV = "SPEC_SYNC_YAML_CACHE"
+PROJECT_DATA_DIRS = ("ssot", "mapping")
+
+# marshal 不支援日期型別，以 tuple 標記（safe_load 本身不會產生 tuple）
+_DATE_TAG = "__date__"
+_DATETIME_TAG = "__datetime__"
+
+
+def parse_yaml(raw) -> Any:
+    """以最快的可用解析器解析 YAML 文字或 bytes"""
+    return yaml.load(raw, Loader=SafeLoader)
+
+
+def default_cache_dir(path: Path) -> Optional[Path]:
+    env = os.getenv(CACHE_ENV)
+    if env:
+        return None if env.lower() in ("off", "0", "false") else Path(env)
+    for parent in Path(path).resolve().parents:
+        if parent.name in PROJECT_DATA_DIRS:
+            return parent.parent / "output" / ".cache" / "yaml"
+    return None
+
+
+def _encode(obj):
+    if isinstance(obj, dict):
+        return {k: _encode(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_encode(v) for v in obj]
+    if isinstance(obj, datetime.datetime):
+        return (_DATETIME_TAG, obj.isoformat())
+    if isinstance(obj, datetime.date):
+        return (_DATE_TAG, obj.isoformat())
+    return obj
+
+
+def _decode(obj):
+    if isinstance(obj, dict):
+        return {k: _decode(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_decode(v) for v in obj]
+    if isinstance(obj, tuple) and len(obj) == 2:
+        if obj[0] == _DATETIME_TAG:
+            return datetime.datetime.fromisoformat(obj[1])
+        if obj[0] == _DATE_TAG:
+            return datetime.date.fromisoformat(obj[1])
+    return obj
+
+
+def _cache_prefix(path: Path) -> str:
+    """同名檔案（例如不同分割目錄下的 risks.yaml）以路徑雜湊區分"""
+    location = hashlib.sha256(str(Path(path).resolve()).encode('utf-8')).hexdigest()[:8]
+    return f"{Path(path).stem}-{location}"
+
+
+def _cache_file(cache_dir: Path, path: Path, digest: str) -> Path:
+    return cache_dir / f"{_cache_prefix(path)}-{digest[:24]}.v{CACHE_VERSION}.marshal"
+
+
+def _read_cache(cache_file: Path) -> Tuple[bool, Any]:
+    try:
+        with open(cache_file, "rb") as f:
+            tagged, data = marshal.load(f)
+    except FileNotFoundError:
+        return False, None
+    except (OSError, EOFError, ValueError, TypeError) as e:
+        logger.debug(f"YAML 快取無法讀取，將重新解析: {e}")
+        return False, None
+    return True, _decode(data) if tagged else data
+
+
+def _write_cache(cache_file: Path, path: Path, data: Any):
+    try:
+        try:
+            payload = marshal.dumps((False, data))
+        except ValueError:
+            payload = marshal.dumps((True, _encode(data)))
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(payload)
+        os.replace(tmp, cache_file)
+        # 同一來源檔案只保留最新版本的快取
+        for old in cache_file.parent.glob(f"{_cache_prefix(path)}-*.marshal"):
+            if old != cache_file:
+                old.unlink()
+    except (OSError, ValueError) as e:
+        logger.debug(f"寫入 YAML 快取失敗: {e}")
+
+
+def load_yaml_bytes(raw: bytes, path: Path, digest: Optional[str] = None,
+                    cache_dir: Optional[Path] = None) -> Any:
+    """解析已讀入的 YAML 內容；cache_dir 未指定時依 path 決定快取位置"""
+    cache_dir = cache_dir if cache_dir is not None else default_cache_dir(path)
+    if cache_dir is None:
+        return parse_yaml(raw)
+    digest = digest or hashlib.sha256(raw).hexdigest()
+    cache_file = _cache_file(Path(cache_dir), path, digest)
+    hit, data = _read_cache(cache_file)
+    if hit:
+        return data
+    data = parse_yaml(raw)
+    _write_cache(cache_file, path, data)
+    return data
+
+
+def load_yaml_digest(path: Path, cache_dir: Optional[Path] = None) -> Tuple[Any, str]:
+    """載入 YAML 檔案，回傳 (資料, 內容 SHA-256)"""
+    raw = Path(path).read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    return load_yaml_bytes(raw, path, digest, cache_dir), digest
+
+
+def load_yaml(path: Path, cache_dir: Optional[Path] = None) -> Any:
+    """載入 YAML 檔案（使用 C 解析器與磁碟快取）"""
+    return load_yaml_digest(path, cache_dir)[0]
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+測試案例 - Web 後端 SSOT/對應表解析快取
+"""
+
+import os
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "web-ui" / "backend"))
+
+from data_cache import CachedYamlFile
+
+
+class TestCachedYamlFile(unittest.TestCase):
+    """YAML 快取測試"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "master.yaml"
+        self.path.write_text("product:\n  name: HP Tim\n", encoding='utf-8')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_parse_once_and_reload_on_change(self):
+        """測試未變更時不重新解析，檔案修改後自動重新載入"""
+        cache = CachedYamlFile(self.path)
+        calls = []
+        for _ in range(3):
+            self.assertEqual(cache.get()['product']['name'], 'HP Tim')
+            cache.derived('names', lambda data: calls.append(1) or list(data))
+        self.assertEqual(cache.loads, 1)
+        self.assertEqual(len(calls), 1)
+        etag = cache.etag
+
+        self.path.write_text("product:\n  name: HP Tim 2\n", encoding='utf-8')
+        st = self.path.stat()
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        self.assertEqual(cache.get()['product']['name'], 'HP Tim 2')
+        self.assertNotEqual(cache.etag, etag)
+        cache.derived('names', lambda data: calls.append(1) or list(data))
+        self.assertEqual(len(calls), 2)
+
+    def test_invalidate(self):
+        """測試 invalidate 後重新載入（即使 mtime 與大小未變）"""
+        cache = CachedYamlFile(self.path)
+        cache.get()
+        cache.invalidate()
+        etag, value = cache.snapshot('keys', lambda data: sorted(data))
+        self.assertEqual(value, ['product'])
+        self.assertEqual(etag, cache.etag)
+        self.assertEqual(cache.loads, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
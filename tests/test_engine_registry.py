@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+測試案例 - 引擎能力登錄與路由
+"""
+
+import os
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from engine_registry import Capabilities, EngineRouter, capabilities
+
+
+class FakeCapabilities(Capabilities):
+    """python-docx 與 Office 皆可用的能力（不實際載入模組）"""
+
+    def __init__(self):
+        self.Document = object()
+        self.load_workbook = object()
+        self.win32com = object()
+        self.office_unavailable = None
+
+
+class TestEngineRouter(unittest.TestCase):
+    """引擎路由測試"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.template = Path(self._tmp.name) / "t.docx"
+        self.template.write_bytes(b"v1")
+        self.router = EngineRouter(FakeCapabilities())
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_remembers_successful_engine(self):
+        """測試 auto 模式先嘗試成功過的引擎並保留備援，模板變更後重新依預設順序嘗試"""
+        self.assertEqual(self.router.order('word', self.template), ['pure', 'office'])
+        self.router.record('word', self.template, 'pure', False)
+        self.router.record('word', self.template, 'office', True)
+        self.assertEqual(self.router.order('word', self.template), ['office', 'pure'])
+        self.assertEqual(self.router.order('word', self.template, 'pure'), ['pure'])
+        self.assertEqual(self.router.status()['routes']['word:t.docx'],
+                         {'engine': 'office', 'failed': ['pure']})
+
+        # 先前成功的引擎之後失敗（例如 SSOT 資料問題），其他引擎仍會嘗試
+        self.router.record('word', self.template, 'office', False)
+        self.assertEqual(self.router.order('word', self.template), ['pure', 'office'])
+        self.router.record('word', self.template, 'pure', True)
+        self.assertEqual(self.router.order('word', self.template), ['pure', 'office'])
+
+        self.template.write_bytes(b"v2-changed")
+        os.utime(self.template, ns=(1, 1))
+        self.assertEqual(self.router.order('word', self.template), ['pure', 'office'])
+
+    def test_office_unavailable_skipped(self):
+        """測試 Office 無法啟動後不再嘗試；已知失敗但沒有替代引擎時仍會嘗試"""
+        self.router.mark_office_unavailable("Dispatch failed")
+        self.assertEqual(self.router.order('excel', self.template), ['pure'])
+        self.router.record('excel', self.template, 'pure', False)
+        self.assertEqual(self.router.order('excel', self.template), ['pure'])
+        self.assertFalse(self.router.status()['capabilities']['office_com'])
+
+    def test_probe_once(self):
+        """測試能力探測在行程內只執行一次"""
+        self.assertIs(capabilities(), capabilities())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+測試案例 - 欄位建議索引比對（auto_bookmark_helper）
+"""
+
+import random
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from scripts.field_matcher import FieldIndex
+from scripts.auto_bookmark_helper import calculate_similarity
+
+try:
+    from docx import Document
+    from scripts.auto_bookmark_helper import batch_scan, export_batch_mapping, extract_potential_fields_from_docx
+except ImportError as e:
+    print(f"無法載入模組: {e}")
+    Document = None
+
+
+class TestFieldIndex(unittest.TestCase):
+    """索引比對測試"""
+
+    def test_matches_linear_scan(self):
+        """測試索引查詢結果與逐一計算相似度相同"""
+        rng = random.Random(7)
+        words = ['name', 'version', 'cpu', 'ram', 'disk', 'os', 'port', '名稱', '版本', '記憶體', 'x']
+        ssot = {}
+        for i in range(300):
+            key = '.'.join(rng.choice(words) + str(rng.randrange(3)) for _ in range(rng.randint(1, 3)))
+            ssot[key] = i
+        index = FieldIndex(ssot)
+
+        for _ in range(200):
+            field = ''.join(rng.choice(words + [' ', '產品']) for _ in range(rng.randint(1, 3)))
+            best, best_score = None, 0
+            for key in ssot:
+                score = calculate_similarity(field.lower(), key.lower())
+                if score > best_score:
+                    best, best_score = key, score
+            self.assertEqual(index.best_match(field), (best, best_score) if best else (None, 0.0))
+
+    def test_top_k_ranking(self):
+        """測試候選依分數與 SSOT 順序排列"""
+        index = FieldIndex({'product.model': 1, 'product.name': 2, 'cpu.name': 3, 'model': 4})
+        self.assertEqual(
+            index.candidates('產品名稱', k=3),
+            [('product.name', 0.8), ('cpu.name', 0.8)]
+        )
+        self.assertEqual(index.candidates('model', k=3), [('product.model', 0.5), ('model', 0.5)])
+
+
+class TestExtractFields(unittest.TestCase):
+    """欄位偵測測試"""
+
+    def test_keyword_fields_deduplicated(self):
+        """測試重複的關鍵字段落只列出一次"""
+        if Document is None:
+            self.skipTest("python-docx not available")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "spec.docx"
+            doc = Document()
+            doc.add_paragraph("產品名稱: ____")
+            doc.add_paragraph("記憶體規格")
+            doc.add_paragraph("記憶體規格")
+            doc.save(str(path))
+            fields = extract_potential_fields_from_docx(str(path))
+        names = [f['field_name'] for f in fields]
+        self.assertEqual(names.count('記憶體規格'), 1)
+        self.assertEqual(len(names), len(set(names)))
+
+
+class TestBatchScan(unittest.TestCase):
+    """批次掃描測試"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("python-docx not available")
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.templates = self.root / "templates"
+        self.templates.mkdir()
+        for i in range(3):
+            self._write(i, f"產品名稱: ____\n記憶體 {i}")
+        self.ssot = self.root / "master.yaml"
+        self.ssot.write_text("product:\n  name: HP Tim\nhardware:\n  memory: 16GB\n", encoding='utf-8')
+        self.cache = str(self.root / ".cache" / "scan.json")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, i, text):
+        doc = Document()
+        for line in text.split("\n"):
+            doc.add_paragraph(line)
+        doc.save(str(self.templates / f"spec_{i}.docx"))
+
+    def test_merged_mapping_and_cache(self):
+        """測試合併對應表，且重新執行時只掃描變更的模板"""
+        results = batch_scan(self.templates, str(self.ssot), jobs=2, cache_path=self.cache)
+        self.assertEqual(sorted(results), ['spec_0', 'spec_1', 'spec_2'])
+        self.assertFalse(any(r['cached'] for r in results.values()))
+        self.assertEqual(results['spec_0']['fields'][0]['suggested_ssot_path'], 'product.name')
+
+        self._write(1, "作業系統: ____")
+        results = batch_scan(self.templates, str(self.ssot), jobs=2, cache_path=self.cache)
+        self.assertEqual({n for n, r in results.items() if not r['cached']}, {'spec_1'})
+
+        import yaml
+        mapping_path = export_batch_mapping(results, str(self.root / "mapping" / "auto.yaml"))
+        with open(mapping_path, encoding='utf-8') as f:
+            mapping = yaml.safe_load(f)
+        self.assertEqual(len(mapping['word_mappings']), 3)
+        self.assertIn('product.name', mapping['word_mappings']['spec_0']['mappings'])
+        self.assertEqual(mapping['word_mappings']['spec_0']['file_path'], results['spec_0']['file_path'])
+
+
+if __name__ == "__main__":
+    unittest.main()
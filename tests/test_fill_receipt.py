@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+測試案例 - 填寫收據（產生時記錄位置，驗證時只讀取記錄的位置）
+"""
+
+import os
+import tempfile
+import unittest
+import sys
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+try:
+    import yaml
+    from docx import Document
+    from openpyxl import Workbook
+    from generate_docs import SpecSyncEngine
+    from instrumentation import Tracer, activate
+    from output_store import OutputStore
+    from validate_consistency import ConsistencyValidator
+except ImportError as e:
+    print(f"無法載入模組: {e}")
+    Document = None
+
+
+class TestFillReceipt(unittest.TestCase):
+    """填寫收據測試"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("python-docx/openpyxl not available")
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        for name in ("ssot", "mapping", "templates", "output"):
+            (self.root / name).mkdir()
+        doc = Document()
+        doc.add_paragraph("下一版 v2.0.0 規劃中")
+        doc.add_paragraph("產品: {ProductName} 版本: {ProductVersion}")
+        doc.save(str(self.root / "templates" / "spec.docx"))
+        wb = Workbook()
+        wb.active.title = "規格表"
+        wb.save(str(self.root / "templates" / "sheet.xlsx"))
+        mapping = {
+            'mapping_version': '1.0.0',
+            'word_mappings': {'spec': {
+                'file_path': "templates/spec.docx",
+                'mappings': {'product.name': 'ProductName', 'product.version': 'ProductVersion'},
+            }},
+            'excel_mappings': {'sheet': {
+                'file_path': "templates/sheet.xlsx",
+                'sheet_name': "規格表",
+                'mappings': {'product.name': 'B2', 'project.budget': 'B3'},
+            }},
+        }
+        with open(self.root / "mapping" / "customer_mapping.yaml", 'w', encoding='utf-8') as f:
+            yaml.safe_dump(mapping, f, allow_unicode=True)
+        self.write_ssot('v1.0.0')
+        self._engine_env = os.environ.get("SPEC_SYNC_ENGINE")
+        os.environ["SPEC_SYNC_ENGINE"] = "pure"
+
+    def tearDown(self):
+        if self._engine_env is None:
+            os.environ.pop("SPEC_SYNC_ENGINE", None)
+        else:
+            os.environ["SPEC_SYNC_ENGINE"] = self._engine_env
+        self._tmp.cleanup()
+
+    def write_ssot(self, version: str):
+        ssot = {'version': '1.0.0', 'product': {'name': 'HP <Tim>', 'version': version},
+                'project': {'budget': 100000}}
+        with open(self.root / "ssot" / "master.yaml", 'w', encoding='utf-8') as f:
+            yaml.safe_dump(ssot, f, allow_unicode=True)
+
+    def validate(self):
+        tracer = Tracer()
+        with activate(tracer):
+            ok, errors = ConsistencyValidator(str(self.root)).validate_all_documents()
+        return ok, errors, tracer.summary()
+
+    def test_receipts_written_and_used(self):
+        """測試產生時寫入收據，驗證只讀取記錄的位置"""
+        self.assertTrue(SpecSyncEngine(str(self.root)).generate_all_documents())
+        store = OutputStore(self.root / "output")
+        word = store.receipt(store.latest('word:spec')['digest'])
+        excel = store.receipt(store.latest('excel:sheet')['digest'])
+        self.assertEqual([f['value'] for f in word['fills']], ['HP <Tim>', 'v1.0.0'])
+        self.assertEqual({f['cell']: f['value'] for f in excel['fills']}, {'B2': 'HP <Tim>', 'B3': 100000})
+
+        ok, errors, summary = self.validate()
+        self.assertTrue(ok, errors)
+        self.assertIn('receipt', summary['phases'])
+        self.assertNotIn('extract_text', summary['phases'])
+
+    def test_no_false_positive(self):
+        """測試值恰好出現在文件其他位置時不會誤判通過"""
+        SpecSyncEngine(str(self.root)).generate_all_documents()
+        self.write_ssot('v2.0.0')
+        ok, errors, _ = self.validate()
+        self.assertFalse(ok)
+        self.assertEqual(errors, ["Word文件中找不到 product.version 的值: v2.0.0"])
+
+    def test_modified_output_falls_back(self):
+        """測試輸出被修改（part 雜湊不符）時改用完整掃描"""
+        SpecSyncEngine(str(self.root)).generate_all_documents()
+        output = OutputStore(self.root / "output").latest_path('word:spec')
+        with zipfile.ZipFile(output) as zf:
+            parts = {name: zf.read(name) for name in zf.namelist()}
+        parts['word/document.xml'] = parts['word/document.xml'].replace("規劃中".encode(), "已發布".encode())
+        output.unlink()
+        with zipfile.ZipFile(output, 'w') as zf:
+            for name, data in parts.items():
+                zf.writestr(name, data)
+
+        ok, errors, summary = self.validate()
+        self.assertTrue(ok, errors)
+        self.assertEqual(summary['counters'].get('fallback.full_scan'), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+測試案例 - Web 後端產生歷史記錄（SQLite）
+"""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "web-ui" / "backend"))
+
+from history_store import DEFAULT_KEEP, HistoryStore, open_history_store
+
+
+def make_record(i: int, template: str = 'a.docx', status: str = 'success') -> dict:
+    return {
+        'job_id': f'job{i}',
+        'timestamp': f'2025-01-{i + 1:02d}T10:00:00',
+        'engine': 'auto',
+        'templates': [template],
+        'results': [{'template': template, 'status': status}],
+    }
+
+
+class TestHistoryStore(unittest.TestCase):
+    """歷史記錄測試"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_paging_and_filters(self):
+        """測試最新的在前、分頁與依模板／狀態／日期篩選"""
+        store = HistoryStore(self.root / "history.db")
+        for i in range(10):
+            store.append(make_record(i, 'a.docx' if i % 2 else 'b.xlsx', 'error' if i == 9 else 'success'))
+
+        page, total = store.query(limit=3, offset=1)
+        self.assertEqual(total, 10)
+        self.assertEqual([r['job_id'] for r in page], ['job8', 'job7', 'job6'])
+        _, total = store.query(template='a.docx')
+        self.assertEqual(total, 5)
+        errors, _ = store.query(status='error')
+        self.assertEqual([r['job_id'] for r in errors], ['job9'])
+        dated, _ = store.query(since='2025-01-03', until='2025-01-04')
+        self.assertEqual([r['job_id'] for r in dated], ['job3', 'job2'])
+        store.close()
+
+    def test_retention_and_concurrent_writes(self):
+        """測試保留筆數上限（含模板索引），多執行緒同時寫入不遺失"""
+        store = HistoryStore(self.root / "history.db", keep=20)
+        threads = [threading.Thread(target=lambda n=n: [store.append(make_record(n)) for _ in range(10)])
+                   for n in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        _, total = store.query()
+        self.assertEqual(total, 20)
+        _, by_template = store.query(template='a.docx')
+        self.assertEqual(by_template, 20)
+        store.close()
+
+    def test_default_keep(self):
+        """測試預設只保留最新 DEFAULT_KEEP 筆，id 不連續時仍依最新筆數保留"""
+        os.environ.pop('SPEC_SYNC_HISTORY_KEEP', None)
+        store = open_history_store(self.root)
+        for i in range(DEFAULT_KEEP + 5):
+            store.append(make_record(i))
+        with store._conn:
+            store._conn.execute("DELETE FROM generations WHERE id = (SELECT MAX(id) - 1 FROM generations)")
+        store.append(make_record(999))
+        history, total = store.query(limit=DEFAULT_KEEP + 10)
+        self.assertEqual(total, DEFAULT_KEEP)
+        self.assertEqual(history[0]['job_id'], 'job999')
+        self.assertNotIn(f'job{DEFAULT_KEEP + 3}', [r['job_id'] for r in history])
+        self.assertEqual(history[-1]['job_id'], 'job5')
+        store.close()
+
+    def test_migrate_legacy_json(self):
+        """測試匯入舊版 generation_history.json（最新的在前）後改名"""
+        legacy = [make_record(2), make_record(1), make_record(0)]
+        (self.root / "generation_history.json").write_text(json.dumps(legacy), encoding='utf-8')
+        store = open_history_store(self.root)
+        history, _ = store.query()
+        self.assertEqual(history, legacy)
+        self.assertTrue((self.root / "generation_history.json.migrated").exists())
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+測試案例 - SSOT 變更影響分析（反向索引、結構化差異、只重新產生受影響的模板）
+"""
+
+import os
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from impact_analysis import analyze, build_index, diff_ssot
+
+try:
+    import yaml
+    from docx import Document
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+    from openpyxl import Workbook
+    from generate_docs import SpecSyncEngine
+except ImportError as e:
+    print(f"無法載入模組: {e}")
+    Document = None
+
+
+class TestDiffSsot(unittest.TestCase):
+    """結構化差異測試"""
+
+    def test_diff(self):
+        """測試只列出最深一層的差異，新增的區塊與清單項目只列一次，型別改變視為修改"""
+        old = {'product': {'name': 'HP', 'version': '1.0'}, 'reqs': [{'title': 'A'}], 'budget': 1}
+        new = {'product': {'name': 'HP', 'version': '1.1'}, 'reqs': [{'title': 'A'}, {'title': 'B'}],
+               'budget': 1.0, 'team': {'lead': 'Tim'}}
+        changes = {c['path']: c['change'] for c in diff_ssot(old, new)}
+        self.assertEqual(changes, {'product.version': 'modified', 'reqs[1]': 'added',
+                                   'budget': 'modified', 'team': 'added'})
+        self.assertEqual(diff_ssot(old, old), [])
+
+
+class TestImpactAnalysis(unittest.TestCase):
+    """反向索引與選擇性重新產生測試"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("python-docx/openpyxl not available")
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        for name in ("ssot", "mapping", "templates", "output"):
+            (self.root / name).mkdir()
+        doc = Document()
+        doc.sections[0].header.paragraphs[0].text = "版本 {ProductVersion}"
+        p = doc.add_paragraph("產品: {Product")
+        p.add_run("Name}")
+        # Office 路徑填入的真正書籤（模板中沒有 Token）
+        lead = doc.add_paragraph("負責人: ")
+        start, end = OxmlElement('w:bookmarkStart'), OxmlElement('w:bookmarkEnd')
+        start.set(qn('w:id'), '0')
+        start.set(qn('w:name'), 'ProjectLead')
+        end.set(qn('w:id'), '0')
+        lead._p.append(start)
+        lead._p.append(end)
+        table = doc.add_table(rows=1, cols=1)
+        table.cell(0, 0).text = "{reqs[].title}"
+        doc.save(str(self.root / "templates" / "spec.docx"))
+        wb = Workbook()
+        wb.active.title = "規格表"
+        wb.save(str(self.root / "templates" / "sheet.xlsx"))
+        mapping = {
+            'mapping_version': '1.0.0',
+            'word_mappings': {'spec': {
+                'file_path': "templates/spec.docx",
+                'mappings': {'product.name': 'ProductName', 'product.version': 'ProductVersion',
+                             'project.budget': 'Budget', 'project.lead': 'ProjectLead'},
+                'lists': {'reqs': 'specifications.functional_requirements'},
+            }},
+            'excel_mappings': {'sheet': {
+                'file_path': "templates/sheet.xlsx",
+                'sheet_name': "規格表",
+                'mappings': {'product.name': 'B2', 'project.budget': 'B3'},
+            }},
+        }
+        with open(self.root / "mapping" / "customer_mapping.yaml", 'w', encoding='utf-8') as f:
+            yaml.safe_dump(mapping, f, allow_unicode=True)
+        self.ssot = {
+            'version': '1.0.0',
+            'product': {'name': 'HP Tim', 'version': 'v1.0.0'},
+            'project': {'budget': 100000},
+            'specifications': {'functional_requirements': [{'id': 'FR-1', 'title': '登入'}]},
+        }
+        self._engine_env = os.environ.get("SPEC_SYNC_ENGINE")
+        os.environ["SPEC_SYNC_ENGINE"] = "pure"
+
+    def tearDown(self):
+        if self._engine_env is None:
+            os.environ.pop("SPEC_SYNC_ENGINE", None)
+        else:
+            os.environ["SPEC_SYNC_ENGINE"] = self._engine_env
+        self._tmp.cleanup()
+
+    def affected(self, new):
+        report = analyze(build_index(self.root), diff_ssot(self.ssot, new))
+        return {t['key']: sorted(loc['location'] for loc in t['locations']) for t in report['templates']}
+
+    def test_index_uses_template_tokens(self):
+        """測試索引包含頁首、拆成多個 run 的 Token、書籤與重複區域，模板中沒有的 Token 不列入"""
+        by_path = {path: sorted(c.location for c in consumers)
+                   for path, consumers in build_index(self.root).by_path().items()}
+        self.assertEqual(by_path['product.name'], ['{ProductName}', '規格表!B2'])
+        self.assertEqual(by_path['product.version'], ['{ProductVersion}'])
+        self.assertEqual(by_path['project.budget'], ['規格表!B3'])
+        self.assertEqual(by_path['project.lead'], ['書籤 ProjectLead'])
+        self.assertEqual(by_path['specifications.functional_requirements[].title'], ['{reqs[].title}'])
+        self.assertTrue((self.root / "output" / ".cache" / "template_tokens.json").exists())
+
+    def test_affected_locations(self):
+        """測試欄位、上層區塊與清單項目的變更對應到正確的模板與位置"""
+        new = yaml.safe_load(yaml.safe_dump(self.ssot, allow_unicode=True))
+        new['product']['version'] = 'v2.0.0'
+        self.assertEqual(self.affected(new), {'word:spec': ['{ProductVersion}']})
+
+        new['project'] = {'budget': 200000}
+        new['specifications']['functional_requirements'][0]['id'] = 'FR-9'
+        self.assertEqual(self.affected(new), {'word:spec': ['{ProductVersion}'], 'excel:sheet': ['規格表!B3']})
+
+        new['specifications']['functional_requirements'].append({'id': 'FR-2', 'title': '登出'})
+        self.assertEqual(self.affected(new)['word:spec'], ['{ProductVersion}', '{reqs[].title}'])
+
+    def test_regenerate_only_affected(self):
+        """測試 generate_all_documents 只處理指定的模板"""
+        engine = SpecSyncEngine(str(self.root))
+        with open(self.root / "ssot" / "master.yaml", 'w', encoding='utf-8') as f:
+            yaml.safe_dump(self.ssot, f, allow_unicode=True)
+        self.assertTrue(engine.generate_all_documents(only=['excel:sheet']))
+        self.assertEqual([r['template'] for r in engine.last_results], ['sheet'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+測試案例 - Web 後端背景工作佇列
+"""
+
+import threading
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "web-ui" / "backend"))
+
+from jobs import JobManager, QueueFull
+
+
+class TestJobManager(unittest.TestCase):
+    """背景工作測試"""
+
+    def test_progress_and_events(self):
+        """測試工作完成後可查詢結果，進度事件即時送出"""
+        events = []
+        manager = JobManager(max_workers=1, emit=lambda event, payload: events.append(event))
+
+        def work(job):
+            job.progress['total'] = 2
+            for name in ('a.docx', 'b.xlsx'):
+                job.results.append({'template': name, 'status': 'success'})
+                manager.emit('generate_progress', {'template': name})
+
+        job = manager.submit('generate', {}, work)
+        self.assertTrue(job.wait(5))
+        self.assertEqual(manager.get(job.id).status, 'succeeded')
+        self.assertEqual(len(job.to_dict()['results']), 2)
+        self.assertEqual(events, ['generate_progress', 'generate_progress'])
+
+    def test_cancel_running_and_queued(self):
+        """測試執行中的工作於中斷點停止、排隊中的工作立即取消"""
+        manager = JobManager(max_workers=1)
+        started = threading.Event()
+
+        def slow(job):
+            started.set()
+            while True:
+                job.check_cancelled()
+                job.wait_cancel(0.01)
+
+        running = manager.submit('generate', {}, slow)
+        queued = manager.submit('generate', {}, lambda job: None)
+        self.assertTrue(started.wait(5))
+        manager.cancel(queued.id)
+        manager.cancel(running.id)
+        self.assertTrue(running.wait(5))
+        self.assertEqual(running.status, 'cancelled')
+        self.assertEqual(queued.status, 'cancelled')
+
+    def test_failure_and_queue_limit(self):
+        """測試失敗訊息與排隊上限"""
+        manager = JobManager(max_workers=1, max_pending=1)
+        gate = threading.Event()
+        started = threading.Event()
+
+        def fail(job):
+            started.set()
+            gate.wait(5)
+            raise RuntimeError("boom")
+
+        first = manager.submit('generate', {}, fail)
+        self.assertTrue(started.wait(5))
+        manager.submit('generate', {}, lambda job: None)
+        with self.assertRaises(QueueFull):
+            manager.submit('generate', {}, lambda job: None)
+        gate.set()
+        self.assertTrue(first.wait(5))
+        self.assertEqual(first.status, 'failed')
+        self.assertEqual(first.error, 'boom')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+測試案例 - 編譯後的欄位對應與 SSOT 路徑存取
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from scripts.mapping_plan import (
+    CompiledMapping,
+    SsotTable,
+    get_nested_value,
+    load_compiled_mapping,
+    parse_path,
+)
+
+SSOT = {
+    'product': {'name': 'HP Tim', 'version': 'v1.0.0'},
+    'specifications': {
+        'functional_requirements': [
+            {'requirement_id': 'FR001', 'title': '開機'},
+            {'requirement_id': 'FR002', 'title': '關機'},
+        ],
+    },
+}
+
+
+class TestPathAccess(unittest.TestCase):
+    """路徑解析與取值測試"""
+
+    def test_parse_path_with_index(self):
+        """測試清單索引解析"""
+        self.assertEqual(
+            parse_path('specifications.functional_requirements[1].title'),
+            ('specifications', 'functional_requirements', 1, 'title')
+        )
+
+    def test_get_nested_value(self):
+        """測試巢狀與清單取值"""
+        self.assertEqual(get_nested_value(SSOT, 'product.name'), 'HP Tim')
+        self.assertEqual(
+            get_nested_value(SSOT, 'specifications.functional_requirements[0].title'), '開機'
+        )
+        self.assertIsNone(get_nested_value(SSOT, 'specifications.functional_requirements[5].title'))
+        self.assertIsNone(get_nested_value(SSOT, 'product.name.first'))
+
+    def test_ssot_table(self):
+        """測試扁平化對照表與逐層取值一致"""
+        table = SsotTable(SSOT)
+        self.assertEqual(table.get('specifications.functional_requirements[1].requirement_id'), 'FR002')
+        self.assertEqual(table.get('product'), SSOT['product'])
+        self.assertIsNone(table.get('product.missing'))
+
+
+class TestCompiledMapping(unittest.TestCase):
+    """對應表編譯測試"""
+
+    def test_template_plans(self):
+        """測試每個模板的填寫計畫"""
+        compiled = CompiledMapping({
+            'word_mappings': {
+                'w1': {'file_path': 'templates/w1.docx',
+                       'mappings': {'product.name': 'ProductName',
+                                    'specifications.functional_requirements[0].title': 'FR1'}},
+            },
+            'excel_mappings': {
+                'x1': {'file_path': 'templates/x1.xlsx', 'mappings': {'product.version': 'B2'}},
+            },
+        })
+        word = compiled.get('word', 'w1')
+        self.assertEqual(word.template_file, 'w1.docx')
+        self.assertEqual(word.token_values(SsotTable(SSOT)), {'ProductName': 'HP Tim', 'FR1': '開機'})
+        self.assertEqual(compiled.get('excel', 'x1').sheet_name, 'Sheet1')
+
+    def test_load_compiled_mapping_is_cached(self):
+        """測試相同內容的對應表只編譯一次"""
+        path = Path(__file__).parent.parent / "mapping" / "customer_mapping.yaml"
+        self.assertIs(load_compiled_mapping(path), load_compiled_mapping(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
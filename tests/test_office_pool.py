@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+測試案例 - Office COM 應用程式池（以 FakeComBackend 在任何平台測試）
+"""
+
+import threading
+import time
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from scripts.office_pool import FakeComBackend, OfficeAppPool
+
+
+class TestOfficeAppPool(unittest.TestCase):
+    """實例池測試"""
+
+    def test_reuses_warm_instance(self):
+        """測試同一實例被重複使用"""
+        backend = FakeComBackend()
+        pool = OfficeAppPool(backend, size=1, recycle_after=100)
+        for _ in range(5):
+            with pool.session('word'):
+                pass
+        self.assertEqual(len(backend.created), 1)
+        self.assertEqual(pool.stats['documents'], 5)
+        pool.close_all()
+        self.assertEqual(len(backend.closed), 1)
+
+    def test_recycles_after_k_documents(self):
+        """測試處理 K 份文件後回收"""
+        backend = FakeComBackend()
+        pool = OfficeAppPool(backend, size=1, recycle_after=2)
+        for _ in range(5):
+            with pool.session('excel'):
+                pass
+        self.assertEqual(len(backend.created), 3)
+        self.assertEqual(pool.stats['recycled'], 2)
+
+    def test_unhealthy_instance_replaced(self):
+        """測試失效實例被丟棄並重建"""
+        backend = FakeComBackend()
+        pool = OfficeAppPool(backend, size=1, recycle_after=100)
+        with pool.session('word') as app:
+            first = app
+        first.alive = False
+        with pool.session('word') as app:
+            self.assertIsNot(app, first)
+        with self.assertRaises(RuntimeError):
+            with pool.session('word') as app:
+                app.alive = False
+                raise RuntimeError("automation failed")
+        self.assertEqual(pool.stats['discarded'], 2)
+
+    def test_size_limits_concurrent_instances(self):
+        """測試同時使用的實例數不超過上限"""
+        backend = FakeComBackend()
+        pool = OfficeAppPool(backend, size=2, recycle_after=100)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            with pool.session('word'):
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                time.sleep(0.01)
+                with lock:
+                    active.pop()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertLessEqual(max(peak), 2)
+        self.assertLessEqual(len(backend.created), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+測試案例 - 內容定址的輸出儲存區
+"""
+
+import os
+import tempfile
+import time
+import unittest
+import sys
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from scripts.output_store import OutputStore, artifact_digest
+
+try:
+    import yaml
+    from docx import Document
+    from scripts.generate_docs import SpecSyncEngine
+    from scripts.validate_consistency import ConsistencyValidator
+except ImportError as e:
+    print(f"無法載入模組: {e}")
+    Document = None
+
+
+def write_zip(path: Path, text: str, date_time=(2025, 1, 1, 0, 0, 0)):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(zipfile.ZipInfo('word/document.xml', date_time), text)
+
+
+class TestOutputStore(unittest.TestCase):
+    """儲存區與索引測試"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.output = Path(self._tmp.name)
+        self.store = OutputStore(self.output)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def stage(self, text: str, date_time=(2025, 1, 1, 0, 0, 0)) -> Path:
+        staged = self.output / self.store.staging_name("spec_20250101.docx")
+        write_zip(staged, text, date_time)
+        return staged
+
+    def test_digest_ignores_zip_timestamps(self):
+        """測試 zip 套件的雜湊只取決於 part 內容"""
+        a, b = self.output / "a.docx", self.output / "b.docx"
+        write_zip(a, "<w:t>HP Tim</w:t>", (2025, 1, 1, 0, 0, 0))
+        write_zip(b, "<w:t>HP Tim</w:t>", (2026, 6, 1, 12, 0, 0))
+        self.assertEqual(artifact_digest(a), artifact_digest(b))
+        write_zip(b, "<w:t>HP Tom</w:t>")
+        self.assertNotEqual(artifact_digest(a), artifact_digest(b))
+
+    def test_identical_regeneration_not_rewritten(self):
+        """測試內容相同時輸出檔不重寫、歷程不增加，內容變更時新增紀錄"""
+        record, changed = self.store.publish("word:spec", self.stage("v1"), "spec_20250101.docx", "1.0.0")
+        self.assertTrue(changed)
+        public = self.output / "spec_20250101.docx"
+        mtime = public.stat().st_mtime_ns
+        time.sleep(0.01)
+
+        again, changed = self.store.publish("word:spec", self.stage("v1", (2026, 1, 1, 0, 0, 0)),
+                                            "spec_20250101.docx", "1.0.0")
+        self.assertFalse(changed)
+        self.assertEqual(again, record)
+        self.assertEqual(public.stat().st_mtime_ns, mtime)
+        self.assertEqual(list(self.store.staging_dir.iterdir()), [])
+
+        _, changed = self.store.publish("word:spec", self.stage("v2"), "spec_20250101.docx", "1.1.0")
+        self.assertTrue(changed)
+        self.assertEqual([r['ssot_version'] for r in self.store.history("word:spec")], ['1.1.0', '1.0.0'])
+        self.assertEqual(len(list(self.store.objects_dir.glob("*/*"))), 2)
+
+    def test_edited_output_does_not_touch_object(self):
+        """測試就地編輯輸出檔不會改到物件，重新產生相同內容時輸出檔會被還原"""
+        record, _ = self.store.publish("word:spec", self.stage("v1"), "spec_20250101.docx")
+        public = self.output / "spec_20250101.docx"
+        obj = self.store.object_path(record['digest'], '.docx')
+        edited = self.output / "edited.docx"
+        write_zip(edited, "v9")
+        with open(public, 'r+b') as f:
+            f.truncate(0)
+            f.write(edited.read_bytes())
+        self.assertNotEqual(artifact_digest(public), record['digest'])
+        self.assertEqual(artifact_digest(obj), record['digest'])
+
+        _, changed = self.store.publish("word:spec", self.stage("v1"), "spec_20250101.docx")
+        self.assertFalse(changed)
+        self.assertEqual(artifact_digest(public), record['digest'])
+
+    def test_latest_survives_reload_and_deleted_output(self):
+        """測試索引持久化；輸出檔被刪除時最新輸出改由物件提供，gc 保留仍被引用的物件"""
+        record, _ = self.store.publish("word:spec", self.stage("v1"), "spec_20250101.docx")
+        self.store.save()
+        (self.output / "spec_20250101.docx").unlink()
+
+        reloaded = OutputStore(self.output)
+        self.assertEqual(reloaded.latest("word:spec"), record)
+        self.assertEqual(reloaded.latest_path("word:spec"),
+                         reloaded.object_path(record['digest'], '.docx'))
+        self.assertIsNone(reloaded.latest("word:other"))
+        self.assertEqual(reloaded.gc(), 0)
+
+
+class TestEngineStore(unittest.TestCase):
+    """產生與驗證流程整合測試"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("python-docx not available")
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        for name in ("ssot", "mapping", "templates", "output"):
+            (self.root / name).mkdir()
+        self._engine_env = os.environ.get("SPEC_SYNC_ENGINE")
+        os.environ["SPEC_SYNC_ENGINE"] = "pure"
+        doc = Document()
+        doc.add_paragraph("{ProductName}")
+        doc.save(str(self.root / "templates" / "spec.docx"))
+        mapping = {'word_mappings': {'spec': {
+            'file_path': 'templates/spec.docx',
+            'mappings': {'product.name': 'ProductName'},
+        }}}
+        (self.root / "mapping" / "customer_mapping.yaml").write_text(yaml.safe_dump(mapping), encoding='utf-8')
+        (self.root / "ssot" / "master.yaml").write_text(
+            yaml.safe_dump({'version': '1.0.0', 'product': {'name': 'HP Tim'}}), encoding='utf-8')
+
+    def tearDown(self):
+        if self._engine_env is None:
+            os.environ.pop("SPEC_SYNC_ENGINE", None)
+        else:
+            os.environ["SPEC_SYNC_ENGINE"] = self._engine_env
+        self._tmp.cleanup()
+
+    def test_generate_records_and_validate_uses_index(self):
+        """測試強制重建內容未變更時標記 unchanged，驗證依索引取得輸出而非 mtime 最新的檔案"""
+        engine = SpecSyncEngine(str(self.root))
+        self.assertTrue(engine.generate_all_documents())
+        output = engine.last_results[0]['output']
+        record = OutputStore(self.root / "output").latest("word:spec")
+        self.assertEqual(record['output'], output)
+        self.assertEqual(record['ssot_version'], '1.0.0')
+
+        self.assertTrue(engine.generate_all_documents(force=True))
+        self.assertTrue(engine.last_results[0]['unchanged'])
+
+        stale = Document()
+        stale.add_paragraph("舊產品")
+        stale.save(str(self.root / "output" / "spec_99999999.docx"))
+        is_valid, errors = ConsistencyValidator(str(self.root)).validate_all_documents()
+        self.assertTrue(is_valid, errors)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+測試案例 - OOXML 套件寫出（未修改的項目原樣複製）
+"""
+
+import os
+import tempfile
+import unittest
+import sys
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import package_writer
+from package_writer import DEFLATE_LEVEL_ENV, write_package
+
+try:
+    from docx import Document
+    from openpyxl import Workbook, load_workbook
+except ImportError:
+    Document = None
+
+
+class TestPackageWriter(unittest.TestCase):
+    """write_package 測試"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.template = self.root / "template.docx"
+        with zipfile.ZipFile(self.template, 'w') as zf:
+            zf.writestr(zipfile.ZipInfo("[Content_Types].xml", (2020, 1, 2, 3, 4, 6)), b"<Types/>")
+            doc = zipfile.ZipInfo("word/document.xml", (2020, 1, 2, 3, 4, 6))
+            doc.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(doc, b"<w:document>{A}</w:document>" * 200)
+            media = zipfile.ZipInfo("word/media/image1.png", (2019, 5, 6, 7, 8, 10))
+            media.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(media, os.urandom(4096) + b"\0" * 4096, compresslevel=1)
+        self.output = self.root / "output.docx"
+        self._level_env = os.environ.pop(DEFLATE_LEVEL_ENV, None)
+
+    def tearDown(self):
+        os.environ.pop(DEFLATE_LEVEL_ENV, None)
+        if self._level_env is not None:
+            os.environ[DEFLATE_LEVEL_ENV] = self._level_env
+        self._tmp.cleanup()
+
+    def _raw(self, path: Path, name: str) -> bytes:
+        with zipfile.ZipFile(path) as zf:
+            info = zf.getinfo(name)
+        with open(path, 'rb') as f:
+            f.seek(info.header_offset + 26)
+            skip = int.from_bytes(f.read(2), 'little') + int.from_bytes(f.read(2), 'little')
+            f.seek(skip, 1)
+            return f.read(info.compress_size)
+
+    def test_unchanged_parts_copied_raw(self):
+        """測試未修改的項目保留原始壓縮位元組與時間，修改的 part 重新壓縮"""
+        new_xml = b"<w:document>OK</w:document>" * 200
+        write_package(self.template, self.output, {"word/document.xml": new_xml})
+
+        with zipfile.ZipFile(self.output) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.read("word/document.xml"), new_xml)
+            self.assertEqual([i.filename for i in zf.infolist()],
+                             ["[Content_Types].xml", "word/document.xml", "word/media/image1.png"])
+            self.assertEqual(zf.getinfo("word/media/image1.png").date_time, (2019, 5, 6, 7, 8, 10))
+        self.assertEqual(self._raw(self.output, "word/media/image1.png"),
+                         self._raw(self.template, "word/media/image1.png"))
+
+    def test_deflate_level(self):
+        """測試修改過的 part 依參數或環境變數設定壓縮等級"""
+        new_xml = b"<w:document>OK</w:document>" * 200
+        write_package(self.template, self.output, {"word/document.xml": new_xml}, compresslevel=0)
+        with zipfile.ZipFile(self.output) as zf:
+            stored = zf.getinfo("word/document.xml").compress_size
+
+        os.environ[DEFLATE_LEVEL_ENV] = "9"
+        write_package(self.template, self.output, {"word/document.xml": new_xml})
+        with zipfile.ZipFile(self.output) as zf:
+            self.assertLess(zf.getinfo("word/document.xml").compress_size, stored)
+            self.assertEqual(zf.read("word/document.xml"), new_xml)
+
+    def test_without_raw_copy_support(self):
+        """測試 zipfile 缺少內部介面時改為重新壓縮，輸出內容相同"""
+        new_xml = b"<w:document>OK</w:document>" * 200
+        with mock.patch.object(package_writer, 'RAW_COPY_SUPPORTED', False):
+            write_package(self.template, self.output, {"word/document.xml": new_xml})
+        with zipfile.ZipFile(self.output) as zf, zipfile.ZipFile(self.template) as src:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.read("word/document.xml"), new_xml)
+            self.assertEqual(zf.read("word/media/image1.png"), src.read("word/media/image1.png"))
+
+
+class TestRawCopyOpens(unittest.TestCase):
+    """原樣複製後的套件可由 python-docx / openpyxl 開啟"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("python-docx/openpyxl not available")
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _assert_raw_copied(self, src: Path, dst: Path, replaced: str):
+        with zipfile.ZipFile(dst) as zf, zipfile.ZipFile(src) as zs:
+            self.assertIsNone(zf.testzip())
+            for info in zs.infolist():
+                if info.filename == replaced:
+                    continue
+                out = zf.getinfo(info.filename)
+                self.assertEqual((out.CRC, out.compress_size), (info.CRC, info.compress_size), info.filename)
+
+    def test_docx(self):
+        """測試 docx 原樣複製後可開啟且內容正確"""
+        doc = Document()
+        doc.add_paragraph("{ProductName}")
+        template = self.root / "t.docx"
+        doc.save(str(template))
+        with zipfile.ZipFile(template) as zf:
+            xml = zf.read("word/document.xml").replace(b"{ProductName}", b"HP Tim")
+        output = self.root / "o.docx"
+        write_package(template, output, {"word/document.xml": xml})
+
+        self.assertTrue(package_writer.RAW_COPY_SUPPORTED)
+        self._assert_raw_copied(template, output, "word/document.xml")
+        self.assertEqual(Document(str(output)).paragraphs[0].text, "HP Tim")
+
+    def test_xlsx(self):
+        """測試 xlsx 原樣複製後可開啟且內容正確"""
+        wb = Workbook()
+        wb.active["A1"] = "Name"
+        wb.active["B1"] = 1
+        template = self.root / "t.xlsx"
+        wb.save(str(template))
+        with zipfile.ZipFile(template) as zf:
+            xml = zf.read("xl/worksheets/sheet1.xml").replace(b"<v>1</v>", b"<v>2</v>")
+        output = self.root / "o.xlsx"
+        write_package(template, output, {"xl/worksheets/sheet1.xml": xml})
+
+        self._assert_raw_copied(template, output, "xl/worksheets/sheet1.xml")
+        ws = load_workbook(str(output)).active
+        self.assertEqual((ws["A1"].value, ws["B1"].value), ("Name", 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
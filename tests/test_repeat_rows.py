@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+測試案例 - 清單欄位的重複列展開（Word 表格列 / Excel 列）
+"""
+
+import os
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from scripts.xlsx_package import RowShift, shift_formula
+
+try:
+    import yaml
+    from docx import Document
+    from openpyxl import Workbook, load_workbook
+    from scripts.generate_docs import SpecSyncEngine
+    from scripts.mapping_plan import SsotTable, load_compiled_mapping
+    from scripts.output_store import OutputStore
+    from scripts.validate_consistency import ConsistencyValidator
+    from scripts.token_replacer import expand_repeating_regions, replace_tokens_in_document
+    from scripts.xlsx_package import expand_repeat_rows_worksheet, patch_cells
+except ImportError as e:
+    print(f"無法載入模組: {e}")
+    Document = None
+
+REQUIREMENTS = [
+    {'requirement_id': f'FR{i:03d}', 'title': f'需求 {i}', 'priority': i % 3}
+    for i in range(50)
+]
+LISTS = {'reqs': REQUIREMENTS, 'team': ['王小明', '李小華'], 'empty': []}
+
+
+class TestShiftFormula(unittest.TestCase):
+    """公式參照平移測試"""
+
+    def test_shift(self):
+        """測試範本列之後的參照下移、以範本列為終點的範圍延伸，字串與其他工作表不變"""
+        shift = RowShift([(5, 3)])
+        self.assertEqual(shift_formula('=SUM(C5:C5)+A7-$B$9+Sheet2!A9&"A9"', shift),
+                         '=SUM(C5:C7)+A9-$B$11+Sheet2!A9&"A9"')
+        self.assertEqual(shift_formula('=B5*C5+$D$5+LOG10(A1)', shift, clone=(5, 6)),
+                         '=B6*C6+$D$5+LOG10(A1)')
+
+
+class TestRowShiftCell(unittest.TestCase):
+    """RowShift.cell 位址換算測試"""
+
+    def test_cell(self):
+        """測試範本列之後的位址下移（空清單時上移），位於範本列時拋出 ValueError"""
+        shift = RowShift([(2, 3), (5, 0)])
+        self.assertEqual(shift.cell("b1"), "B1")
+        self.assertEqual(shift.cell("B4"), "B6")
+        self.assertEqual(shift.cell("C9"), "C10")
+        with self.assertRaises(ValueError):
+            shift.cell("A2")
+
+
+class TestWordRepeat(unittest.TestCase):
+    """Word 重複列測試"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("python-docx not available")
+
+    def test_table_rows_and_paragraphs(self):
+        """測試表格列與段落依清單複製，空清單移除範本，找不到的清單保留 Token"""
+        doc = Document()
+        table = doc.add_table(rows=2, cols=2)
+        table.rows[0].cells[0].text = "編號"
+        table.rows[1].cells[0].text = "{reqs[].requirement_id}"
+        table.rows[1].cells[1].text = "{reqs[].title}（{ProductName}）"
+        doc.add_paragraph("成員：{team[]}")
+        doc.add_paragraph("{empty[].x}")
+        doc.add_paragraph("{unknown[].x}")
+
+        report = expand_repeating_regions(doc.element.body, LISTS.get)
+        replace_tokens_in_document(doc, {'ProductName': 'HP Tim'})
+
+        rows = table.rows
+        self.assertEqual(len(rows), 51)
+        self.assertEqual([c.text for c in rows[1].cells], ['FR000', '需求 0（HP Tim）'])
+        self.assertEqual([c.text for c in rows[50].cells], ['FR049', '需求 49（HP Tim）'])
+        self.assertEqual([p.text for p in doc.paragraphs], ['成員：王小明', '成員：李小華', '{unknown[].x}'])
+        self.assertEqual(report['rows'], {'reqs': 50, 'team': 2, 'empty': 0})
+        self.assertEqual(report['missing'], {'unknown[].x'})
+
+    def test_empty_list_removes_table(self):
+        """測試空清單移除表格唯一的列時整個表格一併移除（預編譯計畫改用完整解析）"""
+        from scripts.template_compiler import compile_docx_xml, render_docx
+
+        doc = Document()
+        doc.add_paragraph("前")
+        doc.add_table(rows=1, cols=1).rows[0].cells[0].text = "{empty[].x}"
+        outer = doc.add_table(rows=1, cols=1).rows[0].cells[0]
+        outer.add_table(rows=1, cols=1).rows[0].cells[0].text = "{empty[].y}"
+        plan = compile_docx_xml(doc.part.blob)
+
+        expand_repeating_regions(doc.element.body, LISTS.get)
+        self.assertEqual(len(doc.tables), 1)
+        self.assertEqual(doc.tables[0].rows[0].cells[0].tables, [])
+        self.assertTrue(doc.tables[0].rows[0].cells[0].paragraphs)
+        with self.assertRaises(ValueError):
+            render_docx(plan, {}, LISTS.get)
+
+
+class TestExcelRepeat(unittest.TestCase):
+    """Excel 重複列測試"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("openpyxl not available")
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_patch_shifts_following_rows(self):
+        """測試直接修補：範本列展開、數值保留型別，其後的列、合併儲存格與指定儲存格一併下移"""
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "需求"
+        ws.append(["編號", "名稱", "優先度"])
+        ws.append(["{reqs[].requirement_id}", "{reqs[].title}", "{reqs[].priority}"])
+        ws["A4"] = "簽核"
+        ws.merge_cells("A4:C4")
+        wb.save(str(self.root / "t.xlsx"))
+
+        patch_cells(self.root / "t.xlsx", self.root / "out.xlsx", "需求",
+                    {'E1': 'HP Tim', 'A5': '備註'}, lists=LISTS.get)
+        ws = load_workbook(str(self.root / "out.xlsx"))["需求"]
+        self.assertEqual([c.value for c in ws[2]][:3], ['FR000', '需求 0', 0])
+        self.assertEqual([c.value for c in ws[51]][:3], ['FR049', '需求 49', 1])
+        self.assertEqual(ws["A53"].value, "簽核")
+        self.assertEqual(ws["A54"].value, "備註")
+        self.assertEqual(ws["E1"].value, "HP Tim")
+        self.assertEqual([str(r) for r in ws.merged_cells.ranges], ["A53:C53"])
+
+    def test_openpyxl_formulas(self):
+        """測試 openpyxl 路徑：範本列公式逐列改寫，合計公式範圍延伸"""
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["編號", "優先度", "加權"])
+        ws.append(["{reqs[].requirement_id}", "{reqs[].priority}", "=B2*2"])
+        ws.append([])
+        ws.append(["合計", "=SUM(B2:B2)"])
+        expand_repeat_rows_worksheet(ws, {'reqs': REQUIREMENTS[:3]}.get)
+        self.assertEqual([c.value for c in ws[4]], ['FR002', 2, '=B4*2'])
+        self.assertEqual([c.value for c in ws[6]], ['合計', '=SUM(B2:B4)', None])
+
+
+class TestEngineLists(unittest.TestCase):
+    """產生引擎的 lists 設定測試"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("python-docx/openpyxl not available")
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        for name in ("ssot", "mapping", "templates", "output"):
+            (self.root / name).mkdir()
+        self._engine_env = os.environ.get("SPEC_SYNC_ENGINE")
+        os.environ["SPEC_SYNC_ENGINE"] = "pure"
+
+    def tearDown(self):
+        if self._engine_env is None:
+            os.environ.pop("SPEC_SYNC_ENGINE", None)
+        else:
+            os.environ["SPEC_SYNC_ENGINE"] = self._engine_env
+        self._tmp.cleanup()
+
+    def test_generate_with_lists(self):
+        """測試對應表 lists 別名展開，清單內容變更時重新產生"""
+        doc = Document()
+        table = doc.add_table(rows=1, cols=2)
+        table.rows[0].cells[0].text = "{reqs[].requirement_id}"
+        table.rows[0].cells[1].text = "{reqs[].title}"
+        doc.save(str(self.root / "templates" / "trace.docx"))
+        mapping = {'word_mappings': {'trace': {
+            'file_path': 'templates/trace.docx',
+            'mappings': {},
+            'lists': {'reqs': 'specifications.functional_requirements'},
+        }}}
+        ssot = {'specifications': {'functional_requirements': REQUIREMENTS[:2]}}
+        (self.root / "mapping" / "customer_mapping.yaml").write_text(yaml.safe_dump(mapping), encoding='utf-8')
+        (self.root / "ssot" / "master.yaml").write_text(yaml.safe_dump(ssot, allow_unicode=True), encoding='utf-8')
+
+        engine = SpecSyncEngine(str(self.root))
+        self.assertTrue(engine.generate_all_documents())
+        out = Document(str(self.root / "output" / engine.last_results[0]['output']))
+        self.assertEqual([r.cells[1].text for r in out.tables[0].rows], ['需求 0', '需求 1'])
+
+        ssot['specifications']['functional_requirements'] = REQUIREMENTS[:3]
+        (self.root / "ssot" / "master.yaml").write_text(yaml.safe_dump(ssot, allow_unicode=True), encoding='utf-8')
+        self.assertTrue(engine.generate_all_documents())
+        self.assertFalse(engine.last_results[0]['skipped'])
+        out = Document(str(self.root / "output" / engine.last_results[0]['output']))
+        self.assertEqual(len(out.tables[0].rows), 3)
+
+    def test_excel_mapping_below_repeat_rows(self):
+        """測試對應儲存格位於重複列之下：寫入展開後的位置，收據與驗證（含完整讀取）依換算後位址"""
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "S"
+        ws.append(["名稱"])
+        ws.append(["{r[].name}"])
+        ws["A4"] = "負責人"
+        wb.save(str(self.root / "templates" / "sheet.xlsx"))
+        mapping = {'excel_mappings': {'sheet': {
+            'file_path': 'templates/sheet.xlsx',
+            'sheet_name': 'S',
+            'mappings': {'product.owner': 'B4'},
+            'lists': {'r': 'items'},
+        }}}
+        ssot = {'product': {'owner': '王小明'}, 'items': [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}]}
+        (self.root / "mapping" / "customer_mapping.yaml").write_text(yaml.safe_dump(mapping), encoding='utf-8')
+        (self.root / "ssot" / "master.yaml").write_text(yaml.safe_dump(ssot, allow_unicode=True), encoding='utf-8')
+
+        self.assertTrue(SpecSyncEngine(str(self.root)).generate_all_documents())
+        store = OutputStore(self.root / "output")
+        output = store.latest_path('excel:sheet')
+        ws = load_workbook(str(output))["S"]
+        self.assertEqual((ws["A6"].value, ws["B6"].value, ws["B4"].value), ("負責人", "王小明", None))
+        receipt = store.receipt(store.latest('excel:sheet')['digest'])
+        self.assertEqual([(f['cell'], f['ref'], f['value']) for f in receipt['fills']], [('B4', 'B6', '王小明')])
+
+        validator = ConsistencyValidator(str(self.root))
+        ok, errors = validator.validate_all_documents()
+        self.assertTrue(ok, errors)
+        plan = load_compiled_mapping(self.root / "mapping" / "customer_mapping.yaml").get('excel', 'sheet')
+        table = SsotTable(validator.load_ssot())
+        self.assertEqual(validator.validate_excel_document(
+            output, plan, table, row_shift=validator.excel_row_shift(plan, table)), [])
+        self.assertTrue(validator.validate_excel_document(output, plan, table))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -75,6 +75,130 @@ class TestSpecSync(unittest.TestCase):
         self.assertTrue(output_path.is_dir())
         print("✅ 輸出目錄存在測試通過")
 
+def build_workspace(root: Path):
+    """建立含 SSOT、對應表與 Word/Excel 模板的暫存工作目錄"""
+    import yaml
+    from docx import Document
+    from openpyxl import Workbook
+
+    for name in ("ssot", "mapping", "templates", "output"):
+        (root / name).mkdir()
+    ssot = {
+        'version': '1.0.0',
+        'product': {'name': 'HP Tim', 'version': 'v1.0.0'},
+        'project': {'budget': 100000},
+    }
+    mapping = {'mapping_version': '1.0.0', 'word_mappings': {}, 'excel_mappings': {}}
+    for i in range(3):
+        doc = Document()
+        doc.add_paragraph("產品: {ProductName} 版本: {ProductVersion}")
+        doc.save(str(root / "templates" / f"word_{i}.docx"))
+        mapping['word_mappings'][f"word_{i}"] = {
+            'file_path': f"templates/word_{i}.docx",
+            'mappings': {'product.name': 'ProductName', 'product.version': 'ProductVersion'},
+        }
+    wb = Workbook()
+    wb.active.title = "規格表"
+    wb.save(str(root / "templates" / "excel_0.xlsx"))
+    mapping['excel_mappings']['excel_0'] = {
+        'file_path': "templates/excel_0.xlsx",
+        'sheet_name': "規格表",
+        'mappings': {'product.name': 'B2', 'project.budget': 'B3'},
+    }
+    with open(root / "ssot" / "master.yaml", 'w', encoding='utf-8') as f:
+        yaml.safe_dump(ssot, f, allow_unicode=True)
+    with open(root / "mapping" / "customer_mapping.yaml", 'w', encoding='utf-8') as f:
+        yaml.safe_dump(mapping, f, allow_unicode=True)
+
+
+class TestDocumentGeneration(unittest.TestCase):
+    """平行與增量產生測試"""
+
+    def setUp(self):
+        if SpecSyncEngine is None:
+            self.skipTest("SpecSyncEngine not available")
+        try:
+            import docx  # noqa: F401
+            import openpyxl  # noqa: F401
+        except ImportError:
+            self.skipTest("python-docx/openpyxl not available")
+        import tempfile
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        build_workspace(self.root)
+        self._engine_env = os.environ.get("SPEC_SYNC_ENGINE")
+        os.environ["SPEC_SYNC_ENGINE"] = "pure"
+
+    def tearDown(self):
+        if self._engine_env is None:
+            os.environ.pop("SPEC_SYNC_ENGINE", None)
+        else:
+            os.environ["SPEC_SYNC_ENGINE"] = self._engine_env
+        self._tmp.cleanup()
+
+    def test_parallel_matches_serial(self):
+        """測試平行模式與序列模式產生相同的輸出檔案"""
+        from docx import Document
+
+        engine = SpecSyncEngine(str(self.root))
+        self.assertTrue(engine.generate_all_documents(jobs=1))
+        serial = sorted(r['output'] for r in engine.last_results if r['success'])
+        word_output = next(name for name in serial if name.endswith('.docx'))
+        serial_text = Document(str(self.root / "output" / word_output)).paragraphs[0].text
+        for f in (self.root / "output").iterdir():
+            if f.is_file():
+                f.unlink()
+
+        self.assertTrue(engine.generate_all_documents(jobs=2))
+        parallel = sorted(r['output'] for r in engine.last_results if r['success'])
+        self.assertEqual(serial, parallel)
+        self.assertEqual(len(parallel), 4)
+        self.assertEqual(
+            Document(str(self.root / "output" / word_output)).paragraphs[0].text,
+            serial_text
+        )
+        self.assertIn("HP Tim", serial_text)
+
+    def test_incremental_regeneration(self):
+        """測試只重新產生輸入有變動的模板"""
+        import yaml
+
+        engine = SpecSyncEngine(str(self.root))
+        engine.generate_all_documents()
+        self.assertFalse(any(r['skipped'] for r in engine.last_results))
+
+        engine.generate_all_documents()
+        self.assertTrue(all(r['skipped'] for r in engine.last_results))
+
+        ssot_file = self.root / "ssot" / "master.yaml"
+        ssot = yaml.safe_load(ssot_file.read_text(encoding='utf-8'))
+        ssot['project']['budget'] = 200000
+        ssot_file.write_text(yaml.safe_dump(ssot, allow_unicode=True), encoding='utf-8')
+
+        engine.generate_all_documents()
+        rebuilt = [r['template'] for r in engine.last_results if not r['skipped']]
+        self.assertEqual(rebuilt, ['excel_0'])
+
+        engine.generate_all_documents(force=True)
+        self.assertFalse(any(r['skipped'] for r in engine.last_results))
+
+    def test_trace_collects_worker_spans(self):
+        """測試啟用量測時平行工作行程的各階段 span 與位元組計數併入主行程"""
+        from instrumentation import Tracer, activate
+
+        tracer = Tracer()
+        engine = SpecSyncEngine(str(self.root))
+        with activate(tracer):
+            self.assertTrue(engine.generate_all_documents(jobs=2))
+        summary = tracer.summary()
+        self.assertEqual(summary['phases']['template']['count'], 4)
+        self.assertIn('save', summary['phases'])
+        self.assertIn('load_ssot', summary['phases'])
+        self.assertGreater(summary['counters']['bytes_written'], 0)
+        pids = {e['pid'] for e in tracer.to_chrome_trace()['traceEvents'] if e['name'] == 'template'}
+        self.assertNotIn(os.getpid(), pids)
+
+
 class TestDataIntegrity(unittest.TestCase):
     """資料完整性測試"""
     
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+測試案例 - 延遲載入的 SSOT 儲存區（分割目錄 / SQLite）
+"""
+
+import datetime
+import pickle
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from scripts.mapping_plan import CompiledMapping, SsotTable, get_nested_value
+from scripts.ssot_store import (
+    ShardedSsotStore,
+    SqliteSsotStore,
+    SsotStore,
+    materialize,
+    open_ssot,
+    write_sharded,
+    write_sqlite,
+)
+
+SSOT = {
+    'version': '1.0.0',
+    'last_updated': datetime.date(2025, 11, 13),
+    'product': {'name': 'HP Tim', 'version': 'v1.0.0'},
+    'specifications': {
+        'hardware': {'cpu': 'i7', 'memory': '16GB'},
+        'functional_requirements': [
+            {'requirement_id': f'FR{i:03d}', 'title': f'需求 {i}', 'tags': ['a', 'b'], 'done': i % 2 == 0}
+            for i in range(12)
+        ],
+        'empty': {},
+    },
+    'testing': {'test_cases': []},
+}
+
+
+class StoreContract:
+    """兩種儲存區共用的行為"""
+
+    def open(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.store = self.open()
+
+    def tearDown(self):
+        close = getattr(self.store, 'close', None)
+        if close:
+            close()
+        self._tmp.cleanup()
+
+    def test_round_trip(self):
+        """測試完整資料與原始 SSOT 相同（含日期、空容器與清單順序）"""
+        self.assertEqual(materialize(self.store), SSOT)
+
+    def test_dotted_lookup(self):
+        """測試點分隔路徑查詢與 get_nested_value 結果一致"""
+        for path in ('product.name', 'specifications.functional_requirements[10].title',
+                     'specifications.functional_requirements[3].tags[1]', 'specifications.hardware',
+                     'specifications.functional_requirements[99].title', 'product.missing',
+                     'last_updated', 'testing.test_cases'):
+            self.assertEqual(get_nested_value(self.store, path), get_nested_value(SSOT, path), path)
+
+    def test_table_and_pickle(self):
+        """測試 SsotTable 不預先扁平化，且傳給工作行程時不帶已載入的區塊"""
+        table = SsotTable(self.store)
+        mapping = CompiledMapping({'word_mappings': {'spec': {
+            'file_path': 'templates/spec.docx',
+            'mappings': {'product.name': 'ProductName', 'specifications.hardware.cpu': 'Cpu'},
+        }}})
+        plan = mapping.get('word', 'spec')
+        self.assertEqual(plan.token_values(table), {'ProductName': 'HP Tim', 'Cpu': 'i7'})
+        self.assertEqual(table.paths, {'product.name': 'HP Tim', 'specifications.hardware.cpu': 'i7'})
+
+        clone = pickle.loads(pickle.dumps(self.store))
+        self.assertEqual(clone.loaded_sections, [])
+        self.assertEqual(clone.lookup('specifications.functional_requirements[0].requirement_id'), 'FR000')
+
+
+class TestShardedStore(StoreContract, unittest.TestCase):
+    """分割目錄測試"""
+
+    def open(self):
+        write_sharded(SSOT, self.root / "master.d", depth=2)
+        return open_ssot(self.root / "master.d")
+
+    def test_layout_and_lazy_sections(self):
+        """測試分割結構，且只載入存取到的區塊檔案"""
+        directory = self.root / "master.d"
+        self.assertIsInstance(self.store, ShardedSsotStore)
+        self.assertTrue((directory / "_root.yaml").exists())
+        self.assertTrue((directory / "specifications" / "functional_requirements.yaml").exists())
+
+        self.assertEqual(self.store.lookup('specifications.hardware.memory'), '16GB')
+        self.assertEqual(self.store.loaded_sections, ['specifications'])
+        self.assertEqual(self.store['specifications'].loaded_sections, ['hardware'])
+        with self.assertRaises(FileExistsError):
+            write_sharded(SSOT, directory)
+
+
+class TestSqliteStore(StoreContract, unittest.TestCase):
+    """SQLite 測試"""
+
+    def open(self):
+        write_sqlite(SSOT, self.root / "master.db")
+        return open_ssot(self.root / "master.db")
+
+    def test_lookup_without_loading_sections(self):
+        """測試單一欄位查詢不載入整個區塊，重建後的區塊維持原始順序"""
+        self.assertIsInstance(self.store, SqliteSsotStore)
+        self.assertEqual(self.store.lookup('specifications.functional_requirements[11].done'), False)
+        self.assertEqual(self.store.loaded_sections, [])
+        self.assertEqual(list(self.store), list(SSOT))
+        self.assertEqual(list(self.store['specifications']), list(SSOT['specifications']))
+        self.assertEqual(self.store.loaded_sections, ['specifications'])
+
+
+class TestSsotStoreBase(unittest.TestCase):
+    """儲存區基底類別測試"""
+
+    def test_incomplete_subclass_rejected(self):
+        """測試未實作 _list_keys / _load_section 的子類別無法建立"""
+        class Partial(SsotStore):
+            def _list_keys(self):
+                return []
+
+        with self.assertRaises(TypeError):
+            Partial()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+測試案例 - 模板預編譯快取
+"""
+
+import os
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+try:
+    from docx import Document
+except ImportError:
+    Document = None
+
+from token_replacer import expand_repeating_regions, new_report, replace_tokens_in_document
+
+
+class TestTemplateCompiler(unittest.TestCase):
+    """預編譯計畫與完整解析結果一致性測試"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("python-docx not available")
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "templates").mkdir()
+        self.template = self.root / "templates" / "t.docx"
+        self.values = {'ProductName': 'HP <Tim> & co'}
+        self.lists = {'reqs': [{'id': 'R1', 'title': 'A'}, {'id': 'R2', 'title': None}]}
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _build(self, nested: bool = False):
+        doc = Document()
+        p = doc.add_paragraph()
+        p.add_run("名稱 {Prod")
+        p.add_run("uctName} {Missing}")
+        table = doc.add_table(rows=2, cols=2)
+        table.rows[0].cells[0].text = "編號"
+        table.rows[1].cells[0].text = "{reqs[].id}"
+        table.rows[1].cells[1].text = "{reqs[].title}（{ProductName}）"
+        if nested:
+            table.rows[1].cells[1].add_table(rows=1, cols=1).rows[0].cells[0].text = "{reqs[].id}"
+        doc.add_paragraph("{other[].x}")
+        doc.save(str(self.template))
+
+    def _render_both(self):
+        from docx_text import extract_docx_text
+        from package_writer import write_package
+        from template_compiler import load_plan, render_docx
+
+        plan = load_plan(self.template)
+        compiled, parts = render_docx(plan, self.values, self.lists.get)
+        write_package(self.template, self.root / "compiled.docx", parts)
+
+        doc = Document(str(self.template))
+        dom = new_report()
+        expand_repeating_regions(doc.element.body, self.lists.get, dom)
+        replaced = replace_tokens_in_document(doc, self.values)
+        doc.save(str(self.root / "dom.docx"))
+        dom['tokens'] |= replaced['tokens']
+        dom['missing'] |= replaced['missing']
+        dom['count'] += replaced['count']
+        return (compiled, extract_docx_text(self.root / "compiled.docx"),
+                dom, extract_docx_text(self.root / "dom.docx"))
+
+    def test_matches_dom_path(self):
+        """測試拆成多個 run 的 Token、重複列與缺少的清單與完整解析結果相同"""
+        self._build()
+        compiled, compiled_text, dom, dom_text = self._render_both()
+        self.assertEqual(compiled_text, dom_text)
+        self.assertIn("名稱 HP <Tim> & co {Missing}", compiled_text)
+        self.assertIn("R2", compiled_text)
+        self.assertEqual(compiled['tokens'], dom['tokens'])
+        self.assertEqual(compiled['missing'], {'Missing', 'other[].x'})
+        self.assertEqual(compiled['missing'], dom['missing'])
+        self.assertEqual(compiled['rows'], {'reqs': 2})
+        self.assertEqual(compiled['count'], dom['count'])
+        Document(str(self.root / "compiled.docx"))
+
+    def test_disk_cache_reused(self):
+        """測試計畫以內容雜湊快取於 output/.cache/templates，模板變更後重新編譯"""
+        import template_compiler
+
+        self._build()
+        template_compiler.load_plan(self.template)
+        cache_dir = self.root / "output" / ".cache" / "templates"
+        cached = list(cache_dir.glob("*.marshal"))
+        self.assertEqual(len(cached), 1)
+
+        template_compiler._memory.clear()
+        original = template_compiler.compile_template
+        template_compiler.compile_template = None  # 命中磁碟快取時不應重新編譯
+        try:
+            plan = template_compiler.load_plan(self.template)
+        finally:
+            template_compiler.compile_template = original
+        self.assertEqual(plan['kind'], 'docx')
+
+        self._build(nested=True)
+        os.utime(self.template, ns=(1, 1))
+        with self.assertRaises(template_compiler.CompileUnsupported):
+            template_compiler.load_plan(self.template)
+        remaining = list(cache_dir.glob("*.marshal"))
+        self.assertEqual(len(remaining), 1)
+        self.assertNotEqual(remaining[0].name, cached[0].name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+測試案例 - Word Token 單次替換引擎
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+try:
+    from docx import Document
+    from scripts.token_replacer import replace_tokens_in_document
+except ImportError as e:
+    print(f"無法載入模組: {e}")
+    Document = None
+
+
+class TestTokenReplacer(unittest.TestCase):
+    """Token 替換測試"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("python-docx not available")
+
+    def test_replace_preserves_run_formatting(self):
+        """測試替換後保留 run 格式"""
+        doc = Document()
+        p = doc.add_paragraph()
+        p.add_run("名稱: ")
+        bold = p.add_run("{ProductName}")
+        bold.bold = True
+        report = replace_tokens_in_document(doc, {"ProductName": "HP Tim"})
+
+        self.assertEqual(p.text, "名稱: HP Tim")
+        self.assertTrue(p.runs[1].bold)
+        self.assertEqual(report["count"], 1)
+
+    def test_replace_token_split_across_runs(self):
+        """測試 Token 被拆成多個 run 時仍可替換"""
+        doc = Document()
+        p = doc.add_paragraph()
+        p.add_run("版本 {Product")
+        p.add_run("Ver")
+        p.add_run("sion} 結束")
+        replace_tokens_in_document(doc, {"ProductVersion": "v1.0.0"})
+
+        self.assertEqual(p.text, "版本 v1.0.0 結束")
+
+    def test_tables_and_missing_tokens(self):
+        """測試表格內 Token 與缺值 Token"""
+        doc = Document()
+        table = doc.add_table(rows=1, cols=2)
+        table.cell(0, 0).text = "{HardwareCPU}"
+        table.cell(0, 1).text = "{Unknown}"
+        report = replace_tokens_in_document(doc, {"HardwareCPU": "i7"})
+
+        self.assertEqual(table.cell(0, 0).text, "i7")
+        self.assertEqual(table.cell(0, 1).text, "{Unknown}")
+        self.assertEqual(report["missing"], {"Unknown"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+測試案例 - Web 後端 Token 單次掃描／替換與 Token 索引快取
+"""
+
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "web-ui" / "backend"))
+
+try:
+    from docx import Document
+    from openpyxl import Workbook, load_workbook
+    from token_service import TokenIndex, scan_and_replace
+except ImportError as e:
+    print(f"無法載入模組: {e}")
+    Document = None
+
+
+SSOT = {'product': {'name': 'HP Tim', 'ports': [{'type': 'USB-C'}]}}
+
+
+class TestScanAndReplace(unittest.TestCase):
+    """單次掃描＋替換測試"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("python-docx/openpyxl not available")
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_docx_split_runs(self):
+        """測試 Token 被拆成多個 run 時仍可替換，缺少的鍵列入 missing"""
+        template = self.root / "t.docx"
+        doc = Document()
+        p = doc.add_paragraph()
+        p.add_run("名稱 {product.")
+        p.add_run("name} / {product.ports[0].type} / {missing.key}")
+        doc.save(str(template))
+
+        out = self.root / "out.docx"
+        info = scan_and_replace(template, out, SSOT)
+        self.assertEqual(info['tokens'], ['missing.key', 'product.name', 'product.ports[0].type'])
+        self.assertEqual(info['missing'], ['missing.key'])
+        self.assertEqual(info['replaced']['product.name'], 'HP Tim')
+        text = Document(str(out)).paragraphs[0].text
+        self.assertEqual(text, "名稱 HP Tim / USB-C / {missing.key}")
+
+    def test_xlsx_without_tokens_not_written(self):
+        """測試沒有 Token 的模板不寫出檔案"""
+        template = self.root / "t.xlsx"
+        wb = Workbook()
+        wb.active["A1"] = "沒有 Token"
+        wb.save(str(template))
+        out = self.root / "out.xlsx"
+        info = scan_and_replace(template, out, SSOT)
+        self.assertEqual(info['tokens'], [])
+        self.assertFalse(out.exists())
+
+        wb.active["A2"] = "{product.name}"
+        wb.save(str(template))
+        scan_and_replace(template, out, SSOT)
+        self.assertEqual(load_workbook(str(out)).active["A2"].value, "HP Tim")
+
+    def test_xlsx_repeat_rows(self):
+        """測試 {清單[].欄位} 依 SSOT 清單展開，同列的一般 Token 亦替換"""
+        template = self.root / "t.xlsx"
+        wb = Workbook()
+        wb.active.append(["{product.ports[].type}", "{product.name}"])
+        wb.active.append(["結尾"])
+        wb.save(str(template))
+        ssot = {'product': {'name': 'HP Tim', 'ports': [{'type': 'USB-C'}, {'type': 'HDMI'}]}}
+        out = self.root / "out.xlsx"
+        info = scan_and_replace(template, out, ssot)
+        self.assertIn('product.ports[].type', info['tokens'])
+        rows = [[c.value for c in row] for row in load_workbook(str(out)).active.iter_rows()]
+        self.assertEqual(rows, [['USB-C', 'HP Tim'], ['HDMI', 'HP Tim'], ['結尾', None]])
+
+
+class TestTokenIndex(unittest.TestCase):
+    """Token 索引快取測試"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("python-docx/openpyxl not available")
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.template = self.root / "t.docx"
+        doc = Document()
+        doc.add_paragraph("{product.name}")
+        doc.save(str(self.template))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_cached_by_content_hash(self):
+        """測試內容未變更時由快取回答，變更後重新掃描"""
+        index_path = self.root / ".cache" / "token_index.json"
+        index = TokenIndex(index_path)
+        scan_and_replace(self.template, None, SSOT, index=index)
+        self.assertTrue(index_path.exists())
+
+        reloaded = TokenIndex(index_path)
+        self.assertEqual(reloaded.tokens(self.template), ['product.name'])
+
+        doc = Document()
+        doc.add_paragraph("{product.ports[0].type}")
+        doc.save(str(self.template))
+        self.assertEqual(reloaded.tokens(self.template), ['product.ports[0].type'])
+
+
+if __name__ == "__main__":
+    unittest.main()
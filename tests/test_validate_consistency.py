@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+測試案例 - 文件一致性驗證
+"""
+
+import json
+import os
+import tempfile
+import unittest
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from scripts.aho_corasick import AhoCorasick
+
+try:
+    from docx import Document
+    from scripts.docx_text import extract_docx_text
+    from openpyxl import Workbook
+    from scripts.mapping_plan import CompiledMapping, SsotTable
+    from scripts.validate_consistency import ConsistencyValidator, cell_values_equal
+except ImportError as e:
+    print(f"無法載入模組: {e}")
+    Document = None
+
+
+class TestAhoCorasick(unittest.TestCase):
+    """多字串比對測試"""
+
+    def test_overlapping_patterns(self):
+        """測試互相包含與重疊的字串"""
+        ac = AhoCorasick(["he", "she", "his", "hers", "v1.0.0", "不存在"])
+        self.assertEqual(ac.find("ushers v1.0.0"), {"he", "she", "hers", "v1.0.0"})
+
+    def test_empty(self):
+        """測試空字串與空集合"""
+        self.assertEqual(AhoCorasick([]).find("abc"), set())
+        self.assertEqual(AhoCorasick([""]).find("abc"), set())
+
+
+class TestWordValidation(unittest.TestCase):
+    """Word 驗證測試"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("python-docx not available")
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "out.docx"
+        doc = Document()
+        doc.sections[0].header.paragraphs[0].text = "頁首 HP Tim"
+        p = doc.add_paragraph()
+        p.add_run("版本 v1.")
+        p.add_run("0.0")
+        table = doc.add_table(rows=1, cols=1)
+        table.cell(0, 0).text = "i7"
+        doc.save(str(self.path))
+        self._engine_env = os.environ.get("SPEC_SYNC_ENGINE")
+        os.environ["SPEC_SYNC_ENGINE"] = "pure"
+
+    def tearDown(self):
+        if self._engine_env is None:
+            os.environ.pop("SPEC_SYNC_ENGINE", None)
+        else:
+            os.environ["SPEC_SYNC_ENGINE"] = self._engine_env
+        self._tmp.cleanup()
+
+    def test_extract_includes_headers(self):
+        """測試串流讀取包含頁首與表格"""
+        text = extract_docx_text(self.path)
+        self.assertIn("頁首 HP Tim", text)
+        self.assertIn("版本 v1.0.0", text)
+        self.assertIn("i7", text)
+
+    def test_validate_word_document(self):
+        """測試缺少的值會回報錯誤"""
+        validator = ConsistencyValidator(self._tmp.name)
+        ssot = {'product': {'name': 'HP Tim', 'version': 'v1.0.0'}, 'cpu': 'i9'}
+        plan = CompiledMapping({'word_mappings': {'spec': {
+            'file_path': 'templates/spec.docx',
+            'mappings': {'product.name': 'ProductName', 'product.version': 'ProductVersion', 'cpu': 'CPU'},
+        }}}).get('word', 'spec')
+        errors = validator.validate_word_document(self.path, plan, SsotTable(ssot))
+        self.assertEqual(len(errors), 1)
+        self.assertIn("cpu", errors[0])
+
+
+class TestExcelValidation(unittest.TestCase):
+    """Excel 驗證測試"""
+
+    def setUp(self):
+        if Document is None:
+            self.skipTest("openpyxl not available")
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "out.xlsx"
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "規格表"
+        ws["B2"] = "HP Tim"
+        ws["B3"] = 100000
+        ws["B4"] = datetime(2024, 1, 31)
+        ws["B5"] = "100000"
+        ws["B6"] = 0.30000000000000004
+        wb.save(str(self.path))
+        self._engine_env = os.environ.get("SPEC_SYNC_ENGINE")
+        os.environ["SPEC_SYNC_ENGINE"] = "pure"
+
+    def tearDown(self):
+        if self._engine_env is None:
+            os.environ.pop("SPEC_SYNC_ENGINE", None)
+        else:
+            os.environ["SPEC_SYNC_ENGINE"] = self._engine_env
+        self._tmp.cleanup()
+
+    def test_cell_values_equal(self):
+        """測試依型別比較：數值字串、日期與浮點誤差視為相同，布林與數值不混用"""
+        self.assertTrue(cell_values_equal(100000, "100000"))
+        self.assertTrue(cell_values_equal("100000.0", 100000))
+        self.assertTrue(cell_values_equal(datetime(2024, 1, 31), date(2024, 1, 31)))
+        self.assertTrue(cell_values_equal(datetime(2024, 1, 31), "2024-01-31"))
+        self.assertTrue(cell_values_equal(0.1 + 0.2, 0.3))
+        self.assertTrue(cell_values_equal(None, ""))
+        self.assertFalse(cell_values_equal(True, 1))
+        self.assertFalse(cell_values_equal("v1.0", "v1.0.0"))
+        self.assertFalse(cell_values_equal(datetime(2024, 1, 31, 12), date(2024, 1, 31)))
+
+    def test_diff_report(self):
+        """測試型別不同但值相同不會誤判，不一致的儲存格寫入逐格比對結果"""
+        validator = ConsistencyValidator(self._tmp.name)
+        ssot = {'product': {'name': 'HP Tim'}, 'budget': '100000', 'release': date(2024, 1, 31),
+                'qty': 100000, 'ratio': 0.3, 'cpu': 'i9'}
+        mapping = {'product.name': 'B2', 'budget': 'B3', 'release': 'B4', 'qty': 'B5',
+                   'ratio': 'B6', 'cpu': 'B7'}
+        plan = CompiledMapping({'excel_mappings': {'sheet': {
+            'file_path': 'templates/sheet.xlsx', 'sheet_name': "規格表", 'mappings': mapping,
+        }}}).get('excel', 'sheet')
+        diff = {}
+        errors = validator.validate_excel_document(self.path, plan, SsotTable(ssot), diff=diff)
+        self.assertEqual(errors, ["Excel B7 儲存格不一致: 期望 'i9', 實際 'None'"])
+        self.assertEqual(diff, {'sheet': "規格表", 'checked': 6, 'mismatches': [{
+            'cell': 'B7', 'field': 'cpu', 'expected': 'i9', 'actual': None,
+            'expected_type': 'str', 'actual_type': 'NoneType',
+        }]})
+
+        validator.excel_diffs = [dict(diff, template='sheet')]
+        report_path = Path(self._tmp.name) / "output" / "excel_diff.json"
+        validator.write_diff_report(report_path, False, errors)
+        report = json.loads(report_path.read_text(encoding='utf-8'))
+        self.assertFalse(report['ok'])
+        self.assertEqual(report['excel'][0]['mismatches'][0]['cell'], 'B7')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+測試案例 - 串流式 Excel 填寫（直接修補 xlsx 套件）
+"""
+
+import re
+import tempfile
+import unittest
+import sys
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+try:
+    from openpyxl import Workbook, load_workbook
+    from openpyxl.styles import Font
+    from scripts.xlsx_package import (
+        SheetNotFoundError,
+        XlsxPatchUnsupported,
+        cell_value,
+        full_calc_on_load,
+        patch_cells,
+        read_cells,
+        replace_tokens,
+    )
+except ImportError as e:
+    print(f"無法載入模組: {e}")
+    Workbook = None
+
+
+class TestXlsxPackage(unittest.TestCase):
+    """xlsx 直接修補測試"""
+
+    def setUp(self):
+        if Workbook is None:
+            self.skipTest("openpyxl not available")
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.template = self.root / "template.xlsx"
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "規格表"
+        ws["A1"] = "產品名稱"
+        ws["B1"] = "舊值"
+        ws["B1"].font = Font(bold=True)
+        ws["A5"] = "預算"
+        ws["C9"] = "=1+1"
+        data = wb.create_sheet("Data")
+        for r in range(1, 200):
+            data.append([r, f"row {r}", "{product.name}"])
+        wb.save(str(self.template))
+        self.output = self.root / "output.xlsx"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_patch_cells(self):
+        """測試只改寫目標儲存格並保留樣式與其他工作表"""
+        patch_cells(self.template, self.output, "規格表",
+                    {"B1": "HP Tim", "B3": 100000, "D5": 1.5, "B12": True})
+
+        wb = load_workbook(str(self.output))
+        ws = wb["規格表"]
+        self.assertEqual(ws["B1"].value, "HP Tim")
+        self.assertTrue(ws["B1"].font.bold)
+        self.assertEqual(ws["B3"].value, 100000)
+        self.assertEqual(ws["D5"].value, 1.5)
+        self.assertEqual(ws["A5"].value, "預算")
+        self.assertIs(ws["B12"].value, True)
+
+        with zipfile.ZipFile(self.template) as a, zipfile.ZipFile(self.output) as b:
+            self.assertEqual(a.read("xl/worksheets/sheet2.xml"), b.read("xl/worksheets/sheet2.xml"))
+
+    def test_patch_locations(self):
+        """測試寫入時記錄的位元組位置（含多位元組字元）正好是寫入的儲存格"""
+        cells = {"B1": "產品 HP", "a3": 100000, "C2": "規格 <v2>", "E9": 1.5}
+        written, locations = {}, {}
+        patch_cells(self.template, self.output, "規格表", cells, written=written, locations=locations)
+        (xml,) = written.values()
+        for ref, value in cells.items():
+            actual, offset, length = locations[ref]
+            self.assertEqual(actual, ref.upper())
+            fragment = xml[offset:offset + length].decode("utf-8")
+            self.assertTrue(fragment.startswith(f'<c r="{actual}"'))
+            self.assertEqual(cell_value(fragment), value)
+
+    def _with_calc_chain(self, path: Path):
+        """改寫模板：workbook.xml 不帶 fullCalcOnLoad，並加入 Excel 產生的 calcChain.xml"""
+        with zipfile.ZipFile(self.template) as zf:
+            parts = {info.filename: zf.read(info) for info in zf.infolist()}
+        workbook = parts["xl/workbook.xml"].decode("utf-8")
+        parts["xl/workbook.xml"] = re.sub(r"<calcPr\b[^>]*/>", "", workbook).encode("utf-8")
+        parts["xl/calcChain.xml"] = (
+            b'<calcChain xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            b'<c r="C9" i="1"/></calcChain>'
+        )
+        parts["[Content_Types].xml"] = parts["[Content_Types].xml"].replace(b"</Types>", (
+            b'<Override PartName="/xl/calcChain.xml" ContentType='
+            b'"application/vnd.openxmlformats-officedocument.spreadsheetml.calcChain+xml"/></Types>'))
+        parts["xl/_rels/workbook.xml.rels"] = parts["xl/_rels/workbook.xml.rels"].replace(
+            b"</Relationships>",
+            b'<Relationship Id="rIdCalc" Target="calcChain.xml" Type='
+            b'"http://schemas.openxmlformats.org/officeDocument/2006/relationships/calcChain"/>'
+            b"</Relationships>")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name, data in parts.items():
+                zf.writestr(name, data)
+
+    def test_formulas_recalculate_on_load(self):
+        """測試活頁簿含公式時設定 fullCalcOnLoad 並移除 calcChain；沒有公式時不改寫 workbook.xml"""
+        template = self.root / "calc.xlsx"
+        self._with_calc_chain(template)
+        patch_cells(template, self.output, "規格表", {"B1": "HP Tim"})
+        with zipfile.ZipFile(self.output) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertNotIn("xl/calcChain.xml", zf.namelist())
+            self.assertIn(b'<calcPr fullCalcOnLoad="1"/>', zf.read("xl/workbook.xml"))
+            self.assertNotIn(b"calcChain", zf.read("[Content_Types].xml"))
+            self.assertNotIn(b"calcChain", zf.read("xl/_rels/workbook.xml.rels"))
+        wb = load_workbook(str(self.output))
+        self.assertEqual((wb["規格表"]["B1"].value, wb["規格表"]["C9"].value), ("HP Tim", "=1+1"))
+
+        self.assertEqual(full_calc_on_load('<calcPr calcId="1" fullCalcOnLoad="0"/>'),
+                         '<calcPr calcId="1" fullCalcOnLoad="1"/>')
+
+        plain = self.root / "plain.xlsx"
+        wb = Workbook()
+        wb.active["A1"] = "x"
+        wb.save(str(plain))
+        patch_cells(plain, self.output, wb.active.title, {"B1": "HP Tim"})
+        with zipfile.ZipFile(plain) as a, zipfile.ZipFile(self.output) as b:
+            self.assertEqual(a.read("xl/workbook.xml"), b.read("xl/workbook.xml"))
+
+    def test_unsupported_cases(self):
+        """測試公式儲存格與缺少的工作表"""
+        with self.assertRaises(XlsxPatchUnsupported):
+            patch_cells(self.template, self.output, "規格表", {"C9": "x"})
+        with self.assertRaises(SheetNotFoundError):
+            patch_cells(self.template, self.output, "不存在", {"A1": "x"})
+
+    def test_replace_tokens(self):
+        """測試替換 sharedStrings 中的 Token"""
+        report = replace_tokens(self.template, self.output,
+                                {"product.name": "HP <Tim>"})
+        self.assertEqual(report["replaced"], {"product.name": "HP <Tim>"})
+        ws = load_workbook(str(self.output))["Data"]
+        self.assertEqual(ws["C10"].value, "HP <Tim>")
+        self.assertEqual(ws["B10"].value, "row 10")
+
+    def test_read_cells(self):
+        """測試唯讀取值的型別與 openpyxl 相同（含日期格式、公式、空白與不存在的儲存格）"""
+        wb = load_workbook(str(self.template))
+        ws = wb["規格表"]
+        ws["B2"] = datetime(2024, 1, 31)
+        ws["B3"] = 100000
+        ws["B4"] = 12.5
+        ws["B4"].number_format = "0.00"
+        ws["B6"] = datetime(2024, 2, 1, 13, 30)
+        ws["B6"].number_format = 'yyyy"年"m"月"d"日" hh:mm'
+        wb.save(str(self.output))
+
+        refs = ["A1", "B1", "B2", "B3", "B4", "B6", "C9", "Z99"]
+        values = read_cells(self.output, "規格表", refs)
+        expected = load_workbook(str(self.output))["規格表"]
+        self.assertEqual(values, {ref: expected[ref].value for ref in refs})
+        self.assertEqual(values["B2"], datetime(2024, 1, 31))
+        self.assertEqual(read_cells(self.output, "Data", ["B199", "A1"]), {"B199": "row 199", "A1": 1})
+        with self.assertRaises(SheetNotFoundError):
+            read_cells(self.output, "不存在", ["A1"])
+
+    def test_read_iso_date_cells(self):
+        """測試 t="d"（ISO 8601）日期儲存格與 openpyxl 讀到的相同，無法解析的值改由 openpyxl 處理"""
+        wb = load_workbook(str(self.template))
+        wb.iso_dates = True
+        ws = wb["規格表"]
+        ws["B2"] = datetime(2025, 1, 1)
+        ws["B3"] = datetime(2025, 1, 1, 13, 30)
+        wb.save(str(self.output))
+        with zipfile.ZipFile(self.output) as zf:
+            self.assertIn(b't="d"', zf.read("xl/worksheets/sheet1.xml"))
+
+        expected = load_workbook(str(self.output))["規格表"]
+        self.assertEqual(read_cells(self.output, "規格表", ["B2", "B3"]),
+                         {"B2": expected["B2"].value, "B3": expected["B3"].value})
+        self.assertEqual(cell_value('<c r="A1" t="d"><v>2025-01-01T00:00:00</v></c>'), datetime(2025, 1, 1))
+        with self.assertRaises(XlsxPatchUnsupported):
+            cell_value('<c r="A1" t="d"><v>一月</v></c>')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+測試案例 - YAML 載入與磁碟解析快取
+"""
+
+import datetime
+import os
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from scripts import yaml_cache
+
+
+class TestYamlCache(unittest.TestCase):
+    """YAML 快取測試"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "ssot").mkdir()
+        self.path = self.root / "ssot" / "master.yaml"
+        self.path.write_text(
+            "product:\n  name: HP Tim\n  released: 2024-03-01\n  build: 2024-03-01 10:20:30\n"
+            "items:\n  - {id: 1, ok: true}\n  - null\n",
+            encoding='utf-8'
+        )
+        self.cache_dir = self.root / "output" / ".cache" / "yaml"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_cache_hit_skips_parsing(self):
+        """測試快取命中時不解析 YAML，且日期型別還原一致"""
+        with mock.patch.dict(os.environ, {yaml_cache.CACHE_ENV: ""}):
+            self.assertEqual(yaml_cache.default_cache_dir(self.path), self.cache_dir.resolve())
+            first = yaml_cache.load_yaml(self.path)
+            with mock.patch.object(yaml_cache, 'parse_yaml', side_effect=AssertionError("不應重新解析")):
+                second = yaml_cache.load_yaml(self.path)
+        self.assertEqual(first, second)
+        self.assertEqual(second['product']['released'], datetime.date(2024, 3, 1))
+        self.assertEqual(second['product']['build'], datetime.datetime(2024, 3, 1, 10, 20, 30))
+        self.assertEqual(second['items'], [{'id': 1, 'ok': True}, None])
+        self.assertEqual(len(list(self.cache_dir.glob("master-*.marshal"))), 1)
+
+    def test_content_change_invalidates(self):
+        """測試檔案內容變更後重新解析，並清除舊的快取檔"""
+        yaml_cache.load_yaml(self.path, cache_dir=self.cache_dir)
+        self.path.write_text("product:\n  name: HP Tim 2\n", encoding='utf-8')
+        data, digest = yaml_cache.load_yaml_digest(self.path, cache_dir=self.cache_dir)
+        self.assertEqual(data, {'product': {'name': 'HP Tim 2'}})
+        files = list(self.cache_dir.glob("master-*.marshal"))
+        self.assertEqual(len(files), 1)
+        self.assertIn(digest[:24], files[0].name)
+
+    def test_disabled_and_corrupt_cache(self):
+        """測試停用快取時不寫檔，快取檔損毀時改為重新解析"""
+        with mock.patch.dict(os.environ, {yaml_cache.CACHE_ENV: "off"}):
+            self.assertIsNone(yaml_cache.default_cache_dir(self.path))
+            yaml_cache.load_yaml(self.path)
+        self.assertFalse(self.cache_dir.exists())
+
+        yaml_cache.load_yaml(self.path, cache_dir=self.cache_dir)
+        for cache_file in self.cache_dir.glob("*.marshal"):
+            cache_file.write_bytes(b"\x00garbage")
+        self.assertEqual(yaml_cache.load_yaml(self.path, cache_dir=self.cache_dir)['product']['name'], 'HP Tim')
+
+
+if __name__ == "__main__":
+    unittest.main()
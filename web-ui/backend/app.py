@@ -11,14 +11,26 @@ import sys
 import yaml
 import json
 import subprocess
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 import logging
-import re
 
 # Add project root to Python path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'scripts'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from mapping_plan import SsotTable  # noqa: E402
+from ssot_store import default_ssot_name, open_ssot  # noqa: E402
+from token_service import TokenIndex, scan_and_replace  # noqa: E402
+from data_cache import CachedYamlFile  # noqa: E402
+from engine_registry import router as engine_router  # noqa: E402
+from history_store import open_history_store  # noqa: E402
+from instrumentation import Tracer, activate, current as current_tracer, span, trace_path_from_env  # noqa: E402
+from jobs import Job, JobCancelled, JobManager, QueueFull  # noqa: E402
 
 # Setup logging
 logging.basicConfig(
@@ -43,122 +55,69 @@ OUTPUT_DIR = project_root / 'output'
 for dir_path in [SSOT_DIR, MAPPING_DIR, TEMPLATES_DIR, OUTPUT_DIR]:
     dir_path.mkdir(exist_ok=True)
 
+# 背景工作：同時執行數與排隊上限可由環境變數調整
+SCRIPT_TIMEOUT = 300
+job_manager = JobManager(
+    max_workers=int(os.getenv('SPEC_SYNC_JOB_WORKERS', '2')),
+    max_pending=int(os.getenv('SPEC_SYNC_JOB_QUEUE', '20')),
+    emit=socketio.emit
+)
+
+# 模板 Token 清單快取（以內容雜湊為鍵）
+token_index = TokenIndex(OUTPUT_DIR / '.cache' / 'token_index.json')
+
+# SSOT / 對應表解析快取（檔案變更或 POST 寫入後失效）
+ssot_cache = CachedYamlFile(SSOT_DIR / 'master.yaml')
+mapping_cache = CachedYamlFile(MAPPING_DIR / 'customer_mapping.yaml')
+
+# Token 替換用的 SSOT 查詢表：與 generate / validate / export 相同，
+# 依 SPEC_SYNC_SSOT 開啟 YAML、分割目錄或 SQLite（後兩者延遲載入）
+_ssot_table_state = {}
+_ssot_table_lock = threading.Lock()
+
 
 # ============================================================================
-# Helpers: SSOT access + Token scan/replace
+# Helpers: SSOT access
 # ============================================================================
 
-def _load_ssot() -> dict:
-    ssot_file = SSOT_DIR / 'master.yaml'
-    if not ssot_file.exists():
+def _ssot_table() -> SsotTable:
+    """快取的 SSOT 查詢表，供 Token 替換共用；來源變更或 POST 寫入後重建"""
+    path = SSOT_DIR / default_ssot_name()
+    if not path.exists():
         raise FileNotFoundError('SSOT 檔案不存在')
-    with open(ssot_file, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f) or {}
-
-
-def _get_nested_value(data: dict, path: str):
-    cur = data
-    try:
-        for key in path.split('.'):
-            cur = cur[key]
-        return cur
-    except Exception:
-        return None
-
-
-_TOKEN_REGEX = re.compile(r"\{([A-Za-z0-9_.-]+)\}")
-
-
-def _scan_tokens_docx(path: Path) -> set[str]:
-    from docx import Document  # type: ignore
-    tokens: set[str] = set()
-    doc = Document(str(path))
-
-    def collect(paragraph):
-        text = paragraph.text or ''
-        for m in _TOKEN_REGEX.finditer(text):
-            tokens.add(m.group(1))
-
-    for p in doc.paragraphs:
-        collect(p)
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for p in cell.paragraphs:
-                    collect(p)
-    return tokens
-
-
-def _replace_tokens_docx(path: Path, out_path: Path, ssot: dict) -> dict:
-    from docx import Document  # type: ignore
-    missing: set[str] = set()
-    replaced: dict[str, str] = {}
-    doc = Document(str(path))
-
-    def replace(paragraph):
-        text = paragraph.text or ''
-        def repl(m):
-            key = m.group(1)
-            val = _get_nested_value(ssot, key)
-            if val is None:
-                missing.add(key)
-                return m.group(0)
-            s = str(val)
-            replaced[key] = s
-            return s
-        new_text = _TOKEN_REGEX.sub(repl, text)
-        if new_text != text:
-            paragraph.text = new_text
-
-    for p in doc.paragraphs:
-        replace(p)
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for p in cell.paragraphs:
-                    replace(p)
-
-    doc.save(str(out_path))
-    return {"missing": sorted(missing), "replaced": replaced}
-
-
-def _scan_tokens_xlsx(path: Path) -> set[str]:
-    from openpyxl import load_workbook  # type: ignore
-    tokens: set[str] = set()
-    wb = load_workbook(str(path), data_only=False)
-    for ws in wb.worksheets:
-        for row in ws.iter_rows():
-            for cell in row:
-                if isinstance(cell.value, str):
-                    for m in _TOKEN_REGEX.finditer(cell.value):
-                        tokens.add(m.group(1))
-    return tokens
-
-
-def _replace_tokens_xlsx(path: Path, out_path: Path, ssot: dict) -> dict:
-    from openpyxl import load_workbook  # type: ignore
-    missing: set[str] = set()
-    replaced: dict[str, str] = {}
-    wb = load_workbook(str(path), data_only=False)
-    for ws in wb.worksheets:
-        for row in ws.iter_rows():
-            for cell in row:
-                if isinstance(cell.value, str):
-                    original = cell.value
-                    def repl(m):
-                        key = m.group(1)
-                        val = _get_nested_value(ssot, key)
-                        if val is None:
-                            missing.add(key)
-                            return m.group(0)
-                        s = str(val)
-                        replaced[key] = s
-                        return s
-                    new_val = _TOKEN_REGEX.sub(repl, original)
-                    if new_val != original:
-                        cell.value = new_val
-    wb.save(str(out_path))
-    return {"missing": sorted(missing), "replaced": replaced}
+    stamp = (str(path), path.stat().st_mtime_ns)
+    with _ssot_table_lock:
+        if _ssot_table_state.get('stamp') != stamp:
+            _ssot_table_state['table'] = SsotTable(open_ssot(path))
+            _ssot_table_state['stamp'] = stamp
+        return _ssot_table_state['table']
+
+
+def _invalidate_ssot_table():
+    """捨棄快取的 SSOT 查詢表（例如 POST 寫入後）"""
+    with _ssot_table_lock:
+        _ssot_table_state.clear()
+
+
+def _cached_json(cache: CachedYamlFile, variant: str, build):
+    """以快取的序列化結果回應，附 ETag；If-None-Match 相符時回 304 不傳內容"""
+    etag, body = cache.snapshot(('json', variant), lambda data: app.json.dumps(build(data)))
+    response = app.response_class(body + '\n', mimetype='application/json')
+    response.set_etag(f'{etag}-{variant}')
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def _flatten_dict(d, parent_key='', sep='.'):
+    items = []
+    for k, v in d.items():
+        new_key = f"{parent_key}{sep}{k}" if parent_key else k
+        if isinstance(v, dict):
+            items.extend(_flatten_dict(v, new_key, sep=sep).items())
+        else:
+            # 列表項目不展開
+            items.append((new_key, v))
+    return dict(items)
 
 
 # ============================================================================
@@ -167,19 +126,15 @@ def _replace_tokens_xlsx(path: Path, out_path: Path, ssot: dict) -> dict:
 
 @app.route('/api/ssot', methods=['GET'])
 def get_ssot():
-    """讀取 SSOT 資料"""
+    """讀取 SSOT 資料（快取；支援 If-None-Match）"""
     try:
-        ssot_file = SSOT_DIR / 'master.yaml'
-        if not ssot_file.exists():
+        if not ssot_cache.exists():
             return jsonify({'error': 'SSOT 檔案不存在'}), 404
         
-        with open(ssot_file, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-        
-        return jsonify({
+        return _cached_json(ssot_cache, 'ssot', lambda data: {
             'success': True,
             'data': data,
-            'last_modified': datetime.fromtimestamp(ssot_file.stat().st_mtime).isoformat()
+            'last_modified': datetime.fromtimestamp(ssot_cache.mtime).isoformat()
         })
     except Exception as e:
         logger.error(f"讀取 SSOT 失敗: {str(e)}")
@@ -208,6 +163,8 @@ def update_ssot():
         data['last_updated'] = datetime.now().strftime('%Y-%m-%d')
         with open(ssot_file, 'w', encoding='utf-8') as f:
             yaml.dump(data, f, allow_unicode=True, sort_keys=False)
+        ssot_cache.invalidate()
+        _invalidate_ssot_table()
         
         # 透過 WebSocket 通知前端
         socketio.emit('ssot_updated', {'timestamp': datetime.now().isoformat()})
@@ -223,30 +180,14 @@ def update_ssot():
 
 @app.route('/api/ssot/flatten', methods=['GET'])
 def get_ssot_flatten():
-    """取得扁平化的 SSOT 資料 (用於欄位對應)"""
+    """取得扁平化的 SSOT 資料 (用於欄位對應；快取，支援 If-None-Match)"""
     try:
-        ssot_file = SSOT_DIR / 'master.yaml'
-        with open(ssot_file, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-        
-        def flatten_dict(d, parent_key='', sep='.'):
-            items = []
-            for k, v in d.items():
-                new_key = f"{parent_key}{sep}{k}" if parent_key else k
-                if isinstance(v, dict):
-                    items.extend(flatten_dict(v, new_key, sep=sep).items())
-                elif isinstance(v, list):
-                    # 列表項目不展開
-                    items.append((new_key, v))
-                else:
-                    items.append((new_key, v))
-            return dict(items)
-        
-        flattened = flatten_dict(data)
+        if not ssot_cache.exists():
+            return jsonify({'error': 'SSOT 檔案不存在'}), 404
         
-        return jsonify({
+        return _cached_json(ssot_cache, 'flatten', lambda data: {
             'success': True,
-            'data': flattened
+            'data': _flatten_dict(data or {})
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -258,16 +199,12 @@ def get_ssot_flatten():
 
 @app.route('/api/mapping', methods=['GET'])
 def get_mapping():
-    """讀取欄位對應設定"""
+    """讀取欄位對應設定（快取；支援 If-None-Match）"""
     try:
-        mapping_file = MAPPING_DIR / 'customer_mapping.yaml'
-        if not mapping_file.exists():
+        if not mapping_cache.exists():
             return jsonify({'error': '對應表檔案不存在'}), 404
         
-        with open(mapping_file, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-        
-        return jsonify({
+        return _cached_json(mapping_cache, 'mapping', lambda data: {
             'success': True,
             'data': data
         })
@@ -293,6 +230,7 @@ def update_mapping():
         
         with open(mapping_file, 'w', encoding='utf-8') as f:
             yaml.dump(data, f, allow_unicode=True, sort_keys=False)
+        mapping_cache.invalidate()
         
         socketio.emit('mapping_updated', {'timestamp': datetime.now().isoformat()})
         
@@ -375,19 +313,12 @@ def scan_template_tokens(filename):
         if not file_path.exists():
             return jsonify({'error': '模板不存在'}), 404
 
-        ext = file_path.suffix.lower()
-        if ext == '.docx':
-            try:
-                tokens = sorted(_scan_tokens_docx(file_path))
-            except ImportError:
-                return jsonify({'error': '缺少套件 python-docx'}), 500
-        elif ext == '.xlsx':
-            try:
-                tokens = sorted(_scan_tokens_xlsx(file_path))
-            except ImportError:
-                return jsonify({'error': '缺少套件 openpyxl'}), 500
-        else:
+        if file_path.suffix.lower() not in ('.docx', '.xlsx'):
             return jsonify({'error': '不支援的檔案類型'}), 400
+        try:
+            tokens = token_index.tokens(file_path)
+        except ImportError as e:
+            return jsonify({'error': f'缺少套件 {e.name or e}'}), 500
 
         return jsonify({
             'success': True,
@@ -405,171 +336,256 @@ def scan_template_tokens(filename):
 
 @app.route('/api/generate', methods=['POST'])
 def generate_documents():
-    """產生文件：Token 優先，必要時回退到舊版腳本"""
+    """提交文件產生工作（背景執行），回傳 job_id；wait=true 時等待完成後回傳結果
+
+    trace=true（或設定 SPEC_SYNC_TRACE）時記錄各階段耗時，結果的 timing 為摘要，
+    trace_file 為 output/.cache/traces/ 下的 Chrome trace。
+    """
+    config = request.get_json() or {}
+    engine = config.get('engine', 'auto')
+    templates = config.get('templates', [])
+    trace = bool(config.get('trace')) or trace_path_from_env() is not None
+
+    if not isinstance(templates, list) or not templates:
+        return jsonify({'error': '請提供欲產生的模板清單'}), 400
+
     try:
-        config = request.get_json() or {}
-        engine = config.get('engine', 'auto')
-        templates = config.get('templates', [])
+        job = job_manager.submit('generate', {'engine': engine, 'templates': templates, 'trace': trace},
+                                 _run_generate_job)
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 429
 
-        if not isinstance(templates, list) or not templates:
-            return jsonify({'error': '請提供欲產生的模板清單'}), 400
+    if config.get('wait'):
+        job.wait()
+        return jsonify(_job_response(job))
+
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f'/api/jobs/{job.id}'
+    }), 202
+
+
+def _job_response(job: Job) -> dict:
+    data = job.to_dict()
+    data['success'] = job.status == 'succeeded'
+    return data
+
+
+def _report_template(job: Job, payload: dict):
+    """記錄單一模板結果並即時送出 generate_progress"""
+    job.results.append(payload)
+    job.progress['done'] = len(job.results)
+    job_manager.emit('generate_progress', dict(payload, job_id=job.id, progress=dict(job.progress)))
+
+
+TRACE_DIR = OUTPUT_DIR / '.cache' / 'traces'
 
-        os.environ['SPEC_SYNC_ENGINE'] = engine
 
-        socketio.emit('generate_start', {
+def _run_generate_job(job: Job):
+    """背景工作：Token 優先，必要時回退到舊版腳本（params.trace 時記錄各階段耗時）"""
+    tracer = Tracer() if job.params.get('trace') else None
+    try:
+        with activate(tracer):
+            _generate_job(job)
+    finally:
+        if tracer is not None:
+            trace_file = TRACE_DIR / f'{job.id}.json'
+            tracer.write(trace_file)
+            job.extra['timing'] = tracer.summary()
+            job.extra['trace_file'] = str(trace_file.relative_to(OUTPUT_DIR))
+
+
+def _generate_job(job: Job):
+    engine = job.params['engine']
+    templates = job.params['templates']
+    job.progress['total'] = len(templates)
+
+    job_manager.emit('generate_start', {
+        'job_id': job.id,
+        'timestamp': datetime.now().isoformat(),
+        'templates': templates
+    })
+
+    try:
+        fallback = _generate_with_tokens(job, templates)
+        if fallback:
+            _generate_with_script(job, fallback, engine)
+    except JobCancelled:
+        job_manager.emit('generate_error', {
+            'job_id': job.id,
+            'timestamp': datetime.now().isoformat(),
+            'error': '工作已取消'
+        })
+        raise
+    except Exception as e:
+        logger.error(f"Generate failed: {str(e)}")
+        job_manager.emit('generate_error', {
+            'job_id': job.id,
+            'timestamp': datetime.now().isoformat(),
+            'error': str(e)
+        })
+        raise
+
+    job.progress['current'] = None
+    job_manager.emit('generate_complete', {
+        'job_id': job.id,
+        'timestamp': datetime.now().isoformat(),
+        'results': job.results
+    })
+    try:
+        save_history_record({
+            'job_id': job.id,
             'timestamp': datetime.now().isoformat(),
-            'templates': templates
+            'engine': engine,
+            'templates': templates,
+            'results': job.results
         })
+    except Exception as e:
+        logger.warning(f"寫入歷史記錄失敗: {e}")
+
+
+def _generate_with_tokens(job: Job, templates: list) -> list:
+    """Token 模式逐一處理模板；回傳需要交給舊版腳本的模板清單"""
+    try:
+        ssot = _ssot_table()
+    except Exception:
+        # 無法載入 SSOT 時，無法執行 Token 替換
+        return list(templates)
+
+    token_success_count = 0
+    for template in templates:
+        job.check_cancelled()
+        job.progress['current'] = template
 
-        results = []
-        processed_success = set()
-        token_mode_available = True
-        token_success_count = 0
+        t_path = TEMPLATES_DIR / template
+        if not t_path.exists():
+            _report_template(job, {'template': template, 'status': 'error', 'error': '模板不存在'})
+            continue
+
+        if t_path.suffix.lower() not in ('.docx', '.xlsx'):
+            _report_template(job, {'template': template, 'status': 'error', 'error': '不支援的檔案類型'})
+            continue
 
-        # 嘗試 Token 模式
         try:
-            ssot = _load_ssot()
-        except Exception as e:
-            # 無法載入 SSOT 時，無法執行 Token 替換
-            token_mode_available = False
-            ssot = None
-
-        if token_mode_available:
-            for template in templates:
-                t_path = TEMPLATES_DIR / template
-                if not t_path.exists():
-                    results.append({
-                        'template': template,
-                        'status': 'error',
-                        'error': '模板不存在'
-                    })
-                    continue
-
-                ext = t_path.suffix.lower()
-                try:
-                    if ext == '.docx':
-                        tokens = _scan_tokens_docx(t_path)
-                    elif ext == '.xlsx':
-                        tokens = _scan_tokens_xlsx(t_path)
-                    else:
-                        results.append({
-                            'template': template,
-                            'status': 'error',
-                            'error': '不支援的檔案類型'
-                        })
-                        continue
-
-                    if tokens:
-                        out_name = f"filled_{template}"
-                        out_path = OUTPUT_DIR / out_name
-                        if ext == '.docx':
-                            info = _replace_tokens_docx(t_path, out_path, ssot)
-                        else:
-                            info = _replace_tokens_xlsx(t_path, out_path, ssot)
-
-                        token_success_count += 1
-                        processed_success.add(template)
-                        payload = {
-                            'template': template,
-                            'status': 'success',
-                            'output': out_name,
-                            'tokens_found': len(tokens),
-                            'missing': info.get('missing', []),
-                            'replaced_count': len(info.get('replaced', {}))
-                        }
-                        results.append(payload)
-                        socketio.emit('generate_progress', payload)
-                    else:
-                        payload = {
-                            'template': template,
-                            'status': 'skipped',
-                            'reason': '未找到 Token'
-                        }
-                        results.append(payload)
-                        socketio.emit('generate_progress', payload)
-
-                except ImportError as ie:
-                    token_mode_available = False
-                    break
-                except Exception as e:
-                    results.append({
-                        'template': template,
-                        'status': 'error',
-                        'error': str(e)
-                    })
+            # 單次解析：同時取得 Token、缺少的鍵與替換結果，有 Token 才寫出
+            out_name = f"filled_{template}"
+            with span('template', template=template, kind='token'):
+                info = scan_and_replace(t_path, OUTPUT_DIR / out_name, ssot, index=token_index)
+            if info['tokens']:
+                token_success_count += 1
+                _report_template(job, {
+                    'template': template,
+                    'status': 'success',
+                    'output': out_name,
+                    'tokens_found': len(info['tokens']),
+                    'missing': info['missing'],
+                    'replaced_count': len(info['replaced'])
+                })
+            else:
+                _report_template(job, {'template': template, 'status': 'skipped', 'reason': '未找到 Token'})
 
-        # 若 Token 模式不可用或沒有任何成功，回退舊版腳本
-        if (not token_mode_available) or token_success_count == 0:
-            script_path = project_root / 'scripts' / 'generate_docs.py'
-            try:
-                result = subprocess.run(
-                    [sys.executable, str(script_path)],
-                    cwd=str(project_root),
-                    capture_output=True,
-                    text=True,
-                    timeout=300
-                )
-
-                if result.returncode == 0:
-                    for template in templates:
-                        if template in processed_success:
-                            continue  # 已由 Token 模式產出
-                        output_file = f"filled_{template}"
-                        if (OUTPUT_DIR / output_file).exists():
-                            payload = {
-                                'template': template,
-                                'status': 'success',
-                                'output': output_file
-                            }
-                            results.append(payload)
-                            socketio.emit('generate_progress', payload)
-                        else:
-                            results.append({
-                                'template': template,
-                                'status': 'error',
-                                'error': 'Output file not found'
-                            })
-                else:
-                    error_msg = result.stderr or result.stdout
-                    for template in templates:
-                        if template in processed_success:
-                            continue
-                        payload = {
-                            'template': template,
-                            'status': 'error',
-                            'error': error_msg
-                        }
-                        results.append(payload)
-                        socketio.emit('generate_progress', payload)
-
-            except subprocess.TimeoutExpired:
-                error_msg = 'Generation timeout (5 minutes)'
+        except ImportError:
+            # Token 模式不可用：先前略過或失敗的模板與尚未處理的模板都交給舊版腳本
+            return _script_retry(job, templates)
+        except Exception as e:
+            _report_template(job, {'template': template, 'status': 'error', 'error': str(e)})
+
+    if token_success_count:
+        return []
+    # 沒有任何 Token 成功：先前略過的模板改由舊版腳本產生
+    return _script_retry(job, templates)
+
+
+def _script_retry(job: Job, templates: list) -> list:
+    """未以 Token 模式成功的模板（略過、失敗或尚未處理）；移除其結果，交給舊版腳本重試"""
+    processed = {r['template'] for r in job.results if r['status'] == 'success'}
+    retry = [t for t in templates if t not in processed]
+    job.results = [r for r in job.results if r['template'] not in retry]
+    job.progress['done'] = len(job.results)
+    return retry
+
+
+def _generate_with_script(job: Job, templates: list, engine: str):
+    """以子行程執行舊版 generate_docs.py；可取消，逾時 5 分鐘"""
+    script_path = project_root / 'scripts' / 'generate_docs.py'
+    job.progress['current'] = 'generate_docs.py'
+    tracer = current_tracer()
+    command = [sys.executable, str(script_path)]
+    script_trace = TRACE_DIR / f'{job.id}-script.json'
+    if tracer is not None:
+        command += ['--trace', str(script_trace)]
+    proc = subprocess.Popen(
+        command,
+        cwd=str(project_root),
+        env=dict(os.environ, SPEC_SYNC_ENGINE=engine),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    with proc:
+        deadline = time.monotonic() + SCRIPT_TIMEOUT
+        while proc.poll() is None:
+            if job.wait_cancel(0.5) or time.monotonic() > deadline:
+                proc.kill()
+                proc.communicate()
+                if job.cancel_requested:
+                    raise JobCancelled(job.id)
                 for template in templates:
-                    if template in processed_success:
-                        continue
-                    results.append({
+                    _report_template(job, {
                         'template': template,
                         'status': 'error',
-                        'error': error_msg
+                        'error': 'Generation timeout (5 minutes)'
                     })
+                return
+        stdout, stderr = proc.communicate()
+
+    if tracer is not None and script_trace.exists():
+        with open(script_trace, 'r', encoding='utf-8') as f:
+            tracer.merge(json.load(f))
+        script_trace.unlink()
+
+    for template in templates:
+        if proc.returncode != 0:
+            _report_template(job, {'template': template, 'status': 'error', 'error': stderr or stdout})
+            continue
+        output_file = f"filled_{template}"
+        if (OUTPUT_DIR / output_file).exists():
+            _report_template(job, {'template': template, 'status': 'success', 'output': output_file})
+        else:
+            _report_template(job, {'template': template, 'status': 'error', 'error': 'Output file not found'})
 
-        socketio.emit('generate_complete', {
-            'timestamp': datetime.now().isoformat(),
-            'results': results
-        })
 
-        return jsonify({
-            'success': True,
-            'results': results
-        })
+# ============================================================================
+# API: 背景工作
+# ============================================================================
 
-    except Exception as e:
-        logger.error(f"Generate failed: {str(e)}")
-        socketio.emit('generate_error', {
-            'timestamp': datetime.now().isoformat(),
-            'error': str(e)
-        })
-        return jsonify({'error': str(e)}), 500
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """列出背景工作（最新的在前面）"""
+    return jsonify({
+        'success': True,
+        'data': [_job_response(job) for job in job_manager.list()]
+    })
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """查詢工作狀態、進度與結果"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': '找不到工作'}), 404
+    return jsonify(_job_response(job))
+
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """取消工作：排隊中立即取消，執行中於下一個模板前停止"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': '找不到工作'}), 404
+    return jsonify(_job_response(job))
 
 
 @app.route('/api/validate', methods=['POST'])
@@ -634,39 +650,45 @@ def download_file(filename):
 # API: 歷史記錄
 # ============================================================================
 
-HISTORY_FILE = OUTPUT_DIR / 'generation_history.json'
+# 產生歷史記錄（SQLite；保留政策由 SPEC_SYNC_HISTORY_KEEP / SPEC_SYNC_HISTORY_DAYS 設定）
+history_store = open_history_store(OUTPUT_DIR)
+
 
 def save_history_record(record):
     """儲存歷史記錄"""
-    history = []
-    if HISTORY_FILE.exists():
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-            history = json.load(f)
-    
-    history.insert(0, record)  # 最新的在前面
-    history = history[:100]  # 保留最近 100 筆
-    
-    with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(history, f, ensure_ascii=False, indent=2)
+    history_store.append(record)
 
 
 @app.route('/api/history', methods=['GET'])
 def get_history():
-    """取得產生歷史記錄"""
+    """取得產生歷史記錄
+
+    查詢參數：limit（預設 100）、offset、template、status（success/partial/error）、
+    since / until（ISO 日期或時間）
+    """
     try:
-        if not HISTORY_FILE.exists():
-            return jsonify({
-                'success': True,
-                'data': []
-            })
-        
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-            history = json.load(f)
-        
+        limit = min(int(request.args.get('limit', 100)), 1000)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit / offset 必須為整數'}), 400
+    try:
+        history, total = history_store.query(
+            limit=limit,
+            offset=offset,
+            template=request.args.get('template'),
+            status=request.args.get('status'),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+        )
         return jsonify({
             'success': True,
-            'data': history
+            'data': history,
+            'total': total,
+            'limit': limit,
+            'offset': offset
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -685,7 +707,8 @@ def get_status():
             'templates_count': len(list(TEMPLATES_DIR.glob('*.docx'))) + len(list(TEMPLATES_DIR.glob('*.xlsx'))),
             'output_count': len(list(OUTPUT_DIR.glob('*.docx'))) + len(list(OUTPUT_DIR.glob('*.xlsx'))),
             'python_version': sys.version,
-            'server_time': datetime.now().isoformat()
+            'server_time': datetime.now().isoformat(),
+            'engines': engine_router.status()
         }
         
         return jsonify({
@@ -0,0 +1,99 @@
+"""
+Spec-Sync SSOT - In-memory YAML cache for the web backend
+
+SSOT 與對應表在行程內只解析一次：
+- 每次取用時比對檔案的 mtime/大小，檔案被外部修改時自動重新載入
+- POST 寫入後由處理函式呼叫 invalidate()（避免 mtime 精度不足時漏掉變更）
+- 衍生資料（扁平化結果、序列化後的 JSON）依版本快取，同一版本只計算一次
+- etag 為檔案內容的雜湊，供 ETag / If-None-Match 使用
+- 預設以 yaml_cache 解析（libyaml＋磁碟快取），後端重啟後不需重新解析未變更的檔案
+
+快取的資料為共用物件，呼叫端不可修改。
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from yaml_cache import load_yaml_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class CachedYamlFile:
+    """單一 YAML 檔案的解析快取"""
+
+    def __init__(self, path: Path, loader: Optional[Callable[[bytes], Any]] = None):
+        self.path = Path(path)
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._signature: Optional[Tuple[int, int]] = None
+        self._data: Any = None
+        self._etag: Optional[str] = None
+        self._derived: Dict[Hashable, Any] = {}
+        self.loads = 0
+
+    def _stat_signature(self) -> Tuple[int, int]:
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def _refresh(self):
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return
+        raw = self.path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        if self._loader is not None:
+            self._data = self._loader(raw)
+        else:
+            self._data = load_yaml_bytes(raw, self.path, digest)
+        self._etag = digest[:32]
+        self._signature = signature
+        self._derived = {}
+        self.loads += 1
+        logger.debug(f"重新載入 {self.path.name}")
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def get(self) -> Any:
+        """解析後的資料；檔案不存在時拋出 FileNotFoundError"""
+        with self._lock:
+            self._refresh()
+            return self._data
+
+    @property
+    def etag(self) -> str:
+        with self._lock:
+            self._refresh()
+            return self._etag
+
+    @property
+    def mtime(self) -> float:
+        with self._lock:
+            self._refresh()
+            return self._signature[0] / 1e9
+
+    def derived(self, key: Hashable, build: Callable[[Any], Any]) -> Any:
+        """依目前版本快取 build(data) 的結果"""
+        with self._lock:
+            self._refresh()
+            if key not in self._derived:
+                self._derived[key] = build(self._data)
+            return self._derived[key]
+
+    def snapshot(self, key: Hashable, build: Callable[[Any], Any]) -> Tuple[str, Any]:
+        """同一版本的 (etag, build(data))，兩者不會因檔案在中途變更而不一致"""
+        with self._lock:
+            value = self.derived(key, build)
+            return self._etag, value
+
+    def invalidate(self):
+        with self._lock:
+            self._signature = None
+            self._data = None
+            self._etag = None
+            self._derived = {}
@@ -0,0 +1,161 @@
+"""
+Spec-Sync SSOT - Generation history store
+
+產生歷史記錄改存於 SQLite（output/generation_history.db），取代每次整份重寫的 JSON：
+- 新增記錄只做一次 INSERT，不讀取既有記錄
+- 依時間、模板、狀態建立索引，支援分頁與篩選
+- 保留政策（筆數上限，預設 100 筆 / 天數）以 DELETE 套用，不重寫整個檔案
+- WAL 模式＋行程內鎖，Web 背景工作同時寫入不會互相覆蓋
+- 舊版 generation_history.json 於首次開啟時匯入，並改名為 .json.migrated
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 預設保留的最新記錄筆數（與舊版 JSON 歷史記錄相同）；設為 0 時不限制
+DEFAULT_KEEP = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT,
+    timestamp TEXT NOT NULL,
+    status TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generations_timestamp ON generations (timestamp);
+CREATE INDEX IF NOT EXISTS generations_status ON generations (status, id);
+CREATE TABLE IF NOT EXISTS generation_templates (
+    generation_id INTEGER NOT NULL REFERENCES generations (id) ON DELETE CASCADE,
+    template TEXT NOT NULL,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS generation_templates_template ON generation_templates (template, generation_id);
+CREATE INDEX IF NOT EXISTS generation_templates_generation ON generation_templates (generation_id);
+"""
+
+
+def record_status(record: Dict[str, Any]) -> str:
+    """整批產生的狀態：全部成功 success、全部失敗 error，其餘為 partial"""
+    statuses = [r.get('status') for r in record.get('results') or []]
+    errors = statuses.count('error')
+    if not errors:
+        return 'success'
+    return 'error' if errors == len(statuses) else 'partial'
+
+
+class HistoryStore:
+    """產生歷史記錄（最新的在前）"""
+
+    def __init__(self, path: Path, keep: int = DEFAULT_KEEP, max_age_days: int = 0,
+                 legacy_json: Optional[Path] = None):
+        """keep（預設 DEFAULT_KEEP 筆）/ max_age_days 為 0 時不限制"""
+        self.path = Path(path)
+        self.keep = keep
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        if legacy_json is not None and Path(legacy_json).exists():
+            self._migrate(Path(legacy_json))
+
+    def close(self):
+        self._conn.close()
+
+    def _migrate(self, legacy_json: Path):
+        try:
+            with open(legacy_json, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"無法匯入舊版歷史記錄 {legacy_json.name}: {e}")
+            return
+        with self._lock, self._conn:
+            for record in reversed(history):
+                self._insert(record)
+        legacy_json.rename(legacy_json.with_name(legacy_json.name + '.migrated'))
+        logger.info(f"已匯入 {len(history)} 筆舊版歷史記錄")
+
+    def _insert(self, record: Dict[str, Any]) -> int:
+        cur = self._conn.execute(
+            "INSERT INTO generations (job_id, timestamp, status, record) VALUES (?, ?, ?, ?)",
+            (record.get('job_id'), record.get('timestamp') or datetime.now().isoformat(),
+             record_status(record), json.dumps(record, ensure_ascii=False))
+        )
+        generation_id = cur.lastrowid
+        self._conn.executemany(
+            "INSERT INTO generation_templates (generation_id, template, status) VALUES (?, ?, ?)",
+            [(generation_id, r.get('template'), r.get('status'))
+             for r in record.get('results') or [] if r.get('template')]
+        )
+        return generation_id
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """新增一筆記錄並套用保留政策，回傳記錄 id"""
+        with self._lock, self._conn:
+            generation_id = self._insert(record)
+            self._apply_retention()
+        return generation_id
+
+    def _apply_retention(self):
+        if self.keep > 0:
+            self._conn.execute(
+                "DELETE FROM generations WHERE id NOT IN "
+                "(SELECT id FROM generations ORDER BY id DESC LIMIT ?)",
+                (self.keep,)
+            )
+        if self.max_age_days > 0:
+            cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+            self._conn.execute("DELETE FROM generations WHERE timestamp < ?", (cutoff,))
+
+    def query(self, limit: int = 100, offset: int = 0, template: Optional[str] = None,
+              status: Optional[str] = None, since: Optional[str] = None,
+              until: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """分頁查詢，回傳 (記錄, 符合條件的總筆數)
+
+        template 篩選包含該模板的記錄；since / until 為 ISO 日期或時間（until 為日期時含當日）。
+        """
+        clauses, params = [], []
+        if template:
+            clauses.append("id IN (SELECT generation_id FROM generation_templates WHERE template = ?)")
+            params.append(template)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            if len(until) == 10:
+                until = (date.fromisoformat(until) + timedelta(days=1)).isoformat()
+            clauses.append("timestamp < ?")
+            params.append(until)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM generations{where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT record FROM generations{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows], total
+
+
+def open_history_store(output_dir: Path) -> HistoryStore:
+    """依環境變數 SPEC_SYNC_HISTORY_KEEP（預設 100）/ SPEC_SYNC_HISTORY_DAYS 開啟 output/ 下的歷史記錄"""
+    output_dir = Path(output_dir)
+    return HistoryStore(
+        output_dir / 'generation_history.db',
+        keep=int(os.getenv('SPEC_SYNC_HISTORY_KEEP', str(DEFAULT_KEEP))),
+        max_age_days=int(os.getenv('SPEC_SYNC_HISTORY_DAYS', '0')),
+        legacy_json=output_dir / 'generation_history.json',
+    )
@@ -0,0 +1,154 @@
+"""
+Spec-Sync SSOT - Background job queue
+
+/api/generate 的文件產生改在背景執行：
+- 有上限的工作執行緒池（同時執行的工作數）與排隊上限
+- 每個工作有 job_id，可查詢狀態/進度/結果並取消
+- 進度透過 emit 回呼即時送出（由 app.py 接到 socketio）
+"""
+
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = ('succeeded', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """工作已被取消"""
+
+
+class QueueFull(Exception):
+    """排隊中的工作已達上限"""
+
+
+class Job:
+    """單一背景工作"""
+
+    def __init__(self, kind: str, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = 'queued'
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.progress = {'done': 0, 'total': 0, 'current': None}
+        self.results: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.extra: Dict[str, Any] = {}
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self.future = None
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """於安全的中斷點呼叫；已要求取消時拋出 JobCancelled"""
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    def wait_cancel(self, timeout: float) -> bool:
+        """等待取消要求（供輪詢子行程時使用）"""
+        return self._cancel.wait(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'progress': dict(self.progress),
+            'results': list(self.results),
+            'error': self.error,
+            'params': self.params,
+        }
+        data.update(self.extra)
+        return data
+
+
+class JobManager:
+    """背景工作管理：提交、查詢、取消"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 20, keep: int = 200,
+                 emit: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='spec-sync-job')
+        self._max_pending = max_pending
+        self._keep = keep
+        self._emit = emit or (lambda event, payload: None)
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, payload: Dict[str, Any]):
+        try:
+            self._emit(event, payload)
+        except Exception as e:
+            logger.debug(f"送出事件 {event} 失敗: {e}")
+
+    def submit(self, kind: str, params: Dict[str, Any], fn: Callable[[Job], None]) -> Job:
+        """提交工作；fn(job) 在背景執行，負責更新 progress/results"""
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.status == 'queued')
+            if pending >= self._max_pending:
+                raise QueueFull(f'排隊中的工作已達上限 ({self._max_pending})')
+            job = Job(kind, params)
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], None]):
+        if job.cancel_requested:
+            self._finish(job, 'cancelled')
+            return
+        job.status = 'running'
+        job.started_at = datetime.now().isoformat()
+        try:
+            fn(job)
+            self._finish(job, 'succeeded')
+        except JobCancelled:
+            self._finish(job, 'cancelled')
+        except Exception as e:
+            logger.error(f"工作 {job.id} 失敗: {e}")
+            job.error = str(e)
+            self._finish(job, 'failed')
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = datetime.now().isoformat()
+        job._done.set()
+
+    def _prune(self):
+        # 只保留最近 keep 筆已結束的工作
+        finished = [jid for jid, j in self._jobs.items() if j.status in TERMINAL_STATES]
+        for jid in finished[:max(0, len(self._jobs) - self._keep)]:
+            del self._jobs[jid]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        return list(reversed(list(self._jobs.values())))
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """要求取消：排隊中的工作立即取消，執行中的工作於下個中斷點停止"""
+        job = self._jobs.get(job_id)
+        if job is None or job.status in TERMINAL_STATES:
+            return job
+        job._cancel.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, 'cancelled')
+        return job
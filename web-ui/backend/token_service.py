@@ -0,0 +1,273 @@
+"""
+Spec-Sync SSOT - Token scan/replace for the web backend
+
+Token 模式（模板中的 {path.to.value}）的掃描與替換，不依賴 Flask：
+- scan_and_replace：每個模板只解析一次，同時取得 Token 集合、缺少的鍵與替換值；
+  有 Token 才寫出檔案
+- TokenIndex：以模板內容雜湊快取 Token 清單，未變更的模板掃描時不需重新解析
+- 重複區域 {清單[].欄位}：清單路徑即 SSOT 路徑，所在的表格列依清單項目展開
+"""
+
+import json
+import logging
+import os
+import threading
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from build_manifest import hash_file
+from docx_text import extract_docx_text
+from instrumentation import count, count_file_bytes, span
+from mapping_plan import SsotTable, TokenValues
+from package_writer import write_package
+from template_compiler import CompileUnsupported, load_plan, render_docx
+from token_replacer import (
+    REPEAT_TOKEN_PATTERN,
+    TOKEN_PATTERN,
+    expand_repeating_regions,
+    new_report,
+    replace_tokens_in_element,
+)
+from xlsx_package import XlsxPatchUnsupported, expand_repeat_rows_worksheet, token_replacements
+
+logger = logging.getLogger(__name__)
+
+DOCX_BODY_PART = 'word/document.xml'
+TOKEN_INDEX_VERSION = 2
+
+
+def _token_values(ssot) -> TokenValues:
+    """ssot 可為 dict 或預先建立的 SsotTable（多個模板共用時避免重複扁平化）"""
+    return TokenValues(ssot if isinstance(ssot, SsotTable) else SsotTable(ssot))
+
+
+def _find_tokens(text: str) -> set:
+    tokens = {m.group(1) for m in TOKEN_PATTERN.finditer(text)}
+    if "[]" in text:
+        tokens.update(m.group(1) for m in REPEAT_TOKEN_PATTERN.finditer(text))
+    return tokens
+
+
+def _result(report: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'tokens': sorted(report['tokens']),
+        'missing': sorted(report['missing']),
+        'replaced': report['replaced'],
+    }
+
+
+# ============================================================================
+# 掃描（不寫出）
+# ============================================================================
+
+def scan_tokens_docx(path: Path) -> set:
+    """串流讀取本文文字並找出 Token（Token 被拆成多個 run 時亦可找到）"""
+    text = extract_docx_text(path, parts=[DOCX_BODY_PART])
+    return _find_tokens(text)
+
+
+def scan_tokens_xlsx(path: Path) -> set:
+    try:
+        report, _ = token_replacements(path, {})
+        return set(report['tokens'])
+    except XlsxPatchUnsupported as e:
+        logger.info(f"改用 openpyxl 掃描 Token：{e}")
+    from openpyxl import load_workbook  # type: ignore
+    tokens = set()
+    wb = load_workbook(str(path), read_only=True, data_only=False)
+    try:
+        for ws in wb.worksheets:
+            for row in ws.iter_rows(values_only=True):
+                for value in row:
+                    if isinstance(value, str):
+                        tokens.update(_find_tokens(value))
+    finally:
+        wb.close()
+    return tokens
+
+
+def scan_tokens(path: Path) -> set:
+    ext = path.suffix.lower()
+    if ext == '.docx':
+        return scan_tokens_docx(path)
+    if ext == '.xlsx':
+        return scan_tokens_xlsx(path)
+    raise ValueError('不支援的檔案類型')
+
+
+# ============================================================================
+# 單次掃描＋替換
+# ============================================================================
+
+def replace_tokens_docx(path: Path, out_path: Optional[Path], ssot: dict) -> Dict[str, Any]:
+    """依預編譯計畫替換 word/document.xml 的 Token；out_path 為 None 或沒有 Token 時不寫出
+
+    模板無法預編譯時改為解析 XML 一次（lxml）。
+    """
+    values = _token_values(ssot)
+    try:
+        with span('load_plan'):
+            plan = load_plan(path)
+        with span('render'):
+            report, parts = render_docx(plan, values, values.table.get)
+    except (CompileUnsupported, ValueError) as e:
+        logger.debug(f"{path.name} 改用 lxml 解析：{e}")
+        count('fallback.dom')
+        return _replace_tokens_docx_dom(path, out_path, values)
+    if out_path is not None and report['tokens']:
+        with span('save'):
+            write_package(path, out_path, parts)
+    return _result(report)
+
+
+def _replace_tokens_docx_dom(path: Path, out_path: Optional[Path], values: TokenValues) -> Dict[str, Any]:
+    from lxml import etree  # type: ignore
+    report = new_report()
+    with span('open'), zipfile.ZipFile(path, 'r') as zf:
+        root = etree.fromstring(zf.read(DOCX_BODY_PART))
+    with span('expand_rows'):
+        expand_repeating_regions(root, values.table.get, report)
+    with span('replace_tokens'):
+        replace_tokens_in_element(root, values, report)
+    if out_path is not None and report['tokens']:
+        with span('save'):
+            xml = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+            write_package(path, out_path, {DOCX_BODY_PART: xml})
+    return _result(report)
+
+
+def replace_tokens_xlsx(path: Path, out_path: Optional[Path], ssot: dict) -> Dict[str, Any]:
+    """直接修補 sharedStrings / inline string，不載入整本活頁簿"""
+    values = _token_values(ssot)
+    try:
+        with span('load_plan'):
+            inline_parts = load_plan(path)['inline_parts']
+    except CompileUnsupported:
+        inline_parts = None
+    try:
+        with span('xlsx_patch'):
+            report, replacements = token_replacements(path, values, lists=values.table.get,
+                                                      inline_parts=inline_parts)
+    except XlsxPatchUnsupported as e:
+        logger.info(f"改用 openpyxl 替換 Token：{e}")
+        count('fallback.openpyxl')
+        return replace_tokens_xlsx_openpyxl(path, out_path, ssot)
+    if out_path is not None and report['tokens']:
+        with span('save'):
+            write_package(path, out_path, replacements)
+    return _result(report)
+
+
+def replace_tokens_xlsx_openpyxl(path: Path, out_path: Optional[Path], ssot: dict) -> Dict[str, Any]:
+    from openpyxl import load_workbook  # type: ignore
+    values = _token_values(ssot)
+    report = new_report()
+
+    def repl(m):
+        key = m.group(1)
+        report['tokens'].add(key)
+        val = values.get(key)
+        if val is None:
+            report['missing'].add(key)
+            return m.group(0)
+        report['replaced'][key] = val
+        return val
+
+    with span('open'):
+        wb = load_workbook(str(path), data_only=False)
+    with span('replace_tokens'):
+        for ws in wb.worksheets:
+            expand_repeat_rows_worksheet(ws, values.table.get, report)
+            for row in ws.iter_rows():
+                for cell in row:
+                    if isinstance(cell.value, str):
+                        new_val = TOKEN_PATTERN.sub(repl, cell.value)
+                        if new_val != cell.value:
+                            cell.value = new_val
+    if out_path is not None and report['tokens']:
+        with span('save'):
+            wb.save(str(out_path))
+    return _result(report)
+
+
+def scan_and_replace(path: Path, out_path: Optional[Path], ssot: dict,
+                     index: Optional['TokenIndex'] = None) -> Dict[str, Any]:
+    """單次解析模板：回傳 tokens/missing/replaced；有 Token 時寫出 out_path
+
+    提供 index 時，順便把 Token 清單寫入快取，之後的掃描不需重新解析。
+    """
+    digest = hash_file(path) if index is not None else None
+    ext = path.suffix.lower()
+    if ext == '.docx':
+        result = replace_tokens_docx(path, out_path, ssot)
+    elif ext == '.xlsx':
+        result = replace_tokens_xlsx(path, out_path, ssot)
+    else:
+        raise ValueError('不支援的檔案類型')
+    if index is not None:
+        index.put(digest, result['tokens'])
+    count_file_bytes('bytes_read', path)
+    if out_path is not None and result['tokens']:
+        count_file_bytes('bytes_written', out_path)
+    return result
+
+
+# ============================================================================
+# Token 索引快取
+# ============================================================================
+
+class TokenIndex:
+    """模板內容雜湊 → Token 清單，保存在 JSON 檔（例如 output/.cache/token_index.json）"""
+
+    def __init__(self, path: Path, max_entries: int = 1000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[str]] = self._load()
+
+    def _load(self) -> Dict[str, List[str]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get('version') != TOKEN_INDEX_VERSION:
+            return {}
+        return data.get('entries', {})
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': TOKEN_INDEX_VERSION, 'entries': self._entries}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def get(self, digest: str) -> Optional[List[str]]:
+        with self._lock:
+            return self._entries.get(digest)
+
+    def put(self, digest: str, tokens):
+        tokens = sorted(tokens)
+        with self._lock:
+            if self._entries.get(digest) == tokens:
+                return
+            self._entries.pop(digest, None)
+            self._entries[digest] = tokens
+            # 超過上限時丟棄最舊的項目
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"寫入 Token 索引失敗: {e}")
+
+    def tokens(self, path: Path) -> List[str]:
+        """回傳模板的 Token 清單；內容未變更時直接使用快取"""
+        digest = hash_file(path)
+        cached = self.get(digest)
+        if cached is not None:
+            return cached
+        tokens = sorted(scan_tokens(path))
+        self.put(digest, tokens)
+        return tokens
@@ -2,11 +2,13 @@ import { defineStore } from 'pinia'
 import axios from 'axios'
 
 const API_BASE = '/api'
+const JOB_POLL_INTERVAL = 500
 
 export const useGeneratorStore = defineStore('generator', {
   state: () => ({
     templates: [],
     generating: false,
+    currentJobId: null,
     history: []
   }),
 
@@ -22,19 +24,35 @@ export const useGeneratorStore = defineStore('generator', {
       }
     },
 
-    async generate(config) {
+    // 提交背景產生工作，輪詢 /api/jobs/<id> 直到結束；onProgress 每次輪詢時收到工作狀態
+    async generate(config, onProgress) {
       this.generating = true
       try {
         const response = await axios.post(`${API_BASE}/generate`, config)
-        return response.data
+        this.currentJobId = response.data.job_id
+        let job = response.data
+        while (!['succeeded', 'failed', 'cancelled'].includes(job.status)) {
+          await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL))
+          job = (await axios.get(`${API_BASE}/jobs/${this.currentJobId}`)).data
+          if (onProgress) onProgress(job)
+        }
+        if (job.status === 'failed') throw new Error(job.error || '產生失敗')
+        if (job.status === 'cancelled') throw new Error('工作已取消')
+        return job
       } catch (error) {
         console.error('Failed to generate documents:', error)
         throw error
       } finally {
         this.generating = false
+        this.currentJobId = null
       }
     },
 
+    async cancelGenerate() {
+      if (!this.currentJobId) return
+      await axios.post(`${API_BASE}/jobs/${this.currentJobId}/cancel`)
+    },
+
     async validate(config) {
       try {
         const response = await axios.post(`${API_BASE}/validate`, config)